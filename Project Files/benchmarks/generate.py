@@ -0,0 +1,87 @@
+# generate.py
+"""
+Synthetic sales order files in the sales_orders.csv format.
+
+Rows are drawn from the bundled sample with a seeded random generator:
+quantity, price and product line are resampled together (so prices stay
+realistic per product line), customer, status and order date are drawn
+from their own frequencies in the sample. The same seed and size always
+give the same file.
+
+    python -m benchmarks.generate --rows 1M
+    python -m benchmarks.generate --rows 100000 --seed 7 --out orders_100k.csv
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_FILE = os.path.join(PROJECT_DIR, "sales_orders.csv")
+DATA_DIR = os.path.join(PROJECT_DIR, "benchmarks", "data")
+
+# Named sizes used by the benchmarks
+SIZES = {"10k": 10_000, "100k": 100_000, "1M": 1_000_000, "10M": 10_000_000}
+CSV_COLUMNS = ["QUANTITYORDERED", "PRICEEACH", "SALES", "ORDERDATE", "STATUS", "PRODUCTLINE", "CUSTOMERNAME"]
+
+def ParseSize(size):
+    """Return a row count for a named size ("1M") or a plain number ("250000")."""
+    return SIZES[size] if size in SIZES else int(size)
+
+def _frequencies(column):
+    counts = column.value_counts()
+    return counts.index.to_numpy(), (counts / counts.sum()).to_numpy()
+
+def GenerateOrders(path, rows, seed=0, sample_file=SAMPLE_FILE, chunk_rows=1_000_000):
+    """Write `rows` synthetic orders to `path`, chunk_rows at a time."""
+    sample = pd.read_csv(sample_file, usecols=CSV_COLUMNS, dtype={"ORDERDATE": str}, keep_default_na=False)
+    lines = sample[["QUANTITYORDERED", "PRICEEACH", "PRODUCTLINE"]]
+    customers, customer_p = _frequencies(sample["CUSTOMERNAME"])
+    statuses, status_p = _frequencies(sample["STATUS"])
+    dates, date_p = _frequencies(sample["ORDERDATE"])
+    rng = np.random.default_rng(seed)
+
+    written = 0
+    while written < rows:
+        count = min(chunk_rows, rows - written)
+        picked = lines.iloc[rng.integers(len(lines), size=count)]
+        qty = picked["QUANTITYORDERED"].to_numpy()
+        price = picked["PRICEEACH"].to_numpy()
+        chunk = pd.DataFrame({
+            "QUANTITYORDERED": qty,
+            "PRICEEACH": price,
+            "SALES": (qty * price).round(2),
+            "ORDERDATE": rng.choice(dates, size=count, p=date_p),
+            "STATUS": rng.choice(statuses, size=count, p=status_p),
+            "PRODUCTLINE": picked["PRODUCTLINE"].to_numpy(),
+            "CUSTOMERNAME": rng.choice(customers, size=count, p=customer_p),
+        }, columns=CSV_COLUMNS)
+        chunk.to_csv(path, mode="w" if written == 0 else "a", header=written == 0, index=False)
+        written += count
+    return path
+
+def GeneratedOrdersFile(rows, seed=0):
+    """Return the path of a generated file of `rows` orders, creating it on first use."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    path = os.path.join(DATA_DIR, f"orders_{rows}_seed{seed}.csv")
+    if not os.path.exists(path):
+        tmp_path = path + ".tmp"
+        GenerateOrders(tmp_path, rows, seed)
+        os.replace(tmp_path, path)
+    return path
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic sales order CSV.")
+    parser.add_argument("--rows", default="100k", help=f"row count or one of {', '.join(SIZES)}")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="output file (default: benchmarks/data/orders_<rows>_seed<seed>.csv)")
+    args = parser.parse_args()
+
+    row_count = ParseSize(args.rows)
+    if args.out:
+        out_path = GenerateOrders(args.out, row_count, args.seed)
+    else:
+        out_path = GeneratedOrdersFile(row_count, args.seed)
+    print(f"Wrote {row_count} orders to {out_path}")
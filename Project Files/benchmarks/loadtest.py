@@ -0,0 +1,162 @@
+# loadtest.py
+"""
+Load test for concurrent single-order entry.
+
+Simulates many users submitting the VA01 form at once: each client sends
+its share of a stream of single orders through run_input_mode, as the Data
+Processing page does. Clients are threads by default (Streamlit serves every
+session from a thread of one process); --processes runs them as separate
+processes instead, like several app instances sharing one data directory.
+
+The stream is replayed once per history size, on top of that many
+generated orders, and reports p50/p95/p99 latency and throughput. Every
+order carries a unique customer tag, so afterwards the store is checked for
+lost and duplicated orders and the persisted aggregates are verified.
+
+    python -m benchmarks.loadtest --clients 8 --orders 400 --history 0,10k,100k
+"""
+
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from benchmarks.run import RESULTS_DIR, scratch_directory
+from benchmarks.generate import GeneratedOrdersFile, ParseSize
+from capstone_utils.runner import run_batch_mode, run_input_mode
+from capstone_utils.storage import get_order_store
+from capstone_utils.aggregates import VerifyAggregates
+
+PRODUCTS = ["Classic Cars", "Vintage Cars", "Motorcycles", "Trucks and Buses", "Planes", "Ships", "Trains"]
+STATUSES = ["Shipped", "In Process", "On Hold", "Resolved", "Disputed", "Cancelled"]
+
+def _order_tag(phase, client, number):
+    return f"LT{phase}-c{client}-n{number}"
+
+def _client(phase, client, orders, think_time):
+    """Send `orders` single orders one after another; return latencies and errors."""
+    latencies, errors = [], []
+    # Each client is one session, with its own folder for logs and reports
+    output_dir = f"session-{phase}-{client}"
+    os.makedirs(output_dir, exist_ok=True)
+    for number in range(orders):
+        started = time.perf_counter()
+        try:
+            run_input_mode(
+                _order_tag(phase, client, number),
+                PRODUCTS[number % len(PRODUCTS)],
+                1 + number % 50,
+                50.0 + number % 100,
+                "2004-06-01",
+                STATUSES[number % len(STATUSES)],
+                output_dir=output_dir,
+            )
+            latencies.append(time.perf_counter() - started)
+        except Exception:
+            errors.append(traceback.format_exc(limit=3))
+        if think_time:
+            time.sleep(think_time)
+    return latencies, errors
+
+def _silence_stdout():
+    # Client processes: drop the per-order "PDF generated" messages
+    sys.stdout = open(os.devnull, "w")
+
+def _percentile(cut_points, p):
+    return cut_points[p - 1] if cut_points else None
+
+def _check_store(phase, clients, orders_per_client, history):
+    # Every tagged order must be stored exactly once, next to the untouched history
+    df = get_order_store().read()
+    tags = df["Customer"][df["Customer"].str.startswith(f"LT{phase}-", na=False)]
+    counts = tags.value_counts()
+    expected = {_order_tag(phase, c, n) for c in range(clients) for n in range(orders_per_client)}
+    return {
+        "stored_orders": len(df),
+        "expected_orders": history + len(expected),
+        "lost": len(expected - set(counts.index)),
+        "duplicated": int((counts > 1).sum()),
+        "duplicate_sales_orders": int(df["Sales Order"].duplicated().sum()),
+        "aggregate_mismatches": len(VerifyAggregates(get_order_store())),
+    }
+
+def RunPhase(phase, history, clients=8, orders=200, think_time=0.0, processes=False):
+    """Replay `orders` single orders from `clients` clients on top of `history` stored orders."""
+    if history:
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_batch_mode(GeneratedOrdersFile(history), engine="columnar", report="off", log_level="off")
+    orders_per_client = max(1, orders // clients)
+
+    if processes:
+        pool = ProcessPoolExecutor(max_workers=clients, initializer=_silence_stdout)
+    else:
+        pool = ThreadPoolExecutor(max_workers=clients)
+    started = time.perf_counter()
+    # Threads share sys.stdout, so it is redirected once for all of them
+    with pool, contextlib.redirect_stdout(io.StringIO()):
+        futures = [pool.submit(_client, phase, client, orders_per_client, think_time) for client in range(clients)]
+        outcomes = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for client_latencies, _ in outcomes for latency in client_latencies]
+    errors = [error for _, client_errors in outcomes for error in client_errors]
+    cut_points = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else []
+    result = {
+        "history": history,
+        "clients": clients,
+        "orders": clients * orders_per_client,
+        "completed": len(latencies),
+        "errors": len(errors),
+        "first_errors": errors[:3],
+        "seconds": elapsed,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": _percentile(cut_points, 50),
+        "p95": _percentile(cut_points, 95),
+        "p99": _percentile(cut_points, 99),
+    }
+    result.update(_check_store(phase, clients, orders_per_client, history))
+    return result
+
+def RunLoadTest(histories, clients=8, orders=200, think_time=0.0, processes=False):
+    """Run one phase per history size, each in a fresh scratch directory."""
+    phases = []
+    for phase, history in enumerate(histories):
+        with scratch_directory(seed=None):
+            phases.append(RunPhase(phase, history, clients, orders, think_time, processes))
+        _print_phase(phases[-1])
+    return phases
+
+def _print_phase(result):
+    def ms(value):
+        return f"{value * 1000:8.1f}" if value is not None else "       -"
+    print(f"history={result['history']:<9} orders={result['completed']}/{result['orders']} "
+          f"p50={ms(result['p50'])}ms p95={ms(result['p95'])}ms p99={ms(result['p99'])}ms "
+          f"{result['throughput']:7.1f} orders/s  lost={result['lost']} duplicated={result['duplicated']} "
+          f"errors={result['errors']} aggregate mismatches={result['aggregate_mismatches']}")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load test concurrent single-order entry.")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--orders", type=int, default=200, help="orders per history size, split over the clients")
+    parser.add_argument("--history", default="0,10k,100k", help="comma-separated stored order counts to test on")
+    parser.add_argument("--think-time", type=float, default=0.0, help="seconds each client waits between orders")
+    parser.add_argument("--processes", action="store_true", help="run clients as processes instead of threads")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "latest_loadtest.json"))
+    args = parser.parse_args()
+
+    histories = [ParseSize(size) for size in args.history.split(",")]
+    report = RunLoadTest(histories, args.clients, args.orders, args.think_time, args.processes)
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    failed = any(r["lost"] or r["duplicated"] or r["duplicate_sales_orders"] or r["errors"]
+                 or r["aggregate_mismatches"] for r in report)
+    sys.exit(1 if failed else 0)
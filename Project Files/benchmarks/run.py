@@ -0,0 +1,258 @@
+# run.py
+"""
+Benchmarks for the batch engines, single orders, dashboard loading, chart
+builders, KPI aggregates and the batch PDF report.
+
+    python -m benchmarks.run --rows 100k
+    python -m benchmarks.run --rows 100k --save-baseline
+    python -m benchmarks.run --rows 1M --only batch_ --repeats 1 --warmup 0
+
+Every benchmark runs in its own scratch directory against a generated
+order file (see benchmarks/generate.py). Results are written as JSON to
+benchmarks/results/latest_<rows>.json and compared with
+benchmarks/results/baseline_<rows>.json when it exists; benchmarks that got
+slower than the baseline by more than --threshold are flagged and the
+command exits with status 1.
+"""
+
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(PROJECT_DIR, "benchmarks", "results")
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+
+import pandas as pd
+from streamlit import logger as streamlit_logger
+from benchmarks.generate import GeneratedOrdersFile, ParseSize, SIZES
+from capstone_utils.runner import run_batch_mode, run_input_mode
+from capstone_utils.number_range import configure_number_ranges
+from capstone_utils.aggregates import OrderAggregates
+from capstone_utils.pdf_export import export_batch_pdf
+from capstone_utils.summary import BatchSummary
+from utils import charts
+from utils.kpis import show_kpis
+from utils.loader import load_dashboard_df, invalidate_dashboard_cache
+
+# name -> setup(orders_file) returning (work, operations per call)
+BENCHMARKS = {}
+# Benchmarks that run with persisted number ranges: seeded ones cannot be shared by worker processes
+UNSEEDED = set()
+
+def benchmark(name, seeded=True):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        if not seeded:
+            UNSEEDED.add(name)
+        return setup
+    return register
+
+def _quiet_batch(orders_file, **options):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return run_batch_mode(orders_file, **options)
+
+@benchmark("batch_row")
+def _batch_row(orders_file):
+    return (lambda: _quiet_batch(orders_file, engine="row", report="off")), 1
+
+@benchmark("batch_columnar")
+def _batch_columnar(orders_file):
+    return (lambda: _quiet_batch(orders_file, engine="columnar", report="off")), 1
+
+@benchmark("batch_columnar_workers", seeded=False)
+def _batch_columnar_workers(orders_file):
+    workers = min(os.cpu_count() or 1, 4)
+    return (lambda: _quiet_batch(orders_file, engine="columnar", workers=workers, report="off")), 1
+
+@benchmark("input_mode")
+def _input_mode(orders_file, orders=20):
+    # Single orders on top of the generated history
+    _quiet_batch(orders_file, engine="columnar", report="off", log_level="off")
+
+    def work():
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(orders):
+                run_input_mode(f"Customer {i}", "Classic Cars", 10, 99.5, "2004-06-01")
+    return work, orders
+
+@benchmark("load_dashboard_df")
+def _load_dashboard_df(orders_file):
+    _quiet_batch(orders_file, engine="columnar", report="off", log_level="off")
+
+    def work():
+        invalidate_dashboard_cache() # Measure the cold load, not the cache hit
+        return load_dashboard_df()
+    return work, 1
+
+@benchmark("show_kpis")
+def _show_kpis(orders_file):
+    _quiet_batch(orders_file, engine="columnar", report="off", log_level="off")
+    invalidate_dashboard_cache()
+    df = load_dashboard_df()
+
+    def work():
+        invalidate_dashboard_cache()
+        show_kpis(df)
+    return work, 1
+
+@benchmark("aggregates_from_frame")
+def _aggregates_from_frame(orders_file):
+    _quiet_batch(orders_file, engine="columnar", report="off", log_level="off")
+    invalidate_dashboard_cache()
+    df = load_dashboard_df()
+    return (lambda: OrderAggregates.from_frame(df)), 1
+
+def _chart_benchmark(builder):
+    def setup(orders_file):
+        _quiet_batch(orders_file, engine="columnar", report="off", log_level="off")
+        invalidate_dashboard_cache()
+        agg = OrderAggregates.from_frame(load_dashboard_df())
+        # to_dict() builds the Vega-Lite spec with its data, as st.altair_chart does
+        return (lambda: builder(agg).to_dict()), 1
+    return setup
+
+for _name in dir(charts):
+    if _name.endswith("_chart") and callable(getattr(charts, _name)):
+        BENCHMARKS[f"chart_{_name}"] = _chart_benchmark(getattr(charts, _name))
+
+def _pdf_benchmark(mode):
+    def setup(orders_file):
+        _quiet_batch(orders_file, engine="columnar", report="off", log_level="off")
+        invalidate_dashboard_cache()
+        df = load_dashboard_df()
+        summary = BatchSummary()
+        summary.update(df)
+
+        def work():
+            with contextlib.redirect_stdout(io.StringIO()):
+                export_batch_pdf(df, "batch_report.pdf", summary, mode=mode)
+        return work, 1
+    return setup
+
+BENCHMARKS["export_batch_pdf_detail"] = _pdf_benchmark("detail")
+BENCHMARKS["export_batch_pdf_summary"] = _pdf_benchmark("summary")
+
+@contextlib.contextmanager
+def scratch_directory(seed=0):
+    """
+    Run inside a fresh temporary directory, removed afterwards. The application
+    reads and writes relative paths; this keeps them out of the project.
+    seed=None uses persisted number ranges (needed with several processes).
+    """
+    previous = os.getcwd()
+    path = tempfile.mkdtemp(prefix="mto-bench-")
+    os.chdir(path)
+    configure_number_ranges(seed=seed)
+    try:
+        yield path
+    finally:
+        os.chdir(previous)
+        shutil.rmtree(path, ignore_errors=True)
+
+def RunBenchmark(name, orders_file, repeats=3, warmup=1):
+    """Run one benchmark (after `warmup` untimed calls) and return its timings."""
+    with scratch_directory(seed=None if name in UNSEEDED else 0):
+        work, operations = BENCHMARKS[name](orders_file)
+        for _ in range(warmup):
+            work()
+        runs = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            work()
+            runs.append(time.perf_counter() - started)
+    seconds = statistics.median(runs)
+    return {
+        "seconds": seconds,
+        "seconds_per_op": seconds / operations,
+        "operations": operations,
+        "runs": runs,
+    }
+
+def RunBenchmarks(rows, names=None, repeats=3, warmup=1, seed=0):
+    """Run the named benchmarks (all by default) on a generated file of `rows` orders."""
+    orders_file = GeneratedOrdersFile(rows, seed)
+    results = {}
+    for name in names or BENCHMARKS:
+        results[name] = RunBenchmark(name, orders_file, repeats, warmup)
+        print(f"{name:<45} {results[name]['seconds']:>10.4f}s")
+    return {
+        "meta": {
+            "rows": rows,
+            "seed": seed,
+            "repeats": repeats,
+            "warmup": warmup,
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+def CompareResults(current, baseline, threshold=0.2, min_delta=0.01):
+    """
+    Return [(name, baseline seconds, current seconds, ratio)] for every
+    benchmark that is more than `threshold` (0.2 = 20%) slower per operation
+    than the baseline. Differences under min_delta seconds are timer noise
+    and never flagged.
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None or before["seconds_per_op"] <= 0:
+            continue
+        ratio = result["seconds_per_op"] / before["seconds_per_op"]
+        if ratio > 1 + threshold and result["seconds_per_op"] - before["seconds_per_op"] >= min_delta:
+            regressions.append((name, before["seconds_per_op"], result["seconds_per_op"], ratio))
+    return regressions
+
+def _write_json(data, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the MTO benchmarks.")
+    parser.add_argument("--rows", default="100k", help=f"row count or one of {', '.join(SIZES)}")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1, help="untimed calls before timing (use 0 for large files)")
+    parser.add_argument("--only", action="append", help="run benchmarks whose name starts with this (repeatable)")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/latest_<rows>.json)")
+    parser.add_argument("--baseline", help="baseline to compare with (default: benchmarks/results/baseline_<rows>.json)")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before flagging (0.2 = 20%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="also store these results as the baseline")
+    args = parser.parse_args()
+
+    # Streamlit warns about the missing script context on every call outside `streamlit run`
+    streamlit_logger.set_log_level(logging.ERROR)
+
+    row_count = ParseSize(args.rows)
+    selected = [name for name in BENCHMARKS if not args.only or name.startswith(tuple(args.only))]
+    report = RunBenchmarks(row_count, selected, args.repeats, args.warmup, args.seed)
+
+    _write_json(report, args.output or os.path.join(RESULTS_DIR, f"latest_{row_count}.json"))
+    baseline_path = args.baseline or os.path.join(RESULTS_DIR, f"baseline_{row_count}.json")
+    if args.save_baseline:
+        _write_json(report, baseline_path)
+        print(f"Saved baseline {baseline_path}")
+    elif os.path.exists(baseline_path):
+        with open(baseline_path, encoding="utf-8") as f:
+            regressions = CompareResults(report, json.load(f), args.threshold)
+        for name, before, now, ratio in regressions:
+            print(f"REGRESSION {name}: {before:.4f}s -> {now:.4f}s ({ratio:.2f}x)")
+        print("No regressions." if not regressions else f"{len(regressions)} regressions.")
+        sys.exit(1 if regressions else 0)
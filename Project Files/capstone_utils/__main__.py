@@ -0,0 +1,123 @@
+# __main__.py
+"""
+Command line for headless runs (cron jobs, scripts), working on the order
+store of the current directory like the dashboard does:
+
+    python -m capstone_utils batch sales_orders.csv --engine columnar --workers 4 --no-pdf
+    python -m capstone_utils order "Land of Toys Inc." "Classic Cars" 10 99.5 2004-06-01 --status Shipped
+    python -m capstone_utils report --mode summary --output batch_report.pdf
+
+Each subcommand imports the modules it needs when it runs: --help and
+argument errors return without loading pandas, and runs without a PDF
+never load reportlab.
+"""
+
+import argparse
+import os
+import sys
+
+def _batch(args):
+    from .runner import run_batch_mode
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    summary = run_batch_mode(
+        args.input,
+        engine=args.engine,
+        append=args.append,
+        log_level="off" if args.no_log else args.log_level,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        report="off" if args.no_pdf else args.report,
+        report_rows=args.report_rows,
+        output_dir=args.output_dir,
+        deduplicate=not args.keep_duplicates,
+    )
+    for name, value in summary.as_dict().items():
+        print(f"{name}: {value}")
+    # A file that was appended before is a success: there was nothing new to store
+    return 0 if summary.total_orders or summary.duplicate_rows or summary.skipped_rows else 1
+
+def _order(args):
+    from .process import NormalizeOrderDate
+    from .runner import run_input_mode
+
+    if NormalizeOrderDate(args.order_date) is None:
+        print(f"error: order_date is not a date: {args.order_date!r}", file=sys.stderr)
+        return 2
+    os.makedirs(args.output_dir, exist_ok=True)
+    order = run_input_mode(
+        args.customer, args.product, args.qty, args.price, args.order_date, args.status,
+        log_level="off" if args.no_log else "full",
+        output_dir=args.output_dir,
+        report=not args.no_pdf,
+    )
+    print(f"Stored {order['Sales Order']} ({order['Status']}, {order['Billing Status']})")
+    return 0
+
+def _report(args):
+    from .storage import get_order_store
+    from .aggregates import LoadAggregates, RebuildAggregates
+    from .status_rules import StoredRuleVersions
+    from .summary import BatchSummary
+    from .pdf_export import export_batch_pdf
+
+    store = get_order_store()
+    summary = BatchSummary()
+    # Listed orders and metrics of the same version; writers wait while aggregates are rebuilt
+    with store.lock():
+        # Only the listed orders are read; the metrics come from the persisted aggregates
+        chunks = store.iter_chunks(max(args.rows, 1))
+        listed = next(chunks, None)
+        chunks.close()
+        if listed is None:
+            print("No stored orders.", file=sys.stderr)
+            return 1
+        summary.aggregates = LoadAggregates(store) or RebuildAggregates(store)
+        summary.rule_version = ", ".join(StoredRuleVersions(store)) or None
+    export_batch_pdf(listed, args.output, summary, mode=args.mode, max_rows=args.rows)
+    return 0
+
+def _parser():
+    parser = argparse.ArgumentParser(prog="python -m capstone_utils", description="Process MTO sales orders without the dashboard.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("batch", help="process a sales order CSV into the order store")
+    batch.add_argument("input", nargs="?", default="sales_orders.csv", help="sales order CSV (default: sales_orders.csv)")
+    batch.add_argument("--output-dir", default=".", help="folder for the flow logs and batch_report.pdf")
+    batch.add_argument("--engine", choices=["row", "columnar"], default="columnar")
+    batch.add_argument("--append", action="store_true", help="add to the stored orders instead of replacing them")
+    batch.add_argument("--keep-duplicates", action="store_true", help="with --append, also add rows that are stored already")
+    batch.add_argument("--chunk-size", type=int, help="stream the file this many rows at a time")
+    batch.add_argument("--workers", type=int, default=1, help="process the file in this many processes")
+    batch.add_argument("--log-level", choices=["full", "summary", "off"], default="full")
+    batch.add_argument("--no-log", action="store_true", help="write no flow log (same as --log-level off)")
+    batch.add_argument("--report", choices=["detail", "summary"], default="detail", help="batch_report.pdf content")
+    batch.add_argument("--report-rows", type=int, default=1000, help="orders listed in a detail report")
+    batch.add_argument("--no-pdf", action="store_true", help="write no batch_report.pdf")
+    batch.set_defaults(run=_batch)
+
+    order = commands.add_parser("order", help="process and store a single order, as the VA01 form does")
+    order.add_argument("customer")
+    order.add_argument("product")
+    order.add_argument("qty", type=int)
+    order.add_argument("price", type=float)
+    order.add_argument("order_date", help="YYYY-MM-DD")
+    order.add_argument("--status", default="Shipped")
+    order.add_argument("--output-dir", default=".", help="folder for the flow log and input_report.pdf")
+    order.add_argument("--no-log", action="store_true", help="write no flow log")
+    order.add_argument("--no-pdf", action="store_true", help="write no input_report.pdf")
+    order.set_defaults(run=_order)
+
+    report = commands.add_parser("report", help="write a batch report PDF of the stored orders")
+    report.add_argument("--mode", choices=["detail", "summary"], default="detail")
+    report.add_argument("--rows", type=int, default=1000, help="orders listed in a detail report")
+    report.add_argument("--output", default="batch_report.pdf")
+    report.set_defaults(run=_report)
+    return parser
+
+def main(argv=None):
+    args = _parser().parse_args(argv)
+    return args.run(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
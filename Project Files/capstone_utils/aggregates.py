@@ -0,0 +1,255 @@
+# aggregates.py
+"""
+Shared order aggregates.
+
+One OrderAggregates object holds every total and grouping the dashboard
+charts, KPI tiles and PDF reports need, computed in a handful of passes over
+the order frame. Charts and reports read from it instead of running their
+own groupby/value_counts on the full data.
+
+The aggregates of the stored orders are persisted next to them
+(orders.aggregates.json) and updated in place as orders are appended:
+O(1) per single order, O(batch) per appended batch. Rebuild and check them
+from scratch with:
+
+    python -m capstone_utils.aggregates --verify
+    python -m capstone_utils.aggregates --rebuild
+"""
+
+import json
+import os
+import pandas as pd
+from .locking import atomic_path
+from .schema import DATE_FORMAT
+
+AGGREGATES_SUFFIX = ".aggregates.json"
+
+# Per-key totals; the revenue ones are kept rounded to cents when saved
+GROUPINGS = ("revenue_by_date", "revenue_by_customer", "orders_by_customer",
+             "revenue_by_product", "status_counts", "delivery_counts", "billing_counts")
+TOTALS = ("total_orders", "total_revenue", "confirmed_orders", "production_orders")
+
+def _value_counts(series):
+    # Categorical columns also count categories that do not occur in this frame
+    counts = series.value_counts()
+    return counts[counts > 0]
+
+def _add_counts(target, series):
+    # Merge a grouped Series into a {key: total} dict
+    for key, value in series.items():
+        if hasattr(value, "item"):
+            value = value.item()
+        target[key] = target.get(key, 0) + value
+
+class OrderAggregates:
+    """Totals and groupings of a set of orders (dashboard columns)."""
+
+    def __init__(self):
+        self.total_orders = 0
+        self.total_revenue = 0.0
+        self.confirmed_orders = 0
+        self.production_orders = 0
+        self.revenue_by_date = {}
+        self.revenue_by_customer = {}
+        self.orders_by_customer = {}
+        self.revenue_by_product = {}
+        self.status_counts = {}
+        self.delivery_counts = {}
+        self.billing_counts = {}
+
+    @classmethod
+    def from_frame(cls, df):
+        aggregates = cls()
+        aggregates.update(df)
+        return aggregates
+
+    def update(self, df):
+        """Add the orders in `df` to the aggregates."""
+        if df.empty:
+            return
+        self.total_orders += len(df)
+        self.total_revenue += float(df["Amount"].sum())
+        self.confirmed_orders += int(df["Confirmed"].sum())
+        # Production order numbers are unique per order, so counting them
+        # gives the same figure as nunique() without hashing every ID
+        self.production_orders += int(df["Production Order"].notna().sum())
+
+        by_date = df.groupby("Order Date", sort=False)["Amount"].sum()
+        if isinstance(by_date.index, pd.DatetimeIndex):
+            # Typed frames (see schema.py) hold datetimes; the aggregates key days as text
+            by_date.index = by_date.index.strftime(DATE_FORMAT)
+        _add_counts(self.revenue_by_date, by_date)
+        by_customer = df.groupby("Customer", sort=False, observed=True)["Amount"].agg(["sum", "size"])
+        _add_counts(self.revenue_by_customer, by_customer["sum"])
+        _add_counts(self.orders_by_customer, by_customer["size"])
+        _add_counts(self.revenue_by_product, df.groupby("Product", sort=False, observed=True)["Amount"].sum())
+
+        _add_counts(self.status_counts, _value_counts(df["Status"]))
+        _add_counts(self.delivery_counts, _value_counts(df["Delivery"]))
+        _add_counts(self.billing_counts, _value_counts(df["Billing Status"]))
+
+    def add_order(self, order):
+        """Add one order (a ProcessOrder result) in O(1)."""
+        amount = order["Amount"]
+        self.total_orders += 1
+        self.total_revenue += amount
+        self.confirmed_orders += int(bool(order["Confirmed"]))
+        self.production_orders += int(order["Production Order"] is not None)
+        for target, key, value in (
+            (self.revenue_by_date, order["Order Date"], amount),
+            (self.revenue_by_customer, order["Customer"], amount),
+            (self.orders_by_customer, order["Customer"], 1),
+            (self.revenue_by_product, order["Product"], amount),
+            (self.status_counts, order["Status"], 1),
+            (self.delivery_counts, order["Delivery"], 1),
+            (self.billing_counts, order["Billing Status"], 1),
+        ):
+            target[key] = target.get(key, 0) + value
+
+    def merge(self, other):
+        """Add another OrderAggregates (e.g. of an appended batch) to this one."""
+        for name in TOTALS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for name in GROUPINGS:
+            _add_counts(getattr(self, name), getattr(other, name))
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in TOTALS}
+        data["total_revenue"] = round(self.total_revenue, 2)
+        for name in GROUPINGS:
+            values = getattr(self, name)
+            if name.startswith("revenue"):
+                values = {key: round(value, 2) for key, value in values.items()}
+            data[name] = values
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        aggregates = cls()
+        for name in TOTALS + GROUPINGS:
+            setattr(aggregates, name, data[name])
+        return aggregates
+
+    def differences(self, other, tolerance=0.005):
+        """Return {field: (self value, other value)} for every figure that differs."""
+        mine, theirs = self.to_dict(), other.to_dict()
+        diffs = {}
+        for name in TOTALS:
+            if abs(mine[name] - theirs[name]) > tolerance:
+                diffs[name] = (mine[name], theirs[name])
+        for name in GROUPINGS:
+            for key in set(mine[name]) | set(theirs[name]):
+                a, b = mine[name].get(key, 0), theirs[name].get(key, 0)
+                if abs(a - b) > tolerance:
+                    diffs[f"{name}[{key}]"] = (a, b)
+        return diffs
+
+    # Derived figures used by the KPI tiles, funnel and reports
+    @property
+    def delivered_orders(self):
+        return self.delivery_counts.get("Delivered", 0)
+
+    @property
+    def paid_count(self):
+        return self.billing_counts.get("Paid", 0)
+
+    @property
+    def unpaid_count(self):
+        return self.billing_counts.get("Unpaid", 0)
+
+    # Small frames for the chart builders
+    def counts_frame(self, counts, label):
+        data = pd.DataFrame({label: list(counts), "Count": list(counts.values())})
+        return data.sort_values("Count", ascending=False, kind="stable").reset_index(drop=True)
+
+    def confirmed_frame(self):
+        counts = {True: self.confirmed_orders, False: self.total_orders - self.confirmed_orders}
+        return self.counts_frame({k: v for k, v in counts.items() if v}, "Confirmed")
+
+    def revenue_by_date_frame(self):
+        data = pd.DataFrame({"Order Date": list(self.revenue_by_date), "Amount": list(self.revenue_by_date.values())})
+        return data.sort_values("Order Date").reset_index(drop=True)
+
+    def revenue_by_month_frame(self):
+        # Months are rolled up from the daily totals, not from the order rows
+        data = self.revenue_by_date_frame()
+        data["Year-Month"] = pd.to_datetime(data["Order Date"]).dt.to_period("M").astype(str)
+        monthly = data.groupby("Year-Month")["Amount"].sum().round(2)
+        return monthly.reset_index()
+
+    def revenue_by_customer_frame(self):
+        return pd.DataFrame({"Customer": list(self.revenue_by_customer), "Amount": list(self.revenue_by_customer.values())})
+
+    def orders_by_customer_frame(self):
+        data = pd.DataFrame({"Customer": list(self.orders_by_customer), "Orders": list(self.orders_by_customer.values())})
+        return data.sort_values("Orders", ascending=False, kind="stable").reset_index(drop=True)
+
+    def revenue_by_product_frame(self):
+        data = pd.DataFrame({"Product": list(self.revenue_by_product), "Amount": list(self.revenue_by_product.values())})
+        return data.sort_values("Product").reset_index(drop=True)
+
+def LoadAggregates(store):
+    """
+    Return the persisted aggregates of the stored orders, or None if there are
+    none or they were saved for a different version of the data.
+    """
+    version = store.version()
+    path = store.sidecar_path(AGGREGATES_SUFFIX)
+    if version is None or not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if saved.get("store_version") != version[-1]:
+        return None
+    return OrderAggregates.from_dict(saved["aggregates"])
+
+def SaveAggregates(aggregates, store):
+    """Persist aggregates for the current version of the stored orders."""
+    version = store.version()
+    if version is None:
+        return
+    path = store.sidecar_path(AGGREGATES_SUFFIX)
+    with atomic_path(path) as tmp_path, open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"store_version": version[-1], "aggregates": aggregates.to_dict()}, f)
+
+def RebuildAggregates(store):
+    """Compute the aggregates of the stored orders from scratch and persist them."""
+    aggregates = OrderAggregates()
+    for chunk in store.iter_chunks():
+        aggregates.update(chunk)
+    SaveAggregates(aggregates, store)
+    return aggregates
+
+def VerifyAggregates(store):
+    """Compare the persisted aggregates with a from-scratch computation."""
+    persisted = LoadAggregates(store)
+    fresh = OrderAggregates()
+    for chunk in store.iter_chunks():
+        fresh.update(chunk)
+    if persisted is None:
+        if fresh.total_orders == 0:
+            return {}
+        return {"persisted aggregates": ("missing or stale", "rebuild needed")}
+    return persisted.differences(fresh)
+
+if __name__ == "__main__":
+    import argparse
+    from .storage import get_order_store
+
+    parser = argparse.ArgumentParser(description="Check or rebuild the persisted order aggregates.")
+    parser.add_argument("--rebuild", action="store_true", help="recompute from scratch and save")
+    parser.add_argument("--verify", action="store_true", help="compare the saved aggregates with a fresh computation")
+    args = parser.parse_args()
+
+    order_store = get_order_store()
+    if args.rebuild:
+        rebuilt = RebuildAggregates(order_store)
+        print(f"Rebuilt aggregates for {rebuilt.total_orders} orders.")
+    if args.verify or not args.rebuild:
+        differences = VerifyAggregates(order_store)
+        for field, (saved, fresh) in sorted(differences.items()):
+            print(f"MISMATCH {field}: saved={saved} fresh={fresh}")
+        print("Aggregates match." if not differences else f"{len(differences)} mismatches.")
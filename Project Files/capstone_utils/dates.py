@@ -0,0 +1,89 @@
+# dates.py
+"""
+Order date normalization.
+
+Order files repeat a small set of date strings (e.g. "2/24/2003 0:00") over
+millions of rows. DateNormalizer detects the date format of a file once,
+parses each distinct raw value once (vectorized per column or chunk) and
+remembers the result. Values that are not dates become None and are
+recorded with their line number in the file instead of being passed
+through as raw strings.
+"""
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+OUTPUT_FORMAT = "%Y-%m-%d"
+
+class DateNormalizer:
+    """Turns raw order dates into YYYY-MM-DD strings, one run or file at a time."""
+
+    def __init__(self, date_format=None, track_invalid=True, max_cached=100_000):
+        self.date_format = date_format # Detected from the first values when None
+        self.track_invalid = track_invalid
+        self.max_cached = max_cached
+        self.invalid = [] # (line number, raw value) of every unparseable date
+        self._cache = {}
+
+    def normalize(self, value, line=None):
+        """Return one date as YYYY-MM-DD, or None (recorded with `line`) if it is not a date."""
+        if hasattr(value, "strftime"):
+            return value.strftime(OUTPUT_FORMAT)
+        if isinstance(value, str):
+            self._trim_cache()
+            if value not in self._cache:
+                self._parse([value])
+            normalized = self._cache[value]
+        else:
+            normalized = None
+        if normalized is None and self.track_invalid:
+            self.invalid.append((line, value))
+        return normalized
+
+    def normalize_column(self, dates, first_line=2):
+        """
+        Normalize a Series of raw dates. first_line is the file line of the
+        first value (line 2 is the first row after the header).
+        """
+        self._trim_cache()
+        values = pd.unique(dates)
+        missing = [value for value in values if isinstance(value, str) and value not in self._cache]
+        if missing:
+            self._parse(missing)
+        normalized = dates.map(self._cache).astype(object)
+
+        bad = normalized.isna().to_numpy()
+        if bad.any():
+            normalized[bad] = None
+            if self.track_invalid:
+                positions = np.flatnonzero(bad)
+                self.invalid += zip((first_line + positions).tolist(), dates.iloc[positions].tolist())
+        return normalized
+
+    def _trim_cache(self):
+        # Long-running processes see new dates over time; start over rather than grow without bound
+        if len(self._cache) > self.max_cached:
+            self._cache.clear()
+
+    def _parse(self, strings):
+        if self.date_format is None:
+            self.date_format = _detect_format(strings)
+        if self.date_format is not None:
+            parsed = pd.to_datetime(pd.Series(strings, dtype=object), format=self.date_format, errors="coerce")
+        else:
+            parsed = [pd.NaT] * len(strings)
+
+        for value, stamp in zip(strings, parsed):
+            if pd.isna(stamp):
+                # Values in another format get pandas' per-value inference, like before
+                stamp = pd.to_datetime(value, errors="coerce")
+            self._cache[value] = None if pd.isna(stamp) else stamp.strftime(OUTPUT_FORMAT)
+
+def _detect_format(strings, sample=20):
+    # First format pandas can guess from a sample of the values
+    for value in strings[:sample]:
+        date_format = guess_datetime_format(value)
+        if date_format is not None:
+            return date_format
+    return None
@@ -0,0 +1,234 @@
+# doc_flow.py
+"""
+Document flow index.
+
+Like SAP's "Display Document Flow" (VA03), any document number of an order
+(SO, PL, PO or INV) resolves to the whole chain: sales order, planned order,
+production order, delivery status and invoice, with customer, product and
+amounts. The chains are kept in a small SQLite database next to the stored
+orders (orders.docflow.db) with an index per document type and on the
+customer, so a lookup is one index probe instead of a scan of the orders,
+and prefix searches are index range scans.
+
+Writers append the orders they store to an index that is up to date
+(O(batch) per appended batch, O(1) per single order) and record the store
+version it matches. An index saved for another version, e.g. after a batch
+overwrote the orders, is rebuilt from the store the next time it is opened,
+so overwrite runs do not pay for indexing. Delivery numbers are
+not part of the stored orders (the Delivery column holds the delivery
+status), so deliveries are shown in the chain but cannot be looked up.
+
+    python -m capstone_utils.doc_flow SO-0000000042
+    python -m capstone_utils.doc_flow --rebuild
+"""
+
+import os
+import sqlite3
+from contextlib import contextmanager
+import pandas as pd
+from .schema import ORDER_COLUMNS
+from .number_range import NUMBER_WIDTH
+
+FLOW_SUFFIX = ".docflow.db"
+
+# Document type (number prefix) -> column holding its numbers
+DOCUMENT_COLUMNS = {
+    "SO": "Sales Order",
+    "PL": "Planned Order",
+    "PO": "Production Order",
+    "INV": "Invoice",
+}
+# The documents of the chain and what they hold; the rule version stays with the stored orders
+FLOW_COLUMNS = [name for name in ORDER_COLUMNS if name != "Rule Version"]
+
+class DocumentFlowIndex:
+    """Order chains of the stored orders, indexed by document number and customer."""
+
+    def __init__(self, path):
+        self.path = path
+
+    @classmethod
+    def for_store(cls, store):
+        return cls(store.sidecar_path(FLOW_SUFFIX))
+
+    @contextmanager
+    def _connect(self):
+        con = sqlite3.connect(self.path, timeout=30)
+        try:
+            yield con
+        finally:
+            con.close()
+
+    @contextmanager
+    def _connect_writer(self):
+        # The schema is created by writers only, under the store lock
+        with self._connect() as con:
+            columns = ", ".join(f'"{name}" {ORDER_COLUMNS[name]}' for name in FLOW_COLUMNS)
+            con.execute(f"CREATE TABLE IF NOT EXISTS flows ({columns})")
+            # Write counter of the store version the index was last brought up to date with
+            con.execute("CREATE TABLE IF NOT EXISTS flow_meta (key TEXT PRIMARY KEY, value INTEGER)")
+            con.commit()
+            yield con
+
+    def _query(self, sql, params=()):
+        # Readers run no DDL or DML; an index that was never written reads as empty
+        if not os.path.exists(self.path):
+            return []
+        with self._connect() as con:
+            try:
+                return con.execute(sql, params).fetchall()
+            except sqlite3.OperationalError as error:
+                if str(error).startswith("no such table"):
+                    return []
+                raise
+
+    def store_version(self):
+        """Write counter of the store version this index matches, or None."""
+        rows = self._query("SELECT value FROM flow_meta WHERE key = 'store_version'")
+        return rows[0][0] if rows else None
+
+    def mark_synced(self, store_version):
+        with self._connect_writer() as con, con:
+            # Indexes are dropped by clear() and built here once, which is much faster
+            # than maintaining them row by row while a whole history is inserted
+            for prefix, column in list(DOCUMENT_COLUMNS.items()) + [("customer", "Customer")]:
+                con.execute(f'CREATE INDEX IF NOT EXISTS flows_{prefix.lower()} ON flows ("{column}")')
+            con.execute("INSERT OR REPLACE INTO flow_meta VALUES ('store_version', ?)", (store_version,))
+
+    def add(self, df):
+        """Index the orders in `df` (dashboard columns)."""
+        if df.empty:
+            return
+        names = ", ".join(f'"{name}"' for name in FLOW_COLUMNS)
+        placeholders = ", ".join("?" for _ in FLOW_COLUMNS)
+        # tolist() turns numpy scalars into Python values sqlite3 can bind
+        rows = zip(*(df[name].tolist() for name in FLOW_COLUMNS))
+        with self._connect_writer() as con, con:
+            con.execute("DELETE FROM flow_meta WHERE key = 'store_version'")
+            con.executemany(f"INSERT INTO flows ({names}) VALUES ({placeholders})", rows)
+
+    def clear(self):
+        with self._connect_writer() as con, con:
+            for prefix in list(DOCUMENT_COLUMNS) + ["customer"]:
+                con.execute(f"DROP INDEX IF EXISTS flows_{prefix.lower()}")
+            con.execute("DELETE FROM flows")
+            con.execute("DELETE FROM flow_meta")
+
+    def lookup(self, number):
+        """Return the order chain (a dict of dashboard columns) of a document number, or None."""
+        number = number.strip()
+        for column, key in _columns_for(number):
+            rows = self._query(f'SELECT * FROM flows WHERE "{column}" = ? LIMIT 1', (key,))
+            if rows:
+                flow = dict(zip(FLOW_COLUMNS, rows[0]))
+                flow["Confirmed"] = bool(flow["Confirmed"])
+                return flow
+        return None
+
+    def search(self, prefix, limit=50):
+        """Order chains with a document number starting with `prefix`, in number order."""
+        prefix = prefix.strip()
+        if not prefix:
+            return self._frame([])
+        rows = []
+        for column, key in _columns_for(prefix):
+            # A range on the index instead of LIKE, which SQLite cannot serve from it
+            upper = key[:-1] + chr(ord(key[-1]) + 1)
+            rows += self._query(f'SELECT * FROM flows WHERE "{column}" >= ? AND "{column}" < ? '
+                                f'ORDER BY "{column}" LIMIT ?', (key, upper, limit - len(rows)))
+            if len(rows) >= limit:
+                break
+        return self._frame(rows)
+
+    def customer_flows(self, customer, limit=1000):
+        """Order chains of one customer, oldest first."""
+        rows = self._query('SELECT * FROM flows WHERE "Customer" = ? ORDER BY rowid LIMIT ?', (customer, limit))
+        return self._frame(rows)
+
+    def count(self):
+        rows = self._query("SELECT COUNT(*) FROM flows")
+        return rows[0][0] if rows else 0
+
+    def _frame(self, rows):
+        df = pd.DataFrame(rows, columns=FLOW_COLUMNS)
+        df["Confirmed"] = df["Confirmed"].astype(bool)
+        return df
+
+def _padded(digits):
+    # "123" is document number 123 (0000000123); digits typed with leading zeros are kept as a prefix
+    if digits.isdigit() and not digits.startswith("0") and len(digits) < NUMBER_WIDTH:
+        return digits.zfill(NUMBER_WIDTH)
+    return digits
+
+def _columns_for(number):
+    # (column, number to look for): "SO-123" only needs the sales order index,
+    # a bare "123" is tried as every document type
+    doc_type, dash, digits = number.partition("-")
+    doc_type = doc_type.upper()
+    if doc_type in DOCUMENT_COLUMNS:
+        return [(DOCUMENT_COLUMNS[doc_type], doc_type + dash + _padded(digits))]
+    return [(column, f"{doc_type}-{_padded(number)}") for doc_type, column in DOCUMENT_COLUMNS.items()]
+
+def LoadDocumentFlow(store):
+    """
+    Return the document flow index of the stored orders, or None if it was
+    saved for a different version of the data. An empty store gets its index
+    if that is empty too; one that still holds orders is stale.
+    """
+    index = DocumentFlowIndex.for_store(store)
+    version = store.version()
+    if version is None:
+        return index if index.count() == 0 else None
+    if index.store_version() != version[-1]:
+        return None
+    return index
+
+def SaveDocumentFlow(index, store):
+    """Record that `index` matches the stored orders. A None (stale) index is left to OpenDocumentFlow."""
+    if index is None:
+        return None
+    version = store.version()
+    index.mark_synced(None if version is None else version[-1])
+    return index
+
+def RebuildDocumentFlow(store):
+    """Index the stored orders from scratch."""
+    index = DocumentFlowIndex.for_store(store)
+    index.clear()
+    for chunk in store.iter_chunks():
+        index.add(chunk)
+    return SaveDocumentFlow(index, store)
+
+def OpenDocumentFlow(store):
+    """Return an up-to-date index for readers, rebuilding it (under the store lock) if needed."""
+    index = LoadDocumentFlow(store)
+    if index is None:
+        with store.lock():
+            index = LoadDocumentFlow(store) or RebuildDocumentFlow(store)
+    return index
+
+if __name__ == "__main__":
+    import argparse
+    from .storage import get_order_store
+
+    parser = argparse.ArgumentParser(description="Look up order chains in the document flow index.")
+    parser.add_argument("number", nargs="?", help="document number or number prefix (SO-, PL-, PO-, INV-)")
+    parser.add_argument("--customer", help="list the order chains of a customer")
+    parser.add_argument("--rebuild", action="store_true", help="index the stored orders from scratch")
+    args = parser.parse_args()
+
+    order_store = get_order_store()
+    if args.rebuild:
+        with order_store.lock():
+            rebuilt = RebuildDocumentFlow(order_store)
+        print(f"Indexed {rebuilt.count()} orders.")
+    flow_index = OpenDocumentFlow(order_store)
+    if args.number:
+        found = flow_index.lookup(args.number)
+        if found is not None:
+            for name, value in found.items():
+                print(f"{name:<18} {value}")
+        else:
+            print(flow_index.search(args.number).to_string(index=False))
+    if args.customer:
+        print(flow_index.customer_flows(args.customer).to_string(index=False))
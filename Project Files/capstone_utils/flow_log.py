@@ -0,0 +1,178 @@
+# flow_log.py
+"""
+Structured MTO flow logging.
+
+Each processed order becomes one JSON record in a .jsonl file. Records go
+through a bounded queue to a background writer thread that writes them in
+batches, so the processing loop never waits on print() or a per-line
+file write. The human-readable text log is rendered from the records
+afterwards with RenderTextLog().
+
+Log levels:
+    "full"     every flow step plus the process summary
+    "summary"  only the process summary fields
+    "off"      nothing is written
+"""
+
+import json
+import os
+import queue
+import threading
+from .models import OrderBatch
+from .locking import atomic_path
+
+LOG_LEVELS = ("full", "summary", "off")
+
+# Fields kept at the "summary" level; "full" keeps the whole order record
+SUMMARY_FIELDS = [
+    "Order Date", "Sales Order", "Status", "Production Order", "Confirmed",
+    "Delivery", "Invoice", "Billing Status", "Amount", "Rule Version",
+]
+
+_STOP = object()
+
+class _JsonlFile:
+    # Records another FlowLogger already wrote (e.g. a batch shard), copied in order
+    def __init__(self, path):
+        self.path = path
+
+def OrderLogLines(record):
+    """Return the text log lines for one order record."""
+    lines = []
+    if record.get("Log Level", "full") == "full":
+        lines += [
+            f"\n[{record['Order Date']}] Sales Order created for {record['Customer']}: "
+            f"{record['Qty']} x {record['Product']} @ {record['Price']:.2f}",
+            f"Planned Order generated from Sales Order {record['Sales Order']}",
+            f"Production Order created from Planned Order {record['Planned Order']}",
+        ]
+    lines += [
+        "\n--- Process Summary ---",
+        f"Order Date: {record['Order Date']}",
+        f"Sales Order ID: {record['Sales Order']}",
+        f"Status: {record['Status']}",
+        f"Production Order ID: {record['Production Order']}, Confirmed: {record['Confirmed']}",
+        f"Delivery Status: {record['Delivery']}",
+        f"Invoice: {record['Invoice']}",
+        f"Billing Status: {record['Billing Status']}, Amount: {record['Amount']:.2f}",
+        "-" * 50,
+    ]
+    return lines
+
+def RenderTextLog(jsonl_path, text_path):
+    """Render a JSONL flow log into the human-readable text log, one record at a time."""
+    with atomic_path(text_path) as tmp_path, \
+            open(jsonl_path, encoding="utf-8") as src, open(tmp_path, "w", encoding="utf-8") as out:
+        for line in src:
+            if line.strip():
+                out.write("\n".join(OrderLogLines(json.loads(line))) + "\n")
+
+def _json_default(value):
+    # numpy scalars from the columnar engine
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Cannot log value of type {type(value).__name__}")
+
+# One encoder for every record: json.dumps(..., default=...) would build a new one per call
+_encode_record = json.JSONEncoder(default=_json_default).encode
+
+class FlowLogger:
+    """Writes order records as JSONL from a background thread. Use as a context manager."""
+
+    def __init__(self, path, level="full", max_queue=1024, batch_size=512):
+        if level not in LOG_LEVELS:
+            raise ValueError(f"Unknown log level: {level!r} (expected one of {LOG_LEVELS})")
+        self.path = path
+        self.level = level
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._file = None
+        self._thread = None
+        self._error = None
+        if level != "off":
+            self._file = open(path, "w", encoding="utf-8")
+            self._thread = threading.Thread(target=self._drain, name="flow-log-writer", daemon=True)
+            self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def log_order(self, record):
+        """Queue one order record (a ProcessOrder result plus its Price)."""
+        if self._file is not None:
+            self._queue.put(record)
+
+    def log_frame(self, frame):
+        """
+        Queue a whole frame of order records, or an OrderBatch (logged with its
+        entered prices); it is serialized on the writer thread.
+        """
+        if self._file is not None and len(frame):
+            self._queue.put(frame)
+
+    def log_jsonl_file(self, path):
+        """Queue the records of another JSONL flow log; the file is removed once copied."""
+        if self._file is not None:
+            self._queue.put(_JsonlFile(path))
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def close(self):
+        if self._file is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._file.close()
+        self._file = None
+        if self._error is not None:
+            raise self._error
+
+    def _encode(self, item):
+        if isinstance(item, _JsonlFile):
+            with open(item.path, encoding="utf-8") as f:
+                text = f.read()
+            os.remove(item.path)
+            return text
+        if isinstance(item, OrderBatch):
+            item = item.to_frame(price=True)
+
+        if self.level == "summary":
+            fields = SUMMARY_FIELDS
+        else:
+            fields = list(item.columns) if hasattr(item, "columns") else list(item)
+
+        # Frames and single records go through the same encoder, so both engines write the same log
+        if hasattr(item, "columns"):
+            # tolist() gives the Python values a single record holds (and is much faster than to_dict)
+            names = fields + ["Log Level"]
+            extra = (self.level,)
+            rows = zip(*(item[name].tolist() for name in fields))
+            return "".join(_encode_record(dict(zip(names, row + extra))) + "\n" for row in rows)
+
+        record = {name: item[name] for name in fields}
+        record["Log Level"] = self.level
+        return _encode_record(record) + "\n"
+
+    def _drain(self):
+        while True:
+            batch = [self._queue.get()]
+            # Take whatever else is already waiting so it goes out in one write
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(item is _STOP for item in batch)
+            # After a failure keep draining so producers never block on a full queue
+            if self._error is None:
+                try:
+                    self._file.write("".join(self._encode(item) for item in batch if item is not _STOP))
+                    self._file.flush()
+                except Exception as error:
+                    self._error = error
+            if stop:
+                return
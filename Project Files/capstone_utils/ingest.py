@@ -0,0 +1,259 @@
+# ingest.py
+"""
+Idempotent batch ingestion.
+
+Appending the same file twice, or an extract that overlaps orders already
+stored, must not store those orders again. Every input row gets a stable
+row key: a 64-bit hash of the order as it is stored (order date, customer,
+product, quantity, amount in cents and status) together with the number
+of identical orders before it in the same file. Repeated lines within one
+file keep keys of their own, while the same line in a re-uploaded or
+overlapping extract gets the key it had the first time.
+
+The keys of the stored orders are kept next to them (orders.rowkeys.npz)
+as a sorted uint64 array, with the SHA-256 of every file appended and the
+store version they match. Append runs (see run_batch_mode) skip a file
+whose hash is recorded without parsing it, and otherwise process only the
+rows whose key is not stored yet. Single orders committed through the
+journal extend the keys too (see NewOrderKeys). Keys saved for another
+store version, e.g. after an overwrite run, are rebuilt from the stored
+orders when next needed; the file hashes are lost then, but the rows are
+still matched by their keys.
+
+    python -m capstone_utils.ingest new_extract.csv
+"""
+
+import hashlib
+import os
+import numpy as np
+import pandas as pd
+from .columnar import read_order_columns
+from .models import OrderAmounts
+from .dates import DateNormalizer
+from .locking import atomic_path
+
+ROW_KEYS_SUFFIX = ".rowkeys.npz"
+
+def FileHash(path, block_size=1 << 20):
+    """SHA-256 of a file's contents, as hex."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _count_rows(path):
+    # Data lines of a CSV file (quoted fields do not contain newlines in the order extracts)
+    with open(path, "rb") as f:
+        return max(sum(1 for _ in f) - 1, 0)
+
+def _text(values):
+    # Stores and input files may hold text as object or str columns; hash the same Python strings
+    return pd.Series(values, dtype=object).fillna("").to_numpy(dtype=object)
+
+def _order_hashes(order_dates, customers, products, qty, amounts, statuses):
+    cents = np.rint(np.asarray(amounts, dtype=np.float64) * 100).astype(np.int64)
+    orders = pd.DataFrame({
+        "Order Date": _text(order_dates),
+        "Customer": _text(customers),
+        "Product": _text(products),
+        "Qty": np.asarray(qty, dtype=np.int64),
+        "Cents": cents,
+        "Status": _text(statuses),
+    })
+    return pd.util.hash_pandas_object(orders, index=False).to_numpy()
+
+def _occurrence_keys(order_hashes, occurrences):
+    frame = pd.DataFrame({"order": order_hashes, "occurrence": np.asarray(occurrences, dtype=np.int64)})
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+def _row_keys(order_hashes, seen):
+    """
+    Row keys of orders given their hashes, numbering repeats of the same order
+    from the counts in `seen` (order hash -> orders so far). Returns the keys
+    and the updated counts.
+    """
+    hashes = pd.Series(order_hashes)
+    occurrence = hashes.groupby(hashes, sort=False).cumcount().to_numpy()
+    if len(seen):
+        occurrence = occurrence + seen.reindex(order_hashes, fill_value=0).to_numpy()
+    seen = seen.add(hashes.value_counts(), fill_value=0).astype(np.int64)
+    return _occurrence_keys(order_hashes, occurrence), seen
+
+def InputRowKeys(orders, dates, seen):
+    """
+    Row keys of a frame of input orders (see read_order_columns); returns them
+    with the updated counts. Amounts come from OrderAmounts, as both batch
+    engines store them, so the keys match those of the stored orders.
+    """
+    qty = orders["QUANTITYORDERED"].to_numpy()
+    price = orders["PRICEEACH"].to_numpy()
+    order_hashes = _order_hashes(
+        dates.normalize_column(orders["ORDERDATE"]), orders["CUSTOMERNAME"], orders["PRODUCTLINE"],
+        qty, OrderAmounts(qty, price), orders["STATUS"],
+    )
+    return _row_keys(order_hashes, seen)
+
+def StoredRowKeys(store):
+    """Row keys of the stored orders, computed from scratch."""
+    keys, seen = [], pd.Series(dtype=np.int64)
+    for chunk in store.iter_chunks():
+        order_hashes = _order_hashes(chunk["Order Date"], chunk["Customer"], chunk["Product"],
+                                     chunk["Qty"], chunk["Amount"], chunk["Status"])
+        chunk_keys, seen = _row_keys(order_hashes, seen)
+        keys.append(chunk_keys)
+    return np.concatenate(keys) if keys else np.array([], dtype=np.uint64)
+
+def _stored_occurrences(order_hash, ingested):
+    # Stored orders identical to this one: their keys are numbered 0, 1, ... (see StoredRowKeys)
+    start, size = 0, 64
+    while True:
+        occurrences = np.arange(start, start + size, dtype=np.int64)
+        stored = ingested.contains(_occurrence_keys(np.full(size, order_hash, dtype=np.uint64), occurrences))
+        if not stored.all():
+            return start + int(np.argmin(stored))
+        start, size = start + size, size * 2
+
+def NewOrderKeys(orders, ingested):
+    """
+    Row keys of orders (dashboard columns) stored after the ones in `ingested`
+    (an IngestedRows), numbered the way StoredRowKeys numbers them.
+    """
+    order_hashes = _order_hashes(orders["Order Date"], orders["Customer"], orders["Product"],
+                                 orders["Qty"], orders["Amount"], orders["Status"])
+    distinct = pd.unique(order_hashes)
+    seen = pd.Series([_stored_occurrences(order_hash, ingested) for order_hash in distinct],
+                     index=distinct, dtype=np.int64)
+    return _row_keys(order_hashes, seen)[0]
+
+def _sorted_keys(keys):
+    # Sorted and without repeats; cheaper than np.unique, which hashes first
+    keys = np.sort(np.asarray(keys, dtype=np.uint64))
+    return keys[np.concatenate(([True], keys[1:] != keys[:-1]))] if len(keys) else keys
+
+class IngestedRows:
+    """Row keys and file hashes of the stored orders."""
+
+    def __init__(self, keys=(), files=()):
+        self.keys = _sorted_keys(keys)
+        self.files = list(files)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def contains(self, keys):
+        """Boolean mask: which of `keys` are stored."""
+        positions = np.searchsorted(self.keys, keys)
+        found = positions < len(self.keys)
+        found[found] = self.keys[positions[found]] == keys[found]
+        return found
+
+    def add(self, keys, file_hash=None):
+        """Record newly stored keys, and the file they came from."""
+        keys = _sorted_keys(keys)
+        keys = keys[~self.contains(keys)]
+        if len(keys):
+            # A merge into the sorted keys, instead of sorting them all again
+            self.keys = np.insert(self.keys, np.searchsorted(self.keys, keys), keys)
+        if file_hash is not None and file_hash not in self.files:
+            self.files.append(file_hash)
+
+def LoadIngestedRows(store):
+    """
+    Return the persisted row keys of the stored orders, or None if there are
+    none or they were saved for a different version of the data.
+    """
+    version = store.version()
+    path = store.sidecar_path(ROW_KEYS_SUFFIX)
+    if version is None or not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as saved:
+            if int(saved["store_version"]) != version[-1]:
+                return None
+            return IngestedRows(saved["keys"], saved["files"].tolist())
+    except (OSError, ValueError, KeyError):
+        return None
+
+def SaveIngestedRows(rows, store):
+    """Persist row keys for the current version of the stored orders."""
+    version = store.version()
+    if version is None:
+        return
+    with atomic_path(store.sidecar_path(ROW_KEYS_SUFFIX)) as tmp_path, open(tmp_path, "wb") as f:
+        np.savez(f, keys=rows.keys, files=np.array(rows.files, dtype=str), store_version=version[-1])
+
+def OpenIngestedRows(store):
+    """Return the row keys of the stored orders, rebuilding them if they are stale. Hold the store lock."""
+    rows = LoadIngestedRows(store)
+    if rows is None:
+        rows = IngestedRows(StoredRowKeys(store))
+        SaveIngestedRows(rows, store)
+    return rows
+
+class NewOrders:
+    """The orders of an input file that are not stored yet (see SelectNewOrders)."""
+
+    def __init__(self, file_hash, path=None, keys=(), lines=(), duplicate_rows=0, skipped_rows=0):
+        self.file_hash = file_hash
+        self.path = path # CSV of the new orders; None when there are none
+        self.keys = np.asarray(keys, dtype=np.uint64)
+        self.lines = np.asarray(lines, dtype=np.int64) # Input file line of every new order
+        self.duplicate_rows = duplicate_rows # Rows already stored
+        self.skipped_rows = skipped_rows # Rows of a file appended before, not parsed
+
+    def file_lines(self, line_values):
+        """Map (line in self.path, value) pairs back to lines of the input file."""
+        return [(int(self.lines[line - 2]), value) for line, value in line_values]
+
+    def remove(self):
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+def SelectNewOrders(csv_file, ingested, output_path, chunk_size=None):
+    """
+    Write the orders of csv_file whose row key is not in `ingested` (an
+    IngestedRows) to output_path, chunk_size rows at a time, and return them
+    as NewOrders. A file whose hash is in `ingested` is not read at all.
+    """
+    file_hash = FileHash(csv_file)
+    if file_hash in ingested.files:
+        return NewOrders(file_hash, skipped_rows=_count_rows(csv_file))
+
+    dates = DateNormalizer(track_invalid=False)
+    seen = pd.Series(dtype=np.int64)
+    keys, lines, duplicates = [np.array([], dtype=np.uint64)], [np.array([], dtype=np.int64)], 0
+    line = 2 # File line of the first order after the header
+    chunks = read_order_columns(csv_file, chunk_size) if chunk_size else [read_order_columns(csv_file)]
+    for index, orders in enumerate(chunks):
+        chunk_keys, seen = InputRowKeys(orders, dates, seen)
+        new = ~ingested.contains(chunk_keys)
+        orders[new].to_csv(output_path, mode="w" if index == 0 else "a", header=index == 0, index=False)
+        keys.append(chunk_keys[new])
+        lines.append(line + np.flatnonzero(new))
+        duplicates += int(len(orders) - new.sum())
+        line += len(orders)
+    new_orders = NewOrders(file_hash, output_path, np.concatenate(keys), np.concatenate(lines), duplicates)
+    if not len(new_orders.keys):
+        new_orders.remove()
+        new_orders.path = None
+    return new_orders
+
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+    from .storage import get_order_store
+
+    parser = argparse.ArgumentParser(description="Count the orders of a file that are not stored yet.")
+    parser.add_argument("csv_file")
+    args = parser.parse_args()
+
+    order_store = get_order_store()
+    with order_store.lock():
+        stored_rows = OpenIngestedRows(order_store)
+    with tempfile.TemporaryDirectory() as scratch:
+        new_orders = SelectNewOrders(args.csv_file, stored_rows, os.path.join(scratch, "new_orders.csv"))
+    if new_orders.skipped_rows:
+        print(f"{args.csv_file} was appended before ({new_orders.skipped_rows} rows).")
+    else:
+        print(f"{len(new_orders.keys)} new orders, {new_orders.duplicate_rows} already stored.")
@@ -0,0 +1,183 @@
+# journal.py
+"""
+Group commit for single orders.
+
+Single orders from concurrent sessions are committed through the journal
+of their store. Orders that arrive while a commit is being written wait and
+go out together in the next one: one store lock, one store append and one
+aggregates, document flow and row key update per group instead of per
+order.
+
+Under the store lock, a group is first appended to the journal file next to
+the store (orders.journal.jsonl) and synced to disk, then appended to the
+store, and then cut from the journal again. A process that stops between
+the two writes leaves its group in the journal; the next process to open
+the journal of the store replays it, storing the orders whose Sales Order
+is not stored yet. An order whose commit raised is not stored.
+"""
+
+import json
+import os
+import threading
+import pandas as pd
+from .aggregates import OrderAggregates, LoadAggregates, SaveAggregates, RebuildAggregates
+from .doc_flow import LoadDocumentFlow, SaveDocumentFlow
+from .ingest import LoadIngestedRows, SaveIngestedRows, NewOrderKeys
+from .status_rules import RecordRuleVersion
+
+JOURNAL_SUFFIX = ".journal.jsonl"
+
+class _PendingOrder:
+    __slots__ = ("record", "wake", "leader", "committed", "error")
+
+    def __init__(self, record):
+        self.record = record
+        self.wake = threading.Event()
+        self.leader = False
+        self.committed = False
+        self.error = None
+
+class OrderJournal:
+    """Group-committing writer of single orders for one order store."""
+
+    def __init__(self, store):
+        self.store = store
+        self.path = store.sidecar_path(JOURNAL_SUFFIX)
+        self._mutex = threading.Lock()
+        self._pending = []
+        self._flushing = False
+        self.commits = 0 # Groups written by this process
+
+    def commit(self, record):
+        """
+        Store one order (a ProcessOrder result) and return once it is written.
+        Raises the error of the group commit if it failed.
+        """
+        order = _PendingOrder(record)
+        with self._mutex:
+            self._pending.append(order)
+            # The first order to arrive while nothing is being written leads the next commit
+            order.leader = not self._flushing
+            self._flushing = True
+        if not order.leader:
+            order.wake.wait()
+        if not order.committed:
+            self._flush()
+        if order.error is not None:
+            raise order.error
+
+    def _flush(self):
+        with self._mutex:
+            group, self._pending = self._pending, []
+        try:
+            self._write_group([order.record for order in group])
+        except Exception as error:
+            for order in group:
+                order.error = error
+        for order in group:
+            order.committed = True
+
+        with self._mutex:
+            if self._pending:
+                # Hand over to the first order that arrived during this commit
+                self._pending[0].leader = True
+                self._pending[0].wake.set()
+            else:
+                self._flushing = False
+        for order in group:
+            order.wake.set()
+
+    def replay(self):
+        """
+        Store the orders a stopped process left in the journal, unless they
+        were stored before it stopped, and empty the journal. Returns the
+        number of orders stored.
+        """
+        with self.store.lock():
+            records = _read_records(self.path)
+            numbers = {record["Sales Order"] for record in records}
+            for chunk in self.store.iter_chunks() if numbers else []:
+                numbers.difference_update(chunk["Sales Order"][chunk["Sales Order"].isin(numbers)])
+            missing = [record for record in records if record["Sales Order"] in numbers]
+            if missing:
+                self._store_group(missing)
+            self._truncate(0)
+        return len(missing)
+
+    def _write_group(self, records):
+        with self.store.lock():
+            offset = self._log(records)
+            try:
+                self._store_group(records)
+            finally:
+                # Stored or failed, the group is done with (a failed append stored nothing)
+                self._truncate(offset)
+        self.commits += 1
+
+    def _log(self, records):
+        # Append the group and sync it before the store is written; returns where it starts
+        with open(self.path, "ab") as f:
+            offset = f.tell()
+            f.write("".join(json.dumps(record) + "\n" for record in records).encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        return offset
+
+    def _truncate(self, offset):
+        if not os.path.exists(self.path):
+            return
+        if offset == 0:
+            os.remove(self.path)
+        else:
+            with open(self.path, "r+b") as f:
+                f.truncate(offset)
+
+    def _store_group(self, records):
+        store = self.store
+        aggregates = OrderAggregates() if store.version() is None else LoadAggregates(store)
+        flow_index = LoadDocumentFlow(store)
+        ingested = LoadIngestedRows(store)
+        orders = pd.DataFrame(records)
+        store.append(orders)
+        # The orders are stored; aggregates that fail to save are rebuilt on next use
+        if aggregates is None:
+            RebuildAggregates(store)
+        else:
+            for record in records:
+                aggregates.add_order(record)
+            SaveAggregates(aggregates, store)
+        if flow_index is not None:
+            flow_index.add(orders)
+        SaveDocumentFlow(flow_index, store)
+        if ingested is not None:
+            # Keep the row keys current, so the next batch append needs no rebuild
+            ingested.add(NewOrderKeys(orders, ingested))
+            SaveIngestedRows(ingested, store)
+        for version in dict.fromkeys(orders["Rule Version"]):
+            RecordRuleVersion(store, version)
+
+_journals = {}
+_journals_lock = threading.Lock()
+
+def get_order_journal(store):
+    """Return the process-wide journal of a store, so all sessions share its group commits."""
+    key = (type(store).__name__, os.path.abspath(store.path))
+    with _journals_lock:
+        if key not in _journals:
+            journal = OrderJournal(store)
+            journal.replay()
+            _journals[key] = journal
+        return _journals[key]
+
+def _read_records(path):
+    # Records of the journal; a last line cut short by a crash was never committed
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+    return records
@@ -0,0 +1,65 @@
+# locking.py
+"""
+File locks and atomic file replacement for files shared by concurrent
+Streamlit sessions and worker processes.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+class FileLock:
+    """
+    Exclusive lock on a lock file, shared by threads and processes.
+
+    with FileLock("number_ranges.json.lock"):
+        ...  # read-modify-write the guarded file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, "a+b")
+        if os.name == "nt":
+            self._file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError: # LK_LOCK gives up after ~10 seconds; keep waiting
+                    continue
+        else:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if os.name == "nt":
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+@contextmanager
+def atomic_path(path):
+    """
+    Yield a temporary path to write instead of `path`. When the block succeeds
+    the temporary file replaces `path` in one rename, so readers never see a
+    half-written file; when it fails `path` is left as it was.
+    """
+    # Unique per process and thread, so concurrent writers never share a temp file
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -1,46 +1,188 @@
 # models.py
 
-import uuid
+import numpy as np
+import pandas as pd
+from .number_range import get_number_range_service, FormatDocumentNumbers
+from .schema import ORDER_COLUMNS
+
+def _cents(values):
+    # Half-up to whole cents of the value as written: rounding to 6 places first removes
+    # the binary error, so 82.885 (stored as 82.88499...) rounds up like the decimal it stands for
+    return np.floor(np.round(np.asarray(values, dtype=np.float64) * 100, 6) + 0.5).astype(np.int64)
+
+def UnitPrices(price):
+    """Unit prices in dollars, rounded half-up to cents. Takes a number or an array."""
+    return _cents(price) / 100
+
+def OrderAmounts(qty, price):
+    """
+    Invoice amounts in dollars: the unit price rounded half-up to cents, times
+    the quantity, in whole cents. Takes numbers or arrays; both batch engines
+    use it, so they store the same amounts.
+    """
+    return _cents(price) * np.asarray(qty, dtype=np.int64) / 100
+
+def _from_parent(parent, name):
+    # Read a field from the preceding document instead of keeping a copy
+    return property(lambda self: getattr(getattr(self, parent), name))
 
 class SalesOrder:
+    __slots__ = ("id", "customer", "product", "qty", "price", "order_date", "planned_order", "status")
+
     def __init__(self, customer_name, product, qty, price, order_date, status):
-        self.id = f"SO-{uuid.uuid4().hex[:8]}"
+        self.id = get_number_range_service().next_id("SO")
         self.customer = customer_name
         self.product = product
         self.qty = qty
-        self.price = round(price, 2)
+        self.price = float(UnitPrices(price))
         self.order_date = order_date
         self.planned_order = None
         self.status = status
 
 class PlannedOrder:
+    __slots__ = ("id", "sales_order", "production_order")
+
     def __init__(self, sales_order):
-        self.id = f"PL-{uuid.uuid4().hex[:8]}"
-        self.sales_order_id = sales_order.id
-        self.product = sales_order.product
-        self.qty = sales_order.qty
-        self.status = sales_order.status
+        self.id = get_number_range_service().next_id("PL")
+        self.sales_order = sales_order
         self.production_order = None
 
+    sales_order_id = _from_parent("sales_order", "id")
+    product = _from_parent("sales_order", "product")
+    qty = _from_parent("sales_order", "qty")
+    status = _from_parent("sales_order", "status")
+
 class ProductionOrder:
+    __slots__ = ("id", "planned_order", "confirmed")
+
     def __init__(self, planned_order):
-        self.id = f"PO-{uuid.uuid4().hex[:8]}"
-        self.planned_order_id = planned_order.id
-        self.product = planned_order.product
-        self.qty = planned_order.qty
-        self.status = planned_order.status
+        self.id = get_number_range_service().next_id("PO")
+        self.planned_order = planned_order
         self.confirmed = False
 
+    planned_order_id = _from_parent("planned_order", "id")
+    product = _from_parent("planned_order", "product")
+    qty = _from_parent("planned_order", "qty")
+    status = _from_parent("planned_order", "status")
+
 class Delivery:
+    __slots__ = ("id", "production_order", "customer", "status")
+
     def __init__(self, production_order, customer):
-        self.id = f"DLV-{uuid.uuid4().hex[:8]}"
-        self.production_order_id = production_order.id
+        self.id = get_number_range_service().next_id("DLV")
+        self.production_order = production_order
         self.customer = customer
         self.status = "Pending"
 
+    production_order_id = _from_parent("production_order", "id")
+
 class Billing:
+    __slots__ = ("id", "delivery", "amount", "status")
+
     def __init__(self, delivery, amount):
-        self.id = f"INV-{uuid.uuid4().hex[:8]}"
-        self.delivery_id = delivery.id
+        self.id = get_number_range_service().next_id("INV")
+        self.delivery = delivery
         self.amount = round(amount, 2)
         self.status = "Unpaid"
+
+    delivery_id = _from_parent("delivery", "id")
+
+class OrderBatch:
+    """
+    The five documents of N orders as typed columns instead of objects.
+
+    The documents of order i sit at row i of every column, so they link to
+    each other by position. Document numbers are int64 and only formatted
+    (SO-0000000042) when the batch is turned into dashboard rows. Treat a
+    batch as read-only; head() and concat() build new ones.
+    """
+
+    # Column name -> dtype, grouped by the document the values belong to
+    COLUMNS = {
+        # Sales order
+        "so_number": np.int64, "order_date": object, "customer": object, "product": object,
+        "qty": np.int64, "price": np.float64, "status": object,
+        # Planned and production order
+        "pl_number": np.int64, "po_number": np.int64, "confirmed": np.bool_,
+        # Delivery; 0 when the number is not known (the dashboard rows do not keep it)
+        "dlv_number": np.int64, "delivery_status": object,
+        # Invoice
+        "inv_number": np.int64, "amount": np.float64, "paid": np.bool_,
+        # Status rules the outcomes come from
+        "rule_version": object,
+    }
+    __slots__ = tuple(COLUMNS)
+
+    def __init__(self, **columns):
+        for name, dtype in self.COLUMNS.items():
+            setattr(self, name, np.asarray(columns[name], dtype=dtype))
+
+    def __len__(self):
+        return len(self.so_number)
+
+    @classmethod
+    def empty(cls):
+        return cls(**{name: [] for name in cls.COLUMNS})
+
+    def head(self, count):
+        return OrderBatch(**{name: getattr(self, name)[:count] for name in self.COLUMNS})
+
+    @classmethod
+    def concat(cls, batches):
+        batches = list(batches)
+        if not batches:
+            return cls.empty()
+        if len(batches) == 1:
+            return batches[0]
+        return cls(**{name: np.concatenate([getattr(b, name) for b in batches]) for name in cls.COLUMNS})
+
+    def to_frame(self, price=False):
+        """Return the dashboard rows (plus the entered Price column if price=True)."""
+        frame = pd.DataFrame({
+            "Order Date": self.order_date,
+            "Customer": self.customer,
+            "Product": self.product,
+            "Qty": self.qty,
+            "Sales Order": FormatDocumentNumbers("SO", self.so_number),
+            "Planned Order": FormatDocumentNumbers("PL", self.pl_number),
+            "Production Order": FormatDocumentNumbers("PO", self.po_number),
+            "Confirmed": self.confirmed,
+            "Status": self.status,
+            "Delivery": self.delivery_status,
+            "Invoice": FormatDocumentNumbers("INV", self.inv_number),
+            "Billing Status": np.where(self.paid, "Paid", "Unpaid").astype(object),
+            "Amount": self.amount,
+            "Rule Version": self.rule_version,
+        }, columns=list(ORDER_COLUMNS))
+        if price:
+            frame["Price"] = self.price
+        return frame
+
+    @classmethod
+    def from_frame(cls, frame):
+        """
+        Build a batch from dashboard rows holding number-range document numbers
+        (e.g. ProcessOrder results). An optional Price column gives the entered
+        prices; without it they are left as NaN.
+        """
+        def numbers(column):
+            return [int(value[value.rindex("-") + 1:]) for value in frame[column]]
+
+        return cls(
+            so_number=numbers("Sales Order"),
+            order_date=frame["Order Date"].to_numpy(),
+            customer=frame["Customer"].to_numpy(),
+            product=frame["Product"].to_numpy(),
+            qty=frame["Qty"].to_numpy(),
+            price=frame["Price"].to_numpy() if "Price" in frame else np.full(len(frame), np.nan),
+            status=frame["Status"].to_numpy(),
+            pl_number=numbers("Planned Order"),
+            po_number=numbers("Production Order"),
+            confirmed=frame["Confirmed"].to_numpy(),
+            dlv_number=np.zeros(len(frame)),
+            delivery_status=frame["Delivery"].to_numpy(),
+            inv_number=numbers("Invoice"),
+            amount=frame["Amount"].to_numpy(),
+            paid=(frame["Billing Status"] == "Paid").to_numpy(),
+            rule_version=frame["Rule Version"].to_numpy(),
+        )
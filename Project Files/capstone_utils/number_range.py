@@ -0,0 +1,112 @@
+# number_range.py
+"""
+Document number ranges (like SAP number range objects).
+
+Each document type (SO, PL, PO, DLV, INV) gets sequential, collision-free
+numbers such as SO-0000000042. The last issued number per type is kept in
+number_ranges.json. Processes take whole blocks of numbers under a file
+lock and hand them out locally, so parallel batch workers never contend
+per ID. Like SAP buffered number ranges, numbers left in a block when a
+process ends are skipped, which leaves gaps but never duplicates.
+
+Set a seed (MTO_NUMBER_RANGE_SEED or configure_number_ranges(seed=...))
+for reproducible runs: numbers then start at seed + 1 for every type and
+nothing is read from or written to the state file.
+"""
+
+import json
+import os
+import threading
+from .locking import FileLock
+
+DOCUMENT_TYPES = ("SO", "PL", "PO", "DLV", "INV")
+NUMBER_WIDTH = 10
+
+class NumberRangeService:
+    """Hands out document numbers per document type."""
+
+    def __init__(self, state_path="number_ranges.json", block_size=1000, seed=None):
+        self.state_path = state_path
+        self.block_size = block_size
+        self.seed = seed
+        self._blocks = {} # doc type -> [next number, end of block (exclusive)]
+        self._seeded_last = {}
+        self._lock = threading.RLock()
+
+    @property
+    def deterministic(self):
+        return self.seed is not None
+
+    def allocate_block(self, doc_type, count):
+        """Reserve `count` consecutive numbers for doc_type and return them as a range."""
+        if doc_type not in DOCUMENT_TYPES:
+            raise ValueError(f"Unknown document type: {doc_type!r}")
+        if self.deterministic:
+            with self._lock:
+                first = self._seeded_last.get(doc_type, self.seed) + 1
+                self._seeded_last[doc_type] = first + count - 1
+            return range(first, first + count)
+
+        with FileLock(self.state_path + ".lock"):
+            state = self._read_state()
+            first = state.get(doc_type, 0) + 1
+            state[doc_type] = first + count - 1
+            self._write_state(state)
+        return range(first, first + count)
+
+    def next_number(self, doc_type):
+        """Return the next number for doc_type from this process's current block."""
+        with self._lock:
+            block = self._blocks.get(doc_type)
+            if block is None or block[0] >= block[1]:
+                numbers = self.allocate_block(doc_type, self.block_size)
+                block = self._blocks[doc_type] = [numbers.start, numbers.stop]
+            number = block[0]
+            block[0] += 1
+        return number
+
+    def next_id(self, doc_type):
+        return FormatDocumentNumber(doc_type, self.next_number(doc_type))
+
+    def allocate_ids(self, doc_type, count):
+        """Return `count` formatted document numbers from one block."""
+        return FormatDocumentNumbers(doc_type, self.allocate_block(doc_type, count))
+
+    def _read_state(self):
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write_state(self, state):
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+def FormatDocumentNumber(doc_type, number):
+    return f"{doc_type}-{number:0{NUMBER_WIDTH}d}"
+
+def FormatDocumentNumbers(doc_type, numbers):
+    """Format a sequence (or int array) of numbers of one document type."""
+    if hasattr(numbers, "tolist"):
+        numbers = numbers.tolist() # Python ints format faster than numpy scalars
+    prefix = f"{doc_type}-"
+    return [prefix + str(number).zfill(NUMBER_WIDTH) for number in numbers]
+
+_service = None
+
+def get_number_range_service():
+    """Return the process-wide number range service."""
+    global _service
+    if _service is None:
+        seed = os.environ.get("MTO_NUMBER_RANGE_SEED")
+        _service = NumberRangeService(seed=int(seed) if seed else None)
+    return _service
+
+def configure_number_ranges(**options):
+    """Replace the process-wide service, e.g. configure_number_ranges(seed=0) for a reproducible run."""
+    global _service
+    _service = NumberRangeService(**options)
+    return _service
@@ -1,11 +1,54 @@
 from reportlab.lib.pagesizes import LETTER, landscape
 from reportlab.lib import colors
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from .summary import BatchSummary, REPORT_MAX_ROWS
+from .models import OrderBatch
+from .locking import atomic_path
+from .schema import storage_frame
 
-def export_batch_pdf(dataframe, filename="batch_report.pdf"):
-    """Generate a PDF report with summary metrics + slim table for batch mode."""
-    doc = SimpleDocTemplate(filename, pagesize= landscape(LETTER))
+# Detail rows per Table flowable; small tables let reportlab lay out page by page
+REPORT_ROWS_PER_TABLE = 40
+# Only these columns hold free text that may need wrapping
+WRAPPED_COLUMNS = {"Customer", "Product"}
+
+DETAIL_TABLE_STYLE = TableStyle([
+    ("BACKGROUND", (0, 0), (-1, 0), colors.lightblue),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+    ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+    ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
+    ("FONTSIZE", (0, 0), (-1, -1), 6),   # smaller font
+    ("TOPPADDING", (0, 0), (-1, -1), 1),
+    ("BOTTOMPADDING", (0, 0), (-1, -1), 1),
+    ("GRID", (0, 0), (-1, -1), 0.25, colors.black),
+])
+
+SUMMARY_TABLE_STYLE = TableStyle([
+    ("BACKGROUND", (0, 0), (-1, 0), colors.lightblue),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+    ("FONTSIZE", (0, 0), (-1, -1), 8),
+    ("ALIGN", (1, 0), (-1, -1), "RIGHT"),
+    ("GRID", (0, 0), (-1, -1), 0.25, colors.black),
+])
+
+def export_batch_pdf(dataframe, filename="batch_report.pdf", summary=None,
+                     mode="detail", max_rows=REPORT_MAX_ROWS):
+    """
+    Generate a PDF report with summary metrics + slim table for batch mode.
+
+    summary is the BatchSummary of the whole run; when given, the metrics come
+    from it and `dataframe` may hold only part of the batch (streamed runs).
+    mode="detail" lists up to max_rows orders, mode="summary" shows the
+    metrics with aggregated tables (products, statuses, top customers) only.
+    `dataframe` may also be an OrderBatch; only the rows the report uses are
+    turned into dashboard rows.
+    """
+    if mode not in ("detail", "summary"):
+        raise ValueError(f"Unknown report mode: {mode!r}")
+    if isinstance(dataframe, OrderBatch):
+        dataframe = (dataframe if summary is None else dataframe.head(max_rows)).to_frame()
     elements = []
     styles = getSampleStyleSheet()
 
@@ -15,55 +58,87 @@ def export_batch_pdf(dataframe, filename="batch_report.pdf"):
     elements.append(Spacer(1, 12))
 
     # Metrics
-    total_orders = len(dataframe)
-    total_revenue = dataframe["Amount"].sum()
-    paid_count = (dataframe["Billing Status"] == "Paid").sum()
-    unpaid_count = (dataframe["Billing Status"] == "Unpaid").sum()
+    if summary is None:
+        summary = BatchSummary()
+        summary.update(dataframe)
 
     metrics = [
-        f"Total Orders: {total_orders}",
-        f"Total Revenue: {total_revenue:,.2f}",
-        f"Paid Invoices: {paid_count}",
-        f"Unpaid Invoices: {unpaid_count}"
+        f"Total Orders: {summary.total_orders}",
+        f"Total Revenue: {summary.total_revenue:,.2f}",
+        f"Paid Invoices: {summary.paid_count}",
+        f"Unpaid Invoices: {summary.unpaid_count}"
     ]
+    if summary.rule_version is not None:
+        metrics.append(f"Status rules: version {summary.rule_version}")
+    if summary.invalid_dates:
+        lines = ", ".join(str(line) for line, _ in summary.invalid_dates[:10])
+        more = " ..." if len(summary.invalid_dates) > 10 else ""
+        metrics.append(f"Orders without a valid date: {len(summary.invalid_dates)} (lines {lines}{more})")
+    if summary.duplicate_rows or summary.skipped_rows:
+        metrics.append(f"Already stored, not added again: {summary.duplicate_rows} duplicate rows, "
+                       f"{summary.skipped_rows} rows of a file appended before")
+    listed = min(len(dataframe), max_rows)
+    if mode == "detail" and listed < summary.total_orders:
+        metrics.append(f"Listing the first {listed} of {summary.total_orders} orders; "
+                       "download the dashboard data for the full detail.")
     for m in metrics:
         elements.append(Paragraph(m, styles["Normal"]))
     elements.append(Spacer(1, 12))
 
-    # Table
-    # Wrap all cell text in Paragraph (so it auto-wraps within narrow columns)
-    table_data = [
-        [Paragraph(str(col), styles["BodyText"]) for col in dataframe.columns]
-    ] + [
-        [Paragraph(str(val), styles["BodyText"]) for val in row]
-        for row in dataframe.values.tolist()
-    ]
+    if mode == "summary":
+        elements += _summary_tables(summary.aggregates, styles)
+    else:
+        # Typed frames from the dashboard list their dates as stored; the rule
+        # version is a metric of the run, not a column of every listed order
+        listed_orders = dataframe.head(max_rows).drop(columns="Rule Version", errors="ignore")
+        elements += _detail_tables(storage_frame(listed_orders))
+
+    _build_pdf(filename, elements, pagesize=landscape(LETTER))
+    print(f"✅ Slim Batch PDF generated: {filename}")
+
+def _detail_tables(dataframe):
+    # Plain strings except for the free-text columns, which wrap in a small Paragraph
+    cell_style = ParagraphStyle("DetailCell", fontName="Helvetica", fontSize=6, leading=7, alignment=1)
+    wrapped = [col in WRAPPED_COLUMNS for col in dataframe.columns]
+    header = [Paragraph(str(col), cell_style) for col in dataframe.columns]
 
     # Narrower columns, text will wrap
     col_widths = [60] * len(dataframe.columns)
 
-    table = Table(table_data, colWidths=col_widths, repeatRows=1)
-    table.setStyle(TableStyle([
-    ("BACKGROUND", (0, 0), (-1, 0), colors.lightblue),
-    ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-    ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-    ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
-    ("FONTSIZE", (0, 0), (-1, -1), 6),   # smaller font
-    ("TOPPADDING", (0, 0), (-1, -1), 1),
-    ("BOTTOMPADDING", (0, 0), (-1, -1), 1),
-    ("WORDWRAP", (0, 0), (-1, -1), "CJK"),  # allows breaking instead of cut-off
-    ("GRID", (0, 0), (-1, -1), 0.25, colors.black),
-    ]))
+    for start in range(0, len(dataframe), REPORT_ROWS_PER_TABLE):
+        rows = dataframe.iloc[start:start + REPORT_ROWS_PER_TABLE].values.tolist()
+        table_data = [header] + [
+            [Paragraph(str(val), cell_style) if wrap else str(val) for val, wrap in zip(row, wrapped)]
+            for row in rows
+        ]
+        table = Table(table_data, colWidths=col_widths, repeatRows=1)
+        table.setStyle(DETAIL_TABLE_STYLE)
+        yield table
 
+def _summary_tables(aggregates, styles):
+    sections = [
+        ("Revenue by Product", ["Product", "Revenue"],
+         sorted(aggregates.revenue_by_product.items(), key=lambda item: -item[1])),
+        ("Orders by Status", ["Status", "Orders"],
+         sorted(aggregates.status_counts.items(), key=lambda item: -item[1])),
+        ("Top 10 Customers by Revenue", ["Customer", "Revenue"],
+         sorted(aggregates.revenue_by_customer.items(), key=lambda item: -item[1])[:10]),
+    ]
+    for heading, columns, items in sections:
+        yield Paragraph(heading, styles["Heading3"])
+        rows = [[str(key), f"{value:,.2f}" if isinstance(value, float) else str(value)] for key, value in items]
+        table = Table([columns] + rows, colWidths=[220, 100])
+        table.setStyle(SUMMARY_TABLE_STYLE)
+        yield table
+        yield Spacer(1, 12)
 
-    elements.append(table)
-    doc.build(elements)
-    print(f"✅ Slim Batch PDF generated: {filename}")
+def _build_pdf(filename, elements, pagesize):
+    # Build next to the target and rename, so a download never gets a half-written PDF
+    with atomic_path(filename) as tmp_path:
+        SimpleDocTemplate(tmp_path, pagesize=pagesize).build(elements)
 
 def export_single_pdf(order_dict, filename="input_report.pdf"):
     """Generate a PDF report for just one single order."""
-    doc = SimpleDocTemplate(filename, pagesize=LETTER)
     elements = []
     styles = getSampleStyleSheet()
 
@@ -101,5 +176,5 @@ def export_single_pdf(order_dict, filename="input_report.pdf"):
     ]))
 
     elements.append(table)
-    doc.build(elements)
+    _build_pdf(filename, elements, pagesize=LETTER)
     print(f"✅ Single Order PDF generated: {filename}")
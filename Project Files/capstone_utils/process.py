@@ -1,69 +1,68 @@
-import pandas as pd
-from .models import SalesOrder, PlannedOrder, ProductionOrder, Delivery, Billing
-from .status_rules import status_rules
+from .models import SalesOrder, PlannedOrder, ProductionOrder, Delivery, Billing, OrderAmounts
+from .status_rules import get_status_rules
+from .flow_log import FlowLogger, OrderLogLines
+from .dates import DateNormalizer
 
 def LogAndPrint(logfile, message):
     print(message)
     logfile.write(message + "\n")
 
-def CreateSalesOrder(customer, product, qty, price, order_date, status, logfile):
-    LogAndPrint(logfile, f"\n[{order_date}] Sales Order created for {customer}: {qty} x {product} @ {price:.2f}")
+# The step functions only log when given a text logfile;
+# ProcessOrder logs the whole order at once instead.
+def CreateSalesOrder(customer, product, qty, price, order_date, status, logfile=None):
+    if logfile is not None:
+        LogAndPrint(logfile, f"\n[{order_date}] Sales Order created for {customer}: {qty} x {product} @ {price:.2f}")
     return SalesOrder(customer, product, qty, price, order_date, status)
 
-def GeneratePlannedOrder(sales_order, logfile):
-    LogAndPrint(logfile, f"Planned Order generated from Sales Order {sales_order.id}")
+def GeneratePlannedOrder(sales_order, logfile=None):
+    if logfile is not None:
+        LogAndPrint(logfile, f"Planned Order generated from Sales Order {sales_order.id}")
     planned = PlannedOrder(sales_order)
     sales_order.planned_order = planned
     return planned
 
-def ConvertToProductionOrder(planned_order, logfile):
-    LogAndPrint(logfile, f"Production Order created from Planned Order {planned_order.id}")
+def ConvertToProductionOrder(planned_order, logfile=None):
+    if logfile is not None:
+        LogAndPrint(logfile, f"Production Order created from Planned Order {planned_order.id}")
     prod_order = ProductionOrder(planned_order)
     planned_order.production_order = prod_order
     return prod_order
 
-def ProcessOrder(customer, product, qty, price, order_date, status, logfile):
+# Shared by single orders; batch runs use their own DateNormalizer to report bad rows
+_order_dates = DateNormalizer(track_invalid=False)
+
+def NormalizeOrderDate(order_date):
+    # Dates become YYYY-MM-DD; anything that is not a date becomes None
+    return _order_dates.normalize(order_date)
+
+def ProcessOrder(customer, product, qty, price, order_date, status, logfile=None):
+    """
+    Run one order through the MTO flow and return its dashboard row.
+
+    logfile may be a FlowLogger (one structured record per order), a text
+    file (the flow log lines are printed and written), or None (no logging).
+    """
     # Normalize date
-    if hasattr(order_date, "strftime"):
-        order_date = order_date.strftime("%Y-%m-%d")
-    elif isinstance(order_date, str):
-        parsed = pd.to_datetime(order_date, errors="coerce")
-        if pd.notna(parsed):
-            order_date = parsed.strftime("%Y-%m-%d")
+    order_date = NormalizeOrderDate(order_date)
 
-    so = CreateSalesOrder(customer, product, qty, price, order_date, status, logfile)
-    po = GeneratePlannedOrder(so, logfile)
-    prod = ConvertToProductionOrder(po, logfile)
+    so = CreateSalesOrder(customer, product, qty, price, order_date, status)
+    po = GeneratePlannedOrder(so)
+    prod = ConvertToProductionOrder(po)
 
-    # Apply status rules
-    rules = status_rules.get(status.lower(), None)
-    if rules:
-        prod.confirmed = rules["confirmed"]
-        delivery_status = rules["delivery"]
-        billing_status = rules["billing"]
-    else:
-        prod.confirmed = False
-        delivery_status = "Unknown"
-        billing_status = "Not Processed"
+    # Apply status rules (statuses without a rule get the default outcome)
+    rules = get_status_rules()
+    outcome = rules.lookup(status)
+    prod.confirmed = outcome["confirmed"]
+    delivery_status = outcome["delivery"]
+    billing_status = outcome["billing"]
 
     delivery = Delivery(prod, so.customer)
     delivery.status = delivery_status
-    billing = Billing(delivery, so.price * so.qty)
+    billing = Billing(delivery, float(OrderAmounts(so.qty, so.price)))
     billing.status = "Paid" if billing_status == "Processed" else "Unpaid"
 
-    # Log
-    LogAndPrint(logfile, "\n--- Process Summary ---")
-    LogAndPrint(logfile, f"Order Date: {so.order_date}")
-    LogAndPrint(logfile, f"Sales Order ID: {so.id}")
-    LogAndPrint(logfile, f"Status: {so.status}")
-    LogAndPrint(logfile, f"Production Order ID: {prod.id}, Confirmed: {prod.confirmed}")
-    LogAndPrint(logfile, f"Delivery Status: {delivery.status}")
-    LogAndPrint(logfile, f"Invoice: {billing.id}")
-    LogAndPrint(logfile, f"Billing Status: {billing.status}, Amount: {billing.amount:.2f}")
-    LogAndPrint(logfile, "-" * 50)
-
     # Return result instead of appending to a global
-    return {
+    result = {
         "Order Date": so.order_date,
         "Customer": so.customer,
         "Product": so.product,
@@ -76,5 +75,15 @@ def ProcessOrder(customer, product, qty, price, order_date, status, logfile):
         "Delivery": delivery.status,
         "Invoice": billing.id,
         "Billing Status": billing.status,
-        "Amount": billing.amount
-    }
\ No newline at end of file
+        "Amount": billing.amount,
+        "Rule Version": rules.version,
+    }
+
+    # Log
+    if isinstance(logfile, FlowLogger):
+        logfile.log_order(dict(result, Price=price))
+    elif logfile is not None:
+        for line in OrderLogLines(dict(result, Price=price)):
+            LogAndPrint(logfile, line)
+
+    return result
@@ -1,43 +1,323 @@
+import contextlib
 import csv
+import functools
+import io
+import itertools
+import os
+import pickle
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import pandas as pd
-from .process import ProcessOrder
-from .pdf_export import export_batch_pdf, export_single_pdf
+from .process import ProcessOrder, NormalizeOrderDate
+from .columnar import read_order_columns, ProcessOrderBatch
+from .models import OrderBatch
+from .dates import DateNormalizer
+from .flow_log import FlowLogger, RenderTextLog
+from .storage import get_order_store
+from .journal import get_order_journal
+from .number_range import get_number_range_service
+from .summary import BatchSummary, REPORT_MAX_ROWS
+from .aggregates import OrderAggregates, LoadAggregates, SaveAggregates, RebuildAggregates
+from .doc_flow import LoadDocumentFlow, SaveDocumentFlow
+from .status_rules import get_status_rules, RecordRuleVersion
+from .ingest import OpenIngestedRows, SaveIngestedRows, SelectNewOrders
+from .shards import SplitByteRanges
 
-def run_batch_mode(csv_file="sales_orders.csv"):
-    results = []
+BATCH_LOG = "mto_batch_flow_log"
+NEW_ORDERS_FILE = "new_orders.csv"
+INPUT_LOG = "mto_input_flow_log"
+
+
+def run_batch_mode(csv_file="sales_orders.csv", engine="row", append=False,
+                   log_level="full", text_log=True, chunk_size=None, workers=1,
+                   report="detail", report_rows=REPORT_MAX_ROWS, defer_report=False,
+                   output_dir=".", deduplicate=True):
+    """
+    Process a sales order CSV into the order store and batch_report.pdf.
+
+    engine="row" runs ProcessOrder once per CSV row (the reference path).
+    engine="columnar" processes the whole file as typed columns in bulk and
+    gives the same results, document numbers included.
+
+    append=False replaces the stored orders with this batch, append=True adds
+    the batch after the orders already stored.
+
+    log_level is "full", "summary" or "off" (see flow_log). Records go to
+    mto_batch_flow_log.jsonl; text_log=True also renders them into
+    mto_batch_flow_log.txt.
+
+    chunk_size=N streams the file N rows at a time: each chunk is processed
+    and written before the next one is read, so memory depends on the chunk
+    size rather than the file size. An overwrite run stages its chunks and
+    replaces the stored orders only after the last one, so a run that fails
+    part way leaves them unchanged.
+
+    workers=N splits the file into N byte-range shards and processes them in
+    a pool of N processes. Shard outputs and logs are merged in input order,
+    so results match a sequential run apart from the document numbers, which
+    each worker takes in blocks from the shared number ranges. With
+    chunk_size, workers also process their shard chunk_size rows at a time.
+
+    report picks the batch_report.pdf content: "detail" (metrics and the
+    first report_rows orders; the full detail is in the data export),
+    "summary" (metrics and aggregated tables) or "off" (no PDF).
+    defer_report=True builds the PDF on a background thread after the run;
+    the thread is returned as summary.report_thread.
+
+    output_dir is where the flow logs and the report go; each Streamlit
+    session passes its own, so concurrent runs never overwrite each other's
+    files. The store is locked for the whole write, so single orders
+    entered meanwhile are committed before or after the batch, never inside.
+
+    deduplicate=True makes append runs idempotent (see ingest.py): a file
+    appended before is skipped, and of any other file only the orders that
+    are not stored yet are processed. The summary's duplicate_rows and
+    skipped_rows count the rows left out; total_orders counts the new ones.
+
+    Returns the BatchSummary of the run; for sharded runs its shard_timings
+    list the rows, bytes and seconds of every shard. Its invalid_dates list
+    the file line and raw value of every order date that could not be
+    parsed; those orders are stored without a date. Its rule_version is the
+    version of the status rules that decided the outcomes.
+    """
+    if report not in ("detail", "summary", "off"):
+        raise ValueError(f"Unknown report mode: {report!r}")
+    if engine == "columnar":
+        process_chunks = _columnar_chunks
+        max_queue = 4 # The columnar engine logs whole chunks, not single records
+    elif engine == "row":
+        process_chunks = _row_chunks
+        max_queue = 1024
+    else:
+        raise ValueError(f"Unknown batch engine: {engine!r}")
+    if chunk_size is not None and chunk_size < 1:
+        raise ValueError("chunk_size must be a positive number of rows")
+    if workers > 1 and get_number_range_service().deterministic:
+        # Seeded number ranges live in each process's memory and would overlap
+        raise ValueError("Seeded document numbers need a sequential run (workers=1)")
+
+    store = get_order_store()
+    log_name = os.path.join(output_dir, BATCH_LOG)
+    summary = BatchSummary()
+    summary.rule_version = get_status_rules().version
+    if workers > 1:
+        process_chunks = functools.partial(
+            _sharded_chunks, engine=engine, log_level=log_level, workers=workers,
+            shard_timings=summary.shard_timings, log_name=log_name,
+        )
+    # Only the orders the report lists are kept in memory
+    listed_rows = []
+    report_budget = report_rows if report == "detail" else 0
+
+    # One normalizer per run: the date format is detected once for the file
+    dates = DateNormalizer()
+
+    with store.lock(), FlowLogger(f"{log_name}.jsonl", log_level, max_queue=max_queue) as logger:
+        # Appends update the persisted aggregates in place; overwrites start from empty ones
+        aggregates = _aggregates_before_write(store) if append else OrderAggregates()
+        # Appends also extend an up-to-date document flow index; after an overwrite it is rebuilt when next opened
+        flow_index = LoadDocumentFlow(store) if append else None
+        new_orders = None
+        if append and deduplicate:
+            ingested = OpenIngestedRows(store)
+            new_orders = SelectNewOrders(csv_file, ingested, os.path.join(output_dir, NEW_ORDERS_FILE), chunk_size)
+            summary.duplicate_rows, summary.skipped_rows = new_orders.duplicate_rows, new_orders.skipped_rows
+            csv_file = new_orders.path
+        write_orders = contextlib.nullcontext(store.append) if append else store.staged_replace()
+        with write_orders as write:
+            for batch in process_chunks(csv_file, logger, chunk_size, dates) if csv_file is not None else []:
+                if not len(batch):
+                    continue
+                df = batch.to_frame()
+                write(df)
+                if flow_index is not None:
+                    flow_index.add(df)
+                summary.update(df)
 
-    with open("mto_batch_flow_log.txt", "w", encoding="utf-8") as logfile:
-        with open(csv_file, newline="") as csvfile:
-            reader = csv.DictReader(csvfile) # Read the CSV
-            for row in reader:
+                if report_budget > 0:
+                    listed_rows.append(batch.head(report_budget))
+                    report_budget -= len(listed_rows[-1])
+        if summary.total_orders:
+            _save_aggregates(store, aggregates, summary.aggregates)
+            SaveDocumentFlow(flow_index, store)
+            RecordRuleVersion(store, summary.rule_version, replace=not append)
+        if new_orders is not None:
+            ingested.add(new_orders.keys, new_orders.file_hash)
+            SaveIngestedRows(ingested, store)
+    _write_text_log(log_name, log_level, text_log)
+
+    summary.invalid_dates = dates.invalid
+    if new_orders is not None:
+        # Lines of the new orders file, back to lines of the input file
+        summary.invalid_dates = new_orders.file_lines(dates.invalid)
+        new_orders.remove()
+    if summary.invalid_dates:
+        line, value = summary.invalid_dates[0]
+        print(f"⚠️ {len(summary.invalid_dates)} order dates could not be parsed "
+              f"(first at line {line}: {value!r}); they are stored without a date")
+    # Also for a run with no new orders, so no report of an earlier batch is left in place
+    _write_batch_report(report, listed_rows, summary, report_rows, defer_report,
+                        os.path.join(output_dir, "batch_report.pdf"))
+    return summary
+
+def _open_csv(csv_file):
+    # Paths are opened here; text streams (batch shards) are used as they are
+    if hasattr(csv_file, "read"):
+        return contextlib.nullcontext(csv_file)
+    return open(csv_file, newline="")
+
+def _row_chunks(csv_file, logger, chunk_size=None, dates=None):
+    dates = DateNormalizer() if dates is None else dates
+    with _open_csv(csv_file) as csvfile:
+        reader = csv.DictReader(csvfile) # Read the CSV
+        while True:
+            results, prices = [], []
+            for row in itertools.islice(reader, chunk_size):
+                price = float(row["PRICEEACH"])
                 result = ProcessOrder( # Add rows as input
                     row["CUSTOMERNAME"],
                     row["PRODUCTLINE"],
                     int(row["QUANTITYORDERED"]),
-                    float(row["PRICEEACH"]),
-                    row["ORDERDATE"],
+                    price,
+                    dates.normalize(row["ORDERDATE"], reader.line_num),
                     row["STATUS"],
-                    logfile
+                    logger
                 )
                 results.append(result)
-    
-    if results:
-        df = pd.DataFrame(results)
-        df.to_csv("dashboard_data.csv", index=False)
-        export_batch_pdf(df, "batch_report.pdf")
+                prices.append(price)
+            if not results:
+                return
+            yield OrderBatch.from_frame(pd.DataFrame(results).assign(Price=prices))
+
+def _columnar_chunks(csv_file, logger, chunk_size=None, dates=None):
+    dates = DateNormalizer() if dates is None else dates
+    chunks = read_order_columns(csv_file, chunk_size) if chunk_size else [read_order_columns(csv_file)]
+    line = 2 # File line of the first order after the header
+    for orders in chunks:
+        batch = ProcessOrderBatch(orders, dates, line)
+        line += len(orders)
+        logger.log_frame(batch)
+        yield batch
+
+def _sharded_chunks(csv_file, logger, chunk_size, dates, engine, log_level, workers, shard_timings,
+                    log_name=BATCH_LOG):
+    header, ranges = SplitByteRanges(csv_file, workers)
+    # Workers spool their processed chunks to files, so neither the pool nor
+    # the parent holds more than one chunk of a shard in memory
+    spool_dir = tempfile.TemporaryDirectory(prefix="shards-", dir=os.path.dirname(log_name) or ".")
+    with spool_dir, ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_process_shard, csv_file, header, start, end, engine, log_level,
+                        f"{log_name}.shard{index}.jsonl", chunk_size,
+                        os.path.join(spool_dir.name, f"shard{index}")): index
+            for index, (start, end) in enumerate(ranges)
+        }
+        # Shards finish in any order but are stored in input order, so output and logs keep it
+        finished, next_index, rows_before = {}, 0, 0
+        for future in as_completed(futures):
+            finished[futures.pop(future)] = future.result()
+            while next_index in finished:
+                chunk_paths, log_path, timing, invalid_dates = finished.pop(next_index)
+                for chunk_path in chunk_paths:
+                    with open(chunk_path, "rb") as f:
+                        batch = pickle.load(f)
+                    os.remove(chunk_path)
+                    yield batch
+                logger.log_jsonl_file(log_path)
+                shard_timings.append(dict(timing, shard=next_index))
+                # Shards number their lines from their own header; shift them to file lines
+                dates.invalid += [(line + rows_before, value) for line, value in invalid_dates]
+                rows_before += timing["rows"]
+                next_index += 1
+
+def _process_shard(csv_file, header, start, end, engine, log_level, log_path, chunk_size=None, spool_path=None):
+    # Runs in a worker process: parse and process one byte range of the input,
+    # chunk_size rows at a time, writing each processed chunk to its own spool file
+    started = time.perf_counter()
+    with open(csv_file, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    shard = io.TextIOWrapper(io.BytesIO(header + data), newline="")
+
+    if engine == "columnar":
+        process_chunks, max_queue = _columnar_chunks, 4
+    else:
+        process_chunks, max_queue = _row_chunks, 1024
+    dates = DateNormalizer()
+    chunk_paths, rows = [], 0
+    with FlowLogger(log_path, log_level, max_queue=max_queue) as logger:
+        for batch in process_chunks(shard, logger, chunk_size, dates):
+            # Batches are spooled as typed arrays, which pickle much smaller than frames
+            chunk_paths.append(f"{spool_path}.chunk{len(chunk_paths)}.pkl")
+            with open(chunk_paths[-1], "wb") as f:
+                pickle.dump(batch, f, protocol=pickle.HIGHEST_PROTOCOL)
+            rows += len(batch)
+
+    timing = {"rows": rows, "bytes": end - start, "seconds": time.perf_counter() - started}
+    return chunk_paths, log_path, timing, dates.invalid
+
+def _aggregates_before_write(store):
+    # Persisted aggregates to update after writing; None means they must be rebuilt
+    if store.version() is None:
+        return OrderAggregates()
+    return LoadAggregates(store)
+
+def _save_aggregates(store, aggregates, added):
+    if aggregates is None:
+        RebuildAggregates(store)
+    else:
+        aggregates.merge(added)
+        SaveAggregates(aggregates, store)
+
+def _write_batch_report(report, listed_rows, summary, report_rows, defer_report, path="batch_report.pdf"):
+    if report == "off":
+        # Do not leave a report of an earlier batch next to this one
+        if os.path.exists(path):
+            os.remove(path)
+        return
+
+    # reportlab is only loaded by runs that write a report
+    from .pdf_export import export_batch_pdf
+    listed = OrderBatch.concat(listed_rows)
+    build = functools.partial(export_batch_pdf, listed, path, summary,
+                              mode=report, max_rows=report_rows)
+    if defer_report:
+        summary.report_thread = threading.Thread(target=build, name="batch-report")
+        summary.report_thread.start()
+    else:
+        build()
+
+def _write_text_log(name, log_level, text_log):
+    # Render the text log from the JSONL records; with logging off, drop stale logs
+    if log_level == "off":
+        for path in (f"{name}.jsonl", f"{name}.txt"):
+            if os.path.exists(path):
+                os.remove(path)
+    elif text_log:
+        RenderTextLog(f"{name}.jsonl", f"{name}.txt")
 
-def run_input_mode(customer, product, qty, price, order_date, status="Shipped"):
+def run_input_mode(customer, product, qty, price, order_date, status="Shipped", log_level="full",
+                   output_dir=".", report=True):
+    """
+    Process and store one order; report=True also writes input_report.pdf
+    to output_dir. Returns the stored order (a ProcessOrder result).
+    """
+    if NormalizeOrderDate(order_date) is None:
+        raise ValueError(f"Order date is not a date: {order_date!r}")
     results = []
+    log_name = os.path.join(output_dir, INPUT_LOG)
 
-    with open("mto_input_flow_log.txt", "w", encoding="utf-8") as logfile:
-        result = ProcessOrder(customer, product, qty, price, order_date, status, logfile)
+    with FlowLogger(f"{log_name}.jsonl", log_level) as logger:
+        result = ProcessOrder(customer, product, qty, price, order_date, status, logger)
         results.append(result)
+    _write_text_log(log_name, log_level, True)
 
     if results:
-        try:
-            df_existing = pd.read_csv("dashboard_data.csv")
-            df_combined = pd.concat([df_existing, pd.DataFrame(results)], ignore_index=True)
-        except FileNotFoundError: # Make dashboard_data if it does not exist yet
-            df_combined = pd.DataFrame(results)
-        df_combined.to_csv("dashboard_data.csv", index=False)
-        export_single_pdf(results[0], "input_report.pdf")
+        # Orders entered at the same time by other sessions share one locked write
+        get_order_journal(get_order_store()).commit(results[0])
+        if report:
+            from .pdf_export import export_single_pdf
+            export_single_pdf(results[0], os.path.join(output_dir, "input_report.pdf"))
+        return results[0]
@@ -0,0 +1,113 @@
+# schema.py
+"""
+In-memory schema of the order frame.
+
+Stores keep orders as text (CSV) or SQLite values; the dashboard frame is
+typed once when it is loaded (see utils.loader.load_dashboard_df):
+low-cardinality text columns become categoricals, Confirmed bool, Qty
+int32 and Order Date datetime64. Writers turn a typed frame back into the
+stored form with storage_frame, so typed and untyped frames can be written
+alike. Document numbers are unique per order and stay strings.
+
+Compare the memory footprint of the stored orders before and after typing:
+
+    python -m capstone_utils.schema
+"""
+
+import pandas as pd
+from .dates import OUTPUT_FORMAT as DATE_FORMAT
+
+# Dashboard columns, in order, and how the SQLite store keeps them
+ORDER_COLUMNS = {
+    "Order Date": "TEXT",
+    "Customer": "TEXT",
+    "Product": "TEXT",
+    "Qty": "INTEGER",
+    "Sales Order": "TEXT",
+    "Planned Order": "TEXT",
+    "Production Order": "TEXT",
+    "Confirmed": "INTEGER",
+    "Status": "TEXT",
+    "Delivery": "TEXT",
+    "Invoice": "TEXT",
+    "Billing Status": "TEXT",
+    "Amount": "REAL",
+    # Version of the status rules the outcomes (Confirmed, Delivery, Billing Status) come from
+    "Rule Version": "TEXT",
+}
+
+# Columns added after the first stores were written; orders stored before
+# them read back without the column until the store is next written to
+ADDED_COLUMNS = ("Rule Version",)
+
+# Dashboard column -> in-memory dtype
+ORDER_SCHEMA = {
+    "Order Date": "datetime64[ns]",
+    "Customer": "category",
+    "Product": "category",
+    "Qty": "int32",
+    "Sales Order": "str",
+    "Planned Order": "str",
+    "Production Order": "str",
+    "Confirmed": "bool",
+    "Status": "category",
+    "Delivery": "category",
+    "Invoice": "str",
+    "Billing Status": "category",
+    # Amounts stay float64: float32 keeps only about 7 digits, not enough for cents on large orders
+    "Amount": "float64",
+    "Rule Version": "category",
+}
+
+def enforce_schema(df):
+    """Return the orders in `df` with the ORDER_SCHEMA dtypes (missing columns are left out)."""
+    typed = {}
+    for column in df.columns:
+        dtype = ORDER_SCHEMA.get(column)
+        if dtype is None or df[column].dtype == dtype:
+            typed[column] = df[column]
+        elif column == "Order Date":
+            # Stored dates are all YYYY-MM-DD; orders without a valid date become NaT
+            typed[column] = pd.to_datetime(df[column], format=DATE_FORMAT, errors="coerce").astype(dtype)
+        else:
+            typed[column] = df[column].astype(dtype)
+    result = pd.DataFrame(typed, index=df.index)
+    result.attrs.update(df.attrs)
+    return result
+
+def storage_frame(df):
+    """Return `df` with dates as YYYY-MM-DD text and plain values, as the stores keep them."""
+    converted = {}
+    for column in df.columns:
+        series = df[column]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            converted[column] = series.dt.strftime(DATE_FORMAT).astype(object).where(series.notna(), None)
+        elif isinstance(series.dtype, pd.CategoricalDtype):
+            converted[column] = series.astype(object).where(series.notna(), None)
+    if not converted:
+        return df
+    return df.assign(**converted)
+
+def memory_report(raw, typed):
+    """Deep memory use per column (bytes) of a frame before and after enforce_schema."""
+    before = raw.memory_usage(deep=True, index=False)
+    after = typed.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        "before": before,
+        "after": after.reindex(before.index),
+        "before dtype": raw.dtypes.astype(str),
+        "after dtype": typed.dtypes.astype(str).reindex(before.index),
+    })
+    report.loc["Total"] = [before.sum(), after.sum(), "", ""]
+    report["saved %"] = (100 * (1 - report["after"] / report["before"])).round(1)
+    return report
+
+if __name__ == "__main__":
+    from .storage import get_order_store
+
+    stored = get_order_store().read()
+    if stored.empty:
+        print("No stored orders.")
+    else:
+        print(f"{len(stored)} stored orders")
+        print(memory_report(stored, enforce_schema(stored)).to_string())
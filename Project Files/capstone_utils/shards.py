@@ -0,0 +1,25 @@
+# shards.py
+import os
+
+def SplitByteRanges(csv_file, parts):
+    """
+    Split the data rows of a CSV file into up to `parts` byte ranges.
+
+    Returns (header_bytes, [(start, end), ...]). Every range starts and ends on
+    a line boundary, so each one can be parsed on its own after the header.
+    Assumes quoted fields do not contain newlines, as in the order extracts.
+    """
+    size = os.path.getsize(csv_file)
+    with open(csv_file, "rb") as f:
+        header = f.readline()
+        data_start = f.tell()
+
+        boundaries = [data_start]
+        for i in range(1, parts):
+            f.seek(data_start + (size - data_start) * i // parts)
+            f.readline() # Move to the start of the next full line
+            boundaries.append(max(f.tell(), boundaries[-1]))
+        boundaries.append(size)
+
+    ranges = [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+    return header, ranges
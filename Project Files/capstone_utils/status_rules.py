@@ -1,9 +1,165 @@
-# Status-Outcome mapping using a dictionary
-status_rules = {
-    "shipped": {"confirmed": True, "delivery": "In Transit", "billing": "Processed"},
-    "disputed": {"confirmed": True, "delivery": "Not in Transit", "billing": "Not Processed"},
-    "in process": {"confirmed": True, "delivery": "Not in Transit", "billing": "Not Processed"},
-    "on hold": {"confirmed": False, "delivery": "Not in Transit", "billing": "Not Processed"},
-    "resolved": {"confirmed": True, "delivery": "Delivered", "billing": "Processed"},
-    "cancelled": {"confirmed": True, "delivery": "Not in Transit", "billing": "Not Processed"},
-}
+# status_rules.py
+"""
+Status rules: how the STATUS of a sales order maps to production
+confirmation, delivery and billing outcomes.
+
+The rules live in status_rules.json (or the file named by MTO_STATUS_RULES)
+and carry a version. They are compiled once into a decision table: one
+array per outcome, indexed by status code, with the default outcome of
+unknown statuses in the last slot. Whole columns are evaluated by turning
+the statuses into codes and indexing the arrays, so the cost does not
+depend on the number of rules.
+
+Every order records the version its outcomes come from (its Rule
+Version column); the versions behind the stored orders are summarized next
+to them (orders.rules.json). Re-evaluate the whole history under the
+current rules, one vectorized pass per stored chunk, with:
+
+    python -m capstone_utils.status_rules --reevaluate
+    python -m capstone_utils.status_rules --reevaluate --rules new_rules.json
+"""
+
+import json
+import os
+import numpy as np
+import pandas as pd
+from .locking import atomic_path
+from .aggregates import RebuildAggregates
+
+RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "status_rules.json")
+RULE_VERSIONS_SUFFIX = ".rules.json"
+OUTCOMES = ("confirmed", "delivery", "billing")
+
+class StatusRules:
+    """A compiled, versioned set of status rules."""
+
+    __slots__ = ("version", "source", "statuses", "default", "_codes", "confirmed", "delivery", "billing")
+
+    def __init__(self, rules, default, version, source=None):
+        self.version = str(version)
+        self.source = source
+        self.statuses = list(rules) # Display names, in rule order
+        self.default = dict(default)
+        # Statuses match case-insensitively: their code is the position of the lowercased name
+        self._codes = pd.Index([status.lower() for status in self.statuses])
+        if self._codes.has_duplicates:
+            raise ValueError(f"Status rules {self.version} define a status twice")
+        outcomes = list(rules.values()) + [self.default]
+        for outcome in outcomes:
+            missing = set(OUTCOMES) - set(outcome)
+            if missing:
+                raise ValueError(f"Status rules {self.version}: outcome without {', '.join(sorted(missing))}")
+        self.confirmed = np.array([bool(outcome["confirmed"]) for outcome in outcomes])
+        self.delivery = np.array([outcome["delivery"] for outcome in outcomes], dtype=object)
+        self.billing = np.array([outcome["billing"] for outcome in outcomes], dtype=object)
+
+    @classmethod
+    def from_file(cls, path=RULES_FILE):
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        return cls(config["rules"], config["default"], config["version"], source=path)
+
+    def codes(self, statuses):
+        """Decision table row of every status in a column; -1 (the default) for unknown ones."""
+        # Order files repeat a few statuses, so only the distinct values are lowercased
+        positions, distinct = pd.factorize(pd.Series(statuses, dtype=object))
+        table_rows = self._codes.get_indexer([str(status).lower() for status in distinct])
+        # Missing statuses (factorize code -1) pick the appended default slot
+        return np.append(table_rows, -1)[positions]
+
+    def apply(self, statuses):
+        """Return (confirmed, delivery, billing) arrays for a column of statuses."""
+        rows = self.codes(statuses)
+        return self.confirmed[rows], self.delivery[rows], self.billing[rows]
+
+    def lookup(self, status):
+        """Return the outcomes of one status as a dict."""
+        row = self._codes.get_loc(status.lower()) if status.lower() in self._codes else -1
+        return {"confirmed": bool(self.confirmed[row]), "delivery": self.delivery[row], "billing": self.billing[row]}
+
+    def as_frame(self):
+        """The decision table with display names, as shown on the Overview page."""
+        return pd.DataFrame({
+            "STATUS": self.statuses + ["(any other)"],
+            "Confirmed (Production)": self.confirmed,
+            "Delivery Outcome": self.delivery,
+            "Billing Outcome": self.billing,
+        })
+
+_rules = None
+
+def get_status_rules():
+    """Return the process-wide status rules, compiled on first use."""
+    global _rules
+    if _rules is None:
+        _rules = StatusRules.from_file(os.environ.get("MTO_STATUS_RULES", RULES_FILE))
+    return _rules
+
+def configure_status_rules(path=None):
+    """Load the process-wide status rules from another file (None: the default one)."""
+    global _rules
+    _rules = StatusRules.from_file(path or os.environ.get("MTO_STATUS_RULES", RULES_FILE))
+    return _rules
+
+def StoredRuleVersions(store):
+    """Versions of the status rules that produced the stored orders, oldest first."""
+    path = store.sidecar_path(RULE_VERSIONS_SUFFIX)
+    if store.version() is None or not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["rule_versions"]
+
+def RecordRuleVersion(store, version, replace=False):
+    """Record that stored orders were written under rules `version`; replace=True when they all were."""
+    versions = [] if replace else StoredRuleVersions(store)
+    if version in versions:
+        return
+    with atomic_path(store.sidecar_path(RULE_VERSIONS_SUFFIX)) as tmp_path, open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"rule_versions": versions + [version]}, f)
+
+def ReevaluateOrders(store, rules=None, chunk_size=50000):
+    """
+    Recompute Confirmed, Delivery and Billing Status of every stored order
+    under `rules` (default: the current ones) and write them back with its
+    Rule Version, chunk_size orders at a time. The stored orders are replaced
+    once all chunks are written. Returns the number of orders whose outcome
+    changed.
+    """
+    rules = rules or get_status_rules()
+    outcome = ["Confirmed", "Delivery", "Billing Status"]
+    changed = 0
+    with store.lock():
+        with store.staged_replace() as write:
+            for chunk in store.iter_chunks(chunk_size):
+                confirmed, delivery, billing = rules.apply(chunk["Status"])
+                updated = chunk.assign(**{
+                    "Confirmed": confirmed,
+                    "Delivery": delivery,
+                    "Billing Status": np.where(billing == "Processed", "Paid", "Unpaid").astype(object),
+                    "Rule Version": rules.version,
+                })
+                changed += int((updated[outcome] != chunk[outcome]).any(axis=1).sum())
+                write(updated)
+        if store.version() is None:
+            return 0
+        RebuildAggregates(store)
+        RecordRuleVersion(store, rules.version, replace=True)
+    return changed
+
+if __name__ == "__main__":
+    import argparse
+    from .storage import get_order_store
+
+    parser = argparse.ArgumentParser(description="Show the status rules or re-evaluate the stored orders under them.")
+    parser.add_argument("--rules", help="rules file (default: MTO_STATUS_RULES or capstone_utils/status_rules.json)")
+    parser.add_argument("--reevaluate", action="store_true", help="recompute the outcomes of all stored orders")
+    args = parser.parse_args()
+
+    status_rules = configure_status_rules(args.rules)
+    print(f"Status rules version {status_rules.version} ({status_rules.source})")
+    print(status_rules.as_frame().to_string(index=False))
+    order_store = get_order_store()
+    if args.reevaluate:
+        changed_orders = ReevaluateOrders(order_store, status_rules)
+        print(f"Re-evaluated the stored orders; {changed_orders} changed outcome.")
+    print(f"Stored orders were produced by rule versions: {', '.join(StoredRuleVersions(order_store)) or '-'}")
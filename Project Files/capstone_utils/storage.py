@@ -0,0 +1,388 @@
+# storage.py
+"""
+Order storage backends.
+
+Processed orders used to live only in dashboard_data.csv, which was read,
+concatenated and rewritten in full for every append. A store appends new
+rows in place and reads them back with their types. CSV stays available
+as an export format through export_csv().
+
+Pick the backend with the MTO_ORDER_STORE environment variable:
+"sqlite" (default, orders.db) or "csv" (dashboard_data.csv). Orders that
+an earlier version left in dashboard_data.csv are imported into orders.db
+once, when it does not exist yet (see ImportLegacyCsv).
+"""
+
+import csv
+import os
+import sqlite3
+from contextlib import contextmanager
+import pandas as pd
+from .locking import FileLock, atomic_path
+from .schema import ORDER_COLUMNS, ADDED_COLUMNS, storage_frame
+
+CSV_EXPORT_FILE = "dashboard_data.csv"
+# What dashboard_data.csv is renamed to once its orders are imported, so they are imported only once
+LEGACY_IMPORTED_FILE = "dashboard_data.imported.csv"
+
+# Files derived from the stored orders and kept next to them; clear() removes them too
+SIDECAR_SUFFIXES = [".aggregates.json", ".docflow.db", ".rules.json", ".rowkeys.npz", ".journal.jsonl"]
+
+class OrderStore:
+    """Interface shared by the storage backends."""
+
+    def exists(self):
+        raise NotImplementedError
+
+    def version(self):
+        """
+        Return a key that changes whenever the stored orders change, or None
+        when there are none: (backend, path, mtime_ns, size, write counter).
+        """
+        raise NotImplementedError
+
+    def read(self):
+        """Return all stored orders as a DataFrame (empty if there are none)."""
+        raise NotImplementedError
+
+    def iter_chunks(self, chunk_size=50000):
+        """Yield the stored orders as DataFrames of up to chunk_size rows."""
+        df = self.read()
+        if not df.empty:
+            yield df
+
+    def append(self, df):
+        """Add orders after the ones already stored."""
+        raise NotImplementedError
+
+    def replace(self, df):
+        """Drop all stored orders and store `df` instead."""
+        self.clear()
+        self.append(df)
+
+    def staged_replace(self):
+        """
+        Context manager for a replacement written in pieces: yields a function
+        that adds orders. When the block succeeds the stored orders are replaced
+        by everything added (if anything was); when it fails they are left as
+        they were.
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def lock(self):
+        """
+        Exclusive lock for writers, shared by sessions, threads and processes.
+        Hold it around writes together with the aggregates update that goes with them.
+        """
+        return FileLock(self.path + ".lock")
+
+    def sidecar_path(self, suffix):
+        """Path of a file kept alongside the stored orders, e.g. orders.aggregates.json."""
+        return os.path.splitext(self.path)[0] + suffix
+
+    def _remove_sidecars(self):
+        for suffix in SIDECAR_SUFFIXES:
+            if os.path.exists(self.sidecar_path(suffix)):
+                os.remove(self.sidecar_path(suffix))
+
+    def export_csv(self, path=CSV_EXPORT_FILE):
+        """Write all stored orders to a CSV file and return its path."""
+        self.read().to_csv(path, index=False)
+        return path
+
+    def to_csv_bytes(self):
+        return self.read().to_csv(index=False).encode("utf-8")
+
+class CsvOrderStore(OrderStore):
+    """dashboard_data.csv, appended to in place instead of rewritten."""
+
+    def __init__(self, path=CSV_EXPORT_FILE):
+        self.path = path
+        self.version_path = path + ".version"
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def version(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return ("csv", os.path.abspath(self.path), stat.st_mtime_ns, stat.st_size, self._counter())
+
+    def _counter(self):
+        try:
+            with open(self.version_path) as f:
+                return int(f.read() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _bump_version(self):
+        counter = self._counter() + 1
+        with atomic_path(self.version_path) as tmp_path, open(tmp_path, "w") as f:
+            f.write(str(counter))
+
+    def read(self):
+        if not self.exists():
+            return pd.DataFrame()
+        return pd.read_csv(self.path)
+
+    def iter_chunks(self, chunk_size=50000):
+        if self.exists():
+            yield from pd.read_csv(self.path, chunksize=chunk_size)
+
+    def append(self, df):
+        if df.empty:
+            return
+        has_header = self.exists() and os.path.getsize(self.path) > 0
+        if has_header:
+            self._add_missing_columns()
+        storage_frame(df[list(ORDER_COLUMNS)]).to_csv(self.path, mode="a", header=not has_header, index=False)
+        self._bump_version()
+
+    def _add_missing_columns(self, chunk_size=50000):
+        # A file written before the ADDED_COLUMNS is rewritten with them (empty) before rows that have them are appended
+        with open(self.path, newline="", encoding="utf-8") as f:
+            header = next(csv.reader(f), [])
+        if header == list(ORDER_COLUMNS):
+            return
+        with atomic_path(self.path) as tmp_path:
+            for index, chunk in enumerate(pd.read_csv(self.path, chunksize=chunk_size)):
+                chunk.reindex(columns=list(ORDER_COLUMNS)).to_csv(tmp_path, mode="a" if index else "w",
+                                                                  header=not index, index=False)
+
+    def replace(self, df):
+        # Readers keep seeing the old file until the new one is complete
+        with atomic_path(self.path) as tmp_path:
+            storage_frame(df[list(ORDER_COLUMNS)]).to_csv(tmp_path, index=False)
+        self._bump_version()
+
+    @contextmanager
+    def staged_replace(self):
+        staged = []
+        # The pieces go to a temporary file that replaces the stored one at the end
+        with atomic_path(self.path) as tmp_path:
+            def add(df):
+                storage_frame(df[list(ORDER_COLUMNS)]).to_csv(tmp_path, mode="a" if staged else "w",
+                                                              header=not staged, index=False)
+                staged.append(len(df))
+            yield add
+            if not staged:
+                os.remove(tmp_path) # Nothing to replace the stored orders with
+        if staged:
+            self._bump_version()
+
+    def clear(self):
+        for path in (self.path, self.version_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._remove_sidecars()
+
+    def export_csv(self, path=CSV_EXPORT_FILE):
+        if os.path.abspath(path) != os.path.abspath(self.path):
+            self.read().to_csv(path, index=False)
+        return path
+
+    def to_csv_bytes(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+class SqliteOrderStore(OrderStore):
+    """Orders in a local SQLite table; appends are single INSERT transactions."""
+
+    table = "orders"
+
+    def __init__(self, path="orders.db"):
+        self.path = path
+
+    @contextmanager
+    def _connect(self):
+        # Readers run no DDL or DML, so they never take the write lock
+        con = sqlite3.connect(self.path, timeout=30)
+        try:
+            yield con
+        finally:
+            con.close()
+
+    @contextmanager
+    def _connect_writer(self):
+        # The schema is created by the first write, inside the store lock
+        with self._connect() as con:
+            # WAL lets sessions keep reading while another one writes (the mode persists in the file)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute(f"CREATE TABLE IF NOT EXISTS {self.table} ({self._column_definitions()})")
+            stored = {row[1] for row in con.execute(f"PRAGMA table_info({self.table})")}
+            for name in ADDED_COLUMNS:
+                if name not in stored:
+                    con.execute(f'ALTER TABLE {self.table} ADD COLUMN "{name}" {ORDER_COLUMNS[name]}')
+            # Write counter, bumped in the same transaction as every change
+            con.execute("CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value INTEGER)")
+            con.execute("INSERT OR IGNORE INTO store_meta VALUES ('version', 0)")
+            con.commit()
+            yield con
+
+    @staticmethod
+    def _missing_table(error):
+        # A database file without the schema yet (e.g. created by a reader) holds no orders
+        return str(error).startswith("no such table")
+
+    def exists(self):
+        if not os.path.exists(self.path):
+            return False
+        with self._connect() as con:
+            try:
+                return con.execute(f"SELECT 1 FROM {self.table} LIMIT 1").fetchone() is not None
+            except sqlite3.OperationalError as error:
+                if self._missing_table(error):
+                    return False
+                raise
+
+    def version(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        with self._connect() as con:
+            try:
+                counter = con.execute("SELECT value FROM store_meta WHERE key = 'version'").fetchone()[0]
+            except sqlite3.OperationalError as error:
+                if self._missing_table(error):
+                    return None
+                raise
+        return ("sqlite", os.path.abspath(self.path), stat.st_mtime_ns, stat.st_size, counter)
+
+    def read(self):
+        if not self.exists():
+            return pd.DataFrame()
+        with self._connect() as con:
+            df = pd.read_sql_query(f"SELECT * FROM {self.table} ORDER BY rowid", con)
+        if df.empty:
+            return pd.DataFrame()
+        df["Confirmed"] = df["Confirmed"].astype(bool)
+        return df
+
+    def append(self, df):
+        if df.empty:
+            return
+        with self._connect_writer() as con, con:
+            self._insert(con, df)
+
+    def replace(self, df):
+        with self._connect_writer() as con, con:
+            con.execute(f"DELETE FROM {self.table}")
+            self._insert(con, df)
+
+    @contextmanager
+    def staged_replace(self):
+        staging = f"{self.table}_staging"
+        with self._connect_writer() as con:
+            # The pieces go to a staging table that takes the place of the orders table at the end
+            con.execute(f"DROP TABLE IF EXISTS {staging}")
+            con.execute(f"CREATE TABLE {staging} ({self._column_definitions()})")
+            con.commit()
+            staged = []
+
+            def add(df):
+                with con:
+                    self._insert_rows(con, df, staging)
+                staged.append(len(df))
+            try:
+                yield add
+                if staged:
+                    # One transaction (DDL needs an explicit BEGIN): readers see either all old or all new orders
+                    with con:
+                        con.execute("BEGIN IMMEDIATE")
+                        con.execute(f"DROP TABLE {self.table}")
+                        con.execute(f"ALTER TABLE {staging} RENAME TO {self.table}")
+                        self._bump_version(con)
+            finally:
+                con.execute(f"DROP TABLE IF EXISTS {staging}")
+                con.commit()
+
+    @staticmethod
+    def _column_definitions():
+        return ", ".join(f'"{name}" {sql_type}' for name, sql_type in ORDER_COLUMNS.items())
+
+    def _insert(self, con, df):
+        self._insert_rows(con, df, self.table)
+        self._bump_version(con)
+
+    @staticmethod
+    def _insert_rows(con, df, table):
+        columns = list(ORDER_COLUMNS)
+        df = storage_frame(df[columns])
+        placeholders = ", ".join("?" for _ in columns)
+        names = ", ".join(f'"{name}"' for name in columns)
+        # tolist() turns numpy scalars into Python values sqlite3 can bind
+        rows = zip(*(df[name].tolist() for name in columns))
+        con.executemany(f"INSERT INTO {table} ({names}) VALUES ({placeholders})", rows)
+
+    @staticmethod
+    def _bump_version(con):
+        con.execute("UPDATE store_meta SET value = value + 1 WHERE key = 'version'")
+
+    def clear(self):
+        for path in (self.path, self.path + "-wal", self.path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+        self._remove_sidecars()
+
+    def iter_chunks(self, chunk_size=50000):
+        if not self.exists():
+            return
+        with self._connect() as con:
+            for chunk in pd.read_sql_query(f"SELECT * FROM {self.table} ORDER BY rowid", con, chunksize=chunk_size):
+                chunk["Confirmed"] = chunk["Confirmed"].astype(bool)
+                yield chunk
+
+    def export_csv(self, path=CSV_EXPORT_FILE):
+        # Stream the table out in chunks so large histories are never fully in memory
+        with atomic_path(path) as tmp_path:
+            header = True
+            for chunk in self.iter_chunks():
+                chunk.to_csv(tmp_path, mode="w" if header else "a", header=header, index=False)
+                header = False
+            if header:
+                pd.DataFrame(columns=list(ORDER_COLUMNS)).to_csv(tmp_path, index=False)
+        return path
+
+STORE_BACKENDS = {
+    "sqlite": SqliteOrderStore,
+    "csv": CsvOrderStore,
+}
+
+def ImportLegacyCsv(store, path=CSV_EXPORT_FILE, chunk_size=50000):
+    """
+    Import the orders of an earlier version, kept in dashboard_data.csv, into
+    a SQLite store that does not exist yet, then rename the file to
+    dashboard_data.imported.csv. Returns the number of orders imported.
+    """
+    if not isinstance(store, SqliteOrderStore) or os.path.exists(store.path) or not os.path.exists(path):
+        return 0
+    with store.lock():
+        if os.path.exists(store.path):
+            return 0 # Imported by another session meanwhile
+        imported = 0
+        # Build the database aside, so a failed import leaves no half-filled store behind
+        with atomic_path(store.path) as tmp_path:
+            for chunk in pd.read_csv(path, chunksize=chunk_size):
+                missing = set(ORDER_COLUMNS) - set(chunk.columns) - set(ADDED_COLUMNS)
+                if missing:
+                    raise ValueError(f"{path} is missing the columns {sorted(missing)}")
+                SqliteOrderStore(tmp_path).append(chunk.reindex(columns=list(ORDER_COLUMNS)))
+                imported += len(chunk)
+            if not imported:
+                return 0
+        os.replace(path, os.path.join(os.path.dirname(path), LEGACY_IMPORTED_FILE))
+    return imported
+
+def get_order_store(backend=None):
+    """Return the configured order store (see MTO_ORDER_STORE)."""
+    backend = backend or os.environ.get("MTO_ORDER_STORE", "sqlite")
+    try:
+        return STORE_BACKENDS[backend.lower()]()
+    except KeyError:
+        raise ValueError(f"Unknown order store backend: {backend!r}") from None
@@ -0,0 +1,60 @@
+# summary.py
+from .aggregates import OrderAggregates
+
+# Detail rows listed in a batch report; the full detail is in the data export
+REPORT_MAX_ROWS = 1000
+
+class BatchSummary:
+    """Running batch metrics, updated one processed chunk at a time."""
+
+    def __init__(self):
+        self.aggregates = OrderAggregates()
+        self.chunks = 0
+        self.shard_timings = [] # Filled in by sharded runs (workers > 1)
+        self.report_thread = None # Set when the PDF report is built in the background
+        self.invalid_dates = [] # (file line, raw value) of order dates that could not be parsed
+        self.rule_version = None # Version of the status rules the run applied
+        self.duplicate_rows = 0 # Input rows already stored (deduplicated append runs)
+        self.skipped_rows = 0 # Rows of an input file that was appended before
+
+    def update(self, df):
+        """Add the metrics of one processed chunk (dashboard columns)."""
+        self.aggregates.update(df)
+        self.chunks += 1
+
+    def merge(self, other):
+        """Add the metrics of another summary."""
+        self.aggregates.merge(other.aggregates)
+        self.chunks += other.chunks
+        self.shard_timings += other.shard_timings
+        self.invalid_dates += other.invalid_dates
+        self.duplicate_rows += other.duplicate_rows
+        self.skipped_rows += other.skipped_rows
+
+    @property
+    def total_orders(self):
+        return self.aggregates.total_orders
+
+    @property
+    def total_revenue(self):
+        return self.aggregates.total_revenue
+
+    @property
+    def paid_count(self):
+        return self.aggregates.paid_count
+
+    @property
+    def unpaid_count(self):
+        return self.aggregates.unpaid_count
+
+    def as_dict(self):
+        return {
+            "Total Orders": self.total_orders,
+            "Total Revenue": round(self.total_revenue, 2),
+            "Paid Invoices": self.paid_count,
+            "Unpaid Invoices": self.unpaid_count,
+            "Invalid Order Dates": len(self.invalid_dates),
+            "Duplicate Rows": self.duplicate_rows,
+            "Skipped Rows": self.skipped_rows,
+            "Status Rule Version": self.rule_version,
+        }
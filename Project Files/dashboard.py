@@ -1,77 +1,95 @@
 import os
 import streamlit as st
-from utils.loader import load_css, load_dashboard_df
+from utils.loader import load_css, load_dashboard_df, invalidate_dashboard_cache
+from capstone_utils.storage import get_order_store, ImportLegacyCsv
 from utils.flowchart import generate_mto_flow_graph, offer_flowchart_download
-from pages_custom import charts, tables, data_processing, overview
+from utils.session import session_dir, session_path, clear_sessions
+from utils.exports import data_later, bundle_later, read_later, parquet_available, clear_exports, DATA_FORMATS
+from pages_custom import charts, tables, data_processing, overview, document_flow
 import time
 
 st.set_page_config(page_title="Group 1: MTO Production Dashboard", layout="wide")
 load_css("styles.css")
 
+# Orders an earlier version kept in dashboard_data.csv move into the store once
+try:
+    imported_orders = ImportLegacyCsv(get_order_store())
+except ValueError as error:
+    st.warning(f"dashboard_data.csv was not imported: {error}")
+else:
+    if imported_orders:
+        invalidate_dashboard_cache()
+        st.sidebar.success(f"Imported {imported_orders} orders from dashboard_data.csv (kept as dashboard_data.imported.csv).")
 
 # Sidebar Navigation
 st.sidebar.header("📂 Navigation")
-page = st.sidebar.radio("Go to:", ["Overview","Data Processing", "Charts", "Tables"])
+page = st.sidebar.radio("Go to:", ["Overview","Data Processing", "Charts", "Tables", "Document Flow"])
 
 # Sidebar Utilities
 st.sidebar.subheader("⚙️ Data Management")
 
 # Clear Data
 if st.sidebar.button("🗑️ Clear All Data",type="primary"):
-    if os.path.exists("dashboard_data.csv"):
-        os.remove("dashboard_data.csv")
-    if os.path.exists("mto_batch_flow_log.txt"):
-        os.remove("mto_batch_flow_log.txt")
-    if os.path.exists("mto_input_flow_log.txt"):        
-        os.remove("mto_input_flow_log.txt")
+    # Wait for batches and orders other sessions are writing
+    with get_order_store().lock():
+        get_order_store().clear()
+    invalidate_dashboard_cache()
+    clear_exports()
     if os.path.exists("mto_process_flow.pdf"):        
         os.remove("mto_process_flow.pdf")
-    if os.path.exists("uploaded_batch.csv"):        
-        os.remove("uploaded_batch.csv")
-    if os.path.exists("batch_report.pdf"):        
-        os.remove("batch_report.pdf")
-    if os.path.exists("input_report.pdf"):        
-        os.remove("input_report.pdf")
+    # Uploads, logs and reports of every session
+    if clear_sessions():
         st.sidebar.success("All data cleared. Dashboard reset.")
     else:
         st.sidebar.error("No available data to clear.")
         time.sleep(0.5)
     st.rerun()
 
-# Download CSV
-st.sidebar.write("CSV File")
-if os.path.exists("dashboard_data.csv"):
-    with open("dashboard_data.csv", "rb") as f:
-        st.sidebar.download_button("⬇️ Download Dashboard Data", f, "dashboard_data.csv")
+# Downloads are exported or read only when their button is clicked
+# Download Data
+st.sidebar.write("Data Files")
+order_store = get_order_store()
+if order_store.exists():
+    st.sidebar.download_button("⬇️ Download Dashboard Data", data_later("csv"), "dashboard_data.csv", DATA_FORMATS["csv"])
+    if parquet_available():
+        st.sidebar.download_button("⬇️ Download Dashboard Data (Parquet)", data_later("parquet"),
+                                   "dashboard_data.parquet", DATA_FORMATS["parquet"])
 else:
     st.sidebar.markdown("No dashboard data available yet.")
 
 # Download Logs
 st.sidebar.write("Text Logs")
-if os.path.exists("mto_batch_flow_log.txt"):
-    with open("mto_batch_flow_log.txt", "rb") as f:
-        st.sidebar.download_button("⬇️ Download Batch Log", f, "mto_batch_flow_log.txt")
+if os.path.exists(session_path("mto_batch_flow_log.txt")):
+    st.sidebar.download_button("⬇️ Download Batch Log", read_later(session_path("mto_batch_flow_log.txt")),
+                               "mto_batch_flow_log.txt", "text/plain")
 
-if os.path.exists("mto_input_flow_log.txt"):
-    with open("mto_input_flow_log.txt", "rb") as f:
-        st.sidebar.download_button("⬇️ Download Order Log", f, "mto_input_flow_log.txt")
+if os.path.exists(session_path("mto_input_flow_log.txt")):
+    st.sidebar.download_button("⬇️ Download Order Log", read_later(session_path("mto_input_flow_log.txt")),
+                               "mto_input_flow_log.txt", "text/plain")
 
 # Download PDFs
 st.sidebar.write("PDF Reports")
-if os.path.exists("batch_report.pdf"):
-    with open("batch_report.pdf", "rb") as f:
-        st.sidebar.download_button("⬇️ Download Batch Report (PDF)", f, "batch_report.pdf")
+if os.path.exists(session_path("batch_report.pdf")):
+    st.sidebar.download_button("⬇️ Download Batch Report (PDF)", read_later(session_path("batch_report.pdf")),
+                               "batch_report.pdf", "application/pdf")
+
+if os.path.exists(session_path("input_report.pdf")):
+    st.sidebar.download_button("⬇️ Download Input Report (PDF)", read_later(session_path("input_report.pdf")),
+                               "input_report.pdf", "application/pdf")
 
-if os.path.exists("input_report.pdf"):
-    with open("input_report.pdf", "rb") as f:
-        st.sidebar.download_button("⬇️ Download Input Report (PDF)", f, "input_report.pdf")
+# Everything above in one zip
+st.sidebar.write("Export Bundle")
+bundle_files = {name: session_path(name) for name in
+                ["mto_batch_flow_log.txt", "mto_input_flow_log.txt", "batch_report.pdf", "input_report.pdf"]}
+st.sidebar.download_button("⬇️ Download All (ZIP)", bundle_later(bundle_files, session_dir()),
+                           "mto_export.zip", "application/zip")
 
 st.sidebar.write("Flow Chart")
 flow_chart = generate_mto_flow_graph()
 with st.sidebar.container(): offer_flowchart_download(flow_chart)
 
 
-# Load Data Once
+# Load Data Once (cached until the stored orders change)
 df = load_dashboard_df()
 
 
@@ -84,3 +102,5 @@ elif page == "Data Processing":
     data_processing.show_data_processing()
 elif page == "Overview":
     overview.show_overview(df)
+elif page == "Document Flow":
+    document_flow.show_document_flow(df)
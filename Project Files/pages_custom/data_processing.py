@@ -2,7 +2,10 @@ import os
 import streamlit as st
 import pandas as pd
 import capstone_with_input as capstone
+from utils.loader import invalidate_dashboard_cache
 from utils.flowchart import generate_mto_flow_graph, offer_flowchart_download
+from utils.session import session_dir, session_path
+from utils.exports import read_later
 import time
 import datetime
 
@@ -14,41 +17,76 @@ def show_data_processing():
     uploaded_csv = st.file_uploader("Upload CSV for Batch Processing", type=["csv"])
 
     if uploaded_csv is not None:
-        tmp_batch_path = "uploaded_batch.csv"
-        with open(tmp_batch_path, "wb") as file:
-            file.write(uploaded_csv.getbuffer())
-        st.success(f"Uploaded file saved as {tmp_batch_path}")
+        tmp_batch_path = session_path("uploaded_batch.csv")
+        # Written once per upload, not on every rerun while the widget holds the file
+        if st.session_state.get("uploaded_file_id") != uploaded_csv.file_id or not os.path.exists(tmp_batch_path):
+            with open(tmp_batch_path, "wb") as file:
+                file.write(uploaded_csv.getbuffer())
+            st.session_state["uploaded_file_id"] = uploaded_csv.file_id
+        st.success(f"Uploaded file saved as {os.path.basename(tmp_batch_path)}")
+
+        workers = st.number_input("Worker processes", min_value=1, max_value=os.cpu_count() or 1, value=1,
+                                  help="Split the file into shards and process them in parallel.")
+        report_options = {
+            "Detail (first 1,000 orders)": "detail",
+            "Summary only": "summary",
+            "No PDF report": "off",
+        }
+        report = report_options[st.selectbox("Batch PDF report", list(report_options))]
 
         col1, col2 = st.columns(2)
         with col1:
             if st.button("Run New Batch (Overwrite)"):
-                capstone.run_batch_mode(tmp_batch_path)
+                summary = capstone.run_batch_mode(tmp_batch_path, workers=int(workers), report=report,
+                                                  output_dir=session_dir())
+                st.session_state["batch_shard_timings"] = summary.shard_timings
+                st.session_state["batch_invalid_dates"] = summary.invalid_dates
+                # Counts of an earlier append do not describe this run
+                st.session_state["batch_row_counts"] = None
+                invalidate_dashboard_cache()
                 st.success("Batch processed successfully (overwrite).")
                 st.rerun()
         with col2:
             if st.button("Add Batch (Append)"):
-                try:
-                    df_existing = pd.read_csv("dashboard_data.csv")
-                except FileNotFoundError:
-                    df_existing = pd.DataFrame()
-
-                capstone.run_batch_mode(tmp_batch_path)
-                df_new = pd.read_csv("dashboard_data.csv")
-
-                df_combined = pd.concat([df_existing, df_new], ignore_index=True) if not df_existing.empty else df_new
-                df_combined.to_csv("dashboard_data.csv", index=False)
-
+                summary = capstone.run_batch_mode(tmp_batch_path, append=True, workers=int(workers), report=report,
+                                                  output_dir=session_dir())
+                st.session_state["batch_shard_timings"] = summary.shard_timings
+                st.session_state["batch_invalid_dates"] = summary.invalid_dates
+                st.session_state["batch_row_counts"] = (summary.total_orders, summary.duplicate_rows, summary.skipped_rows)
+                invalidate_dashboard_cache()
                 st.success("Batch processed successfully (append).")
                 st.rerun()
 
+    # New and left-out rows of the last appended batch
+    if st.session_state.get("batch_row_counts"):
+        new_rows, duplicate_rows, skipped_rows = st.session_state["batch_row_counts"]
+        if skipped_rows:
+            st.info(f"This file was appended before; its {skipped_rows:,} rows were skipped.")
+        else:
+            st.info(f"Last appended batch: {new_rows:,} new orders, {duplicate_rows:,} duplicate rows already stored.")
+
+    # Per-shard timings of the last parallel run
+    if st.session_state.get("batch_shard_timings"):
+        timings = pd.DataFrame(st.session_state["batch_shard_timings"])
+        timings["rows/s"] = (timings["rows"] / timings["seconds"]).round(0)
+        st.caption("Last parallel batch run (per shard)")
+        st.dataframe(timings[["shard", "rows", "bytes", "seconds", "rows/s"]], hide_index=True)
+
+    # Orders of the last batch whose date could not be read
+    if st.session_state.get("batch_invalid_dates"):
+        invalid = pd.DataFrame(st.session_state["batch_invalid_dates"], columns=["Line", "ORDERDATE"])
+        st.warning(f"{len(invalid)} orders in the last batch have an unreadable ORDERDATE and were stored without a date.")
+        st.dataframe(invalid.head(1000), hide_index=True)
+
     # Always checks for batch log, even after rerun
-    if os.path.exists("mto_batch_flow_log.txt"):
-        with open("mto_batch_flow_log.txt", "rb") as file:
-            st.download_button("⬇️ Download Batch Log", file, "mto_batch_flow_log.txt")
+    # Files are read only when their button is clicked
+    if os.path.exists(session_path("mto_batch_flow_log.txt")):
+        st.download_button("⬇️ Download Batch Log", read_later(session_path("mto_batch_flow_log.txt")),
+                           "mto_batch_flow_log.txt", "text/plain")
     
-    if os.path.exists("batch_report.pdf"):
-        with open("batch_report.pdf", "rb") as file:
-            st.download_button("⬇️ Download Batch Report (PDF)", file, "batch_report.pdf")
+    if os.path.exists(session_path("batch_report.pdf")):
+        st.download_button("⬇️ Download Batch Report (PDF)", read_later(session_path("batch_report.pdf")),
+                           "batch_report.pdf", "application/pdf")
 
 
     st.markdown("---")
@@ -82,7 +120,9 @@ def show_data_processing():
             
         if st.button("Add Order"):
             if(va01 == "VA01"):
-                capstone.run_input_mode(customer, product, int(qty), float(price), str(order_date), status)
+                capstone.run_input_mode(customer, product, int(qty), float(price), str(order_date), status,
+                                        output_dir=session_dir())
+                invalidate_dashboard_cache()
                 st.success("Order added successfully.")
                 time.sleep(1.4)
                     
@@ -90,13 +130,13 @@ def show_data_processing():
             else:
                 st.warning("WARNING: TRANSACTION CODE MISSING")
 
-    if os.path.exists("mto_input_flow_log.txt"):
-            with open("mto_input_flow_log.txt", "rb") as file:
-                st.download_button("⬇️ Download Order Log", file, "mto_input_flow_log.txt")
+    if os.path.exists(session_path("mto_input_flow_log.txt")):
+            st.download_button("⬇️ Download Order Log", read_later(session_path("mto_input_flow_log.txt")),
+                               "mto_input_flow_log.txt", "text/plain")
     
-    if os.path.exists("input_report.pdf"):
-        with open("input_report.pdf", "rb") as file:
-            st.download_button("⬇️ Download Input Report (PDF)", file, "input_report.pdf")
+    if os.path.exists(session_path("input_report.pdf")):
+        st.download_button("⬇️ Download Input Report (PDF)", read_later(session_path("input_report.pdf")),
+                           "input_report.pdf", "application/pdf")
 
     st.markdown("---")
     st.subheader("📑 Process Flow Documentation")
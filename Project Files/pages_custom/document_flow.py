@@ -0,0 +1,62 @@
+import streamlit as st
+import pandas as pd
+from capstone_utils.storage import get_order_store
+from capstone_utils.doc_flow import OpenDocumentFlow
+from utils.tables import table_index
+
+LIST_COLUMNS = ["Sales Order", "Order Date", "Customer", "Product", "Qty", "Production Order", "Invoice", "Billing Status"]
+
+def show_flow(flow):
+    """Show one order chain, Sales Order through Billing, side by side."""
+    steps = st.columns(5)
+    with steps[0].container(border=True):
+        st.markdown(f"**Sales Order**  \n{flow['Sales Order']}")
+        st.caption(f"{flow['Order Date']} · {flow['Customer']}  \n{flow['Qty']} x {flow['Product']} · {flow['Status']}")
+    with steps[1].container(border=True):
+        st.markdown(f"**Planned Order**  \n{flow['Planned Order']}")
+    with steps[2].container(border=True):
+        st.markdown(f"**Production Order**  \n{flow['Production Order']}")
+        st.caption("Confirmed ✅" if flow["Confirmed"] else "Not confirmed ❌")
+    with steps[3].container(border=True):
+        # Delivery numbers are not stored with the orders, only their status
+        st.markdown(f"**Delivery**  \n{flow['Delivery']}")
+    with steps[4].container(border=True):
+        st.markdown(f"**Invoice**  \n{flow['Invoice']}")
+        st.caption(f"{flow['Amount']:,.2f} · {flow['Billing Status']}")
+
+def _pick_flow(flows: pd.DataFrame, key):
+    # Chains listed as a table; selecting a row drills down into it
+    event = st.dataframe(flows[LIST_COLUMNS], hide_index=True, on_select="rerun",
+                         selection_mode="single-row", key=key)
+    if event.selection.rows:
+        show_flow(flows.iloc[event.selection.rows[0]].to_dict())
+
+def show_document_flow(df: pd.DataFrame):
+    st.title("🔗 Document Flow")
+    if df.empty:
+        st.warning("No data to show.")
+        return
+    with st.spinner("Indexing documents…"):
+        # Only slow right after a batch overwrote the orders
+        flow_index = OpenDocumentFlow(get_order_store())
+
+    st.subheader("🔎 Find a Document")
+    number = st.text_input("Document number", placeholder="SO-0000000042, PL-…, PO-…, INV-… or the start of one").strip()
+    if number:
+        flow = flow_index.lookup(number)
+        if flow is not None:
+            show_flow(flow)
+        else:
+            matches = flow_index.search(number)
+            if matches.empty:
+                st.info(f"No document number starts with {number}.")
+            else:
+                st.caption(f"Documents starting with {number} (first {len(matches)}); select one to show its flow.")
+                _pick_flow(matches, "flow_matches")
+
+    st.subheader("👤 Documents by Customer")
+    customer = st.selectbox("Customer", table_index(df, "values", "Customer"), index=None)
+    if customer is not None:
+        flows = flow_index.customer_flows(customer)
+        st.caption(f"{len(flows):,} orders of {customer}; select one to show its flow.")
+        _pick_flow(flows, "flow_customer")
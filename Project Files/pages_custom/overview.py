@@ -1,6 +1,9 @@
 from utils.flowchart import generate_mto_flow_graph, offer_flowchart_download
+import os
 import streamlit as st
 import pandas as pd
+from capstone_utils.status_rules import get_status_rules, StoredRuleVersions
+from capstone_utils.storage import get_order_store
 
 def show_overview(df: pd.DataFrame):
     st.title("📘 Streamflow: Make-to-Order (MTO) Process — Overview")
@@ -110,24 +113,26 @@ Billing status is also derived from the initial STATUS via the status rules.
         )
 
     st.header("Status rules (how STATUS maps to outcomes)")
+    rules = get_status_rules()
     st.markdown(
-        "The project uses a status-to-outcomes mapping (a single source of truth). Below is the typical mapping used — edit the code if you want to change business rules."
+        "The project uses a status-to-outcomes mapping (a single source of truth). Below are the rules the "
+        f"order processing applies right now — version **{rules.version}**, loaded from `{os.path.basename(rules.source)}`."
     )
- 
-    # Present the mapping as a table for clarity
-    status_data = {
-        "STATUS": ["Shipped", "Disputed", "In Process", "On Hold", "Resolved", "Cancelled"],
-        "Confirmed (Production)": [True, False, True, False, True, True],
-        "Delivery Outcome": ["In Transit", "Not in Transit", "Not in Transit", "Not in Transit", "Delivered", "Not in Transit"],
-        "Billing Outcome": ["Processed", "Not Processed", "Not Processed", "Not Processed", "Processed", "Not Processed"]
-    }
-    df_status = pd.DataFrame(status_data)
-    st.table(df_status)
+
+    # The same compiled rules the batch and single-order processing use
+    st.table(rules.as_frame())
+
+    stored_versions = StoredRuleVersions(get_order_store())
+    if len(stored_versions) > 1 or (stored_versions and stored_versions != [rules.version]):
+        st.warning(
+            f"The stored orders were processed under rule version(s) {', '.join(stored_versions)}. "
+            "Run `python -m capstone_utils.status_rules --reevaluate` to apply the current rules to all of them."
+        )
 
     st.info(
         """
-If you want to change how a STATUS value is interpreted, edit the status mapping in the simulation module
-(e.g., `capstone_utils/status_rules.py` or `capstone_with_input.py` depending on your project structure).
+If you want to change how a STATUS value is interpreted, edit `capstone_utils/status_rules.json`
+(or point MTO_STATUS_RULES at another rules file) and raise its version.
 """
     )
 
@@ -148,7 +153,7 @@ Here is a compact example showing how one order moves through the system.
             "ORDERDATE": "2023-01-05",
             "STATUS": "Shipped"
         },
-        "Output (dashboard_data.csv) - key fields": {
+        "Output (stored order) - key fields": {
             "Order Date": "2023-01-05",
             "Customer": "ACME Corp",
             "Product": "Widget A",
@@ -181,8 +186,11 @@ Here is a compact example showing how one order moves through the system.
     with st.expander("What if the dashboard shows no data?"):
         st.write(
             """
-If `dashboard_data.csv` is missing or empty, go to **Data Processing** and run batch processing (upload a sample CSV)
-or add a manual order. The dashboard reads `dashboard_data.csv` to render charts and tables.
+If the order store is empty, go to **Data Processing** and run batch processing (upload a sample CSV)
+or add a manual order. The dashboard reads the order store to render charts and tables: a SQLite database
+(`orders.db`) by default, or `dashboard_data.csv` when the environment variable `MTO_ORDER_STORE` is set to `csv`.
+Orders an earlier version kept in `dashboard_data.csv` are imported into `orders.db` when it does not exist yet;
+the file is then renamed to `dashboard_data.imported.csv`.
 """
         )
 
@@ -196,8 +204,8 @@ Either rename your CSV headers to match the expected batch input (`CUSTOMERNAME`
     with st.expander("Where do I change the business rules?"):
         st.write(
             """
-Edit the `status_rules` mapping in the simulation code (either `capstone_with_input.py` or `capstone_utils/status_rules.py` in the refactored version).
-Changing that mapping will alter how orders are confirmed, shipped, and billed.
+Edit the rules file `capstone_utils/status_rules.json` and raise its version.
+Changing the rules will alter how new orders are confirmed, shipped, and billed; `python -m capstone_utils.status_rules --reevaluate` applies them to the stored history as well.
 """
         )
 
@@ -0,0 +1,30 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from capstone_utils import number_range
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_FILE = os.path.join(PROJECT_DIR, "sales_orders.csv")
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run the test inside an empty directory (the application uses relative paths) with its own number ranges."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(number_range, "_service", number_range.NumberRangeService())
+    return tmp_path
+
+@pytest.fixture
+def orders_file(workdir):
+    """
+    Return a function that writes the first `rows` orders of the bundled
+    sales_orders.csv (repeated as needed) to the work directory and returns
+    the path. Keyword arguments replace input columns, e.g. PRICEEACH=[...].
+    """
+    sample = pd.read_csv(SAMPLE_FILE, dtype=str, keep_default_na=False)
+
+    def write(rows=len(sample), name="orders.csv", **columns):
+        orders = sample.iloc[np.arange(rows) % len(sample)].reset_index(drop=True)
+        orders.assign(**columns).to_csv(name, index=False)
+        return str(workdir / name)
+    return write
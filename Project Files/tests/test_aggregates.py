@@ -0,0 +1,37 @@
+from capstone_utils.aggregates import OrderAggregates, LoadAggregates, RebuildAggregates, VerifyAggregates
+from capstone_utils.columnar import ProcessOrderColumns, read_order_columns
+from capstone_utils.runner import run_batch_mode
+from capstone_utils.schema import enforce_schema
+from capstone_utils.storage import get_order_store
+
+def test_appends_update_the_aggregates_in_place(orders_file):
+    run_batch_mode(orders_file(500), engine="columnar", report="off", log_level="off")
+    run_batch_mode(orders_file(300, name="more.csv"), engine="row", append=True, deduplicate=False,
+                   report="off", log_level="off")
+    store = get_order_store()
+    assert LoadAggregates(store).total_orders == 800
+    assert VerifyAggregates(store) == {}
+
+def test_single_orders_batches_and_typed_frames_give_the_same_figures(orders_file):
+    orders = ProcessOrderColumns(read_order_columns(orders_file(400)))
+    whole = OrderAggregates.from_frame(orders)
+
+    by_order = OrderAggregates()
+    for order in orders.to_dict("records"):
+        by_order.add_order(order)
+    merged = OrderAggregates.from_frame(orders.iloc[:150])
+    merged.merge(OrderAggregates.from_frame(orders.iloc[150:]))
+    typed = OrderAggregates.from_frame(enforce_schema(orders))
+
+    for other in (by_order, merged, typed):
+        assert whole.differences(other) == {}
+    assert whole.total_orders == 400 and whole.paid_count + whole.unpaid_count == 400
+
+def test_aggregates_of_another_store_version_are_not_used(orders_file):
+    run_batch_mode(orders_file(200), engine="columnar", report="off", log_level="off")
+    store = get_order_store()
+    store.append(store.read().head(10)) # Written without updating the aggregates
+    assert LoadAggregates(store) is None
+    assert VerifyAggregates(store) == {"persisted aggregates": ("missing or stale", "rebuild needed")}
+    assert RebuildAggregates(store).total_orders == 210
+    assert VerifyAggregates(store) == {}
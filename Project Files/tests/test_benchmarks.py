@@ -0,0 +1,16 @@
+import os
+from benchmarks import run
+from benchmarks.generate import GeneratedOrdersFile
+
+def test_workers_benchmark_runs_with_several_workers(monkeypatch):
+    # The sharded benchmark must not depend on the machine having a single core
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    result = run.RunBenchmark("batch_columnar_workers", GeneratedOrdersFile(2000), repeats=1, warmup=0)
+    assert result["operations"] == 1
+    assert len(result["runs"]) == 1
+
+def test_suite_runs_with_several_workers(monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    names = ["batch_columnar", "batch_columnar_workers", "input_mode"]
+    report = run.RunBenchmarks(2000, names, repeats=1, warmup=0)
+    assert set(report["results"]) == set(names)
@@ -0,0 +1,59 @@
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+from capstone_utils.aggregates import OrderAggregates
+from utils import charts
+from utils.reduce import CHART_ROW_BUDGETS, top_n, evenly_spaced, bucket_by_time, lttb
+
+@pytest.fixture
+def large_aggregates():
+    """Aggregates of ten years of daily orders from 5000 customers."""
+    days = pd.date_range("2015-01-01", "2024-12-31", freq="D")
+    rng = np.random.default_rng(0)
+    agg = OrderAggregates()
+    agg.total_orders = 20000
+    agg.revenue_by_date = dict(zip(days.strftime("%Y-%m-%d"), rng.uniform(1000, 60000, len(days)).round(2)))
+    customers = [f"Customer {i}" for i in range(5000)]
+    agg.revenue_by_customer = dict(zip(customers, rng.uniform(100, 90000, len(customers)).round(2)))
+    agg.orders_by_customer = dict(zip(customers, rng.integers(1, 40, len(customers)).tolist()))
+    agg.revenue_by_product = {f"Product {i}": float(i) for i in range(30)}
+    return agg
+
+def test_lttb_keeps_the_ends_and_the_extremes():
+    values = np.sin(np.linspace(0, 20, 5000))
+    values[1234], values[4321] = 5.0, -5.0
+    data = pd.DataFrame({"x": np.arange(5000), "y": values})
+    reduced = lttb(data, "x", "y", 200)
+    assert len(reduced) == 200
+    assert reduced["x"].is_monotonic_increasing
+    assert {0, 1234, 4321, 4999} <= set(reduced["x"])
+    assert lttb(data, "x", "y", 6000) is data
+
+def test_top_n_keeps_the_total():
+    data = pd.DataFrame({"Customer": list("abcdefgh"), "Orders": [5, 1, 8, 2, 7, 3, 6, 4]})
+    reduced = top_n(data, "Customer", "Orders", 4)
+    assert reduced["Customer"].tolist() == ["c", "e", "g", "Other (5)"]
+    assert reduced["Orders"].sum() == data["Orders"].sum()
+
+def test_evenly_spaced_keeps_the_range():
+    data = pd.DataFrame({"Amount": np.arange(1001.0)})
+    reduced = evenly_spaced(data, "Amount", 11)
+    assert reduced["Amount"].tolist() == [float(i) for i in range(0, 1001, 100)]
+
+def test_bucket_by_time_sums_into_the_finest_bucket_that_fits():
+    days = pd.date_range("2020-01-01", "2020-12-31", freq="D")
+    data = pd.DataFrame({"Order Date": days.strftime("%Y-%m-%d"), "Amount": 1.0})
+    assert bucket_by_time(data, "Order Date", "Amount", 400)[1] == "day"
+    monthly, bucket = bucket_by_time(data, "Order Date", "Amount", 20)
+    assert bucket == "month"
+    assert len(monthly) == 12 and monthly["Amount"].sum() == len(days)
+
+def test_charts_ship_at_most_their_row_budget(large_aggregates):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error") # e.g. SettingWithCopyWarning from writing to a reduced slice
+        for name, budget in CHART_ROW_BUDGETS.items():
+            chart = getattr(charts, name)(large_aggregates)
+            spec = chart.to_dict()
+            rows = max(len(values) for values in spec["datasets"].values())
+            assert rows <= budget, name
@@ -0,0 +1,9 @@
+from capstone_utils.__main__ import main
+
+def test_order_with_an_invalid_date_is_a_usage_error(workdir, capsys):
+    assert main(["order", "Land of Toys Inc.", "Classic Cars", "10", "99.5", "2004-13-45", "--no-pdf", "--no-log"]) == 2
+    assert "not a date" in capsys.readouterr().err
+
+def test_report_of_an_empty_store_fails(workdir, capsys):
+    assert main(["report"]) == 1
+    assert "No stored orders" in capsys.readouterr().err
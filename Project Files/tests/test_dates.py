@@ -0,0 +1,40 @@
+import datetime
+import pandas as pd
+from capstone_utils.dates import DateNormalizer
+from capstone_utils.runner import run_batch_mode
+
+def test_each_distinct_date_is_parsed_once():
+    dates = DateNormalizer()
+    parsed = []
+    parse = dates._parse
+    dates._parse = lambda strings: parsed.append(list(strings)) or parse(strings)
+    column = pd.Series(["2/24/2003 0:00", "5/7/2003 0:00"] * 500)
+    assert dates.normalize_column(column).tolist() == ["2003-02-24", "2003-05-07"] * 500
+    assert dates.normalize("2/24/2003 0:00") == "2003-02-24"
+    assert parsed == [["2/24/2003 0:00", "5/7/2003 0:00"]]
+    assert dates.date_format == "%m/%d/%Y %H:%M"
+
+def test_single_values_and_columns_agree():
+    values = ["2/24/2003 0:00", "12/1/2004 0:00", "not a date", "2004-06-01", ""]
+    by_value = DateNormalizer()
+    by_column = DateNormalizer()
+    singles = [by_value.normalize(value, line) for line, value in enumerate(values, start=2)]
+    assert by_column.normalize_column(pd.Series(values)).tolist() == singles
+    assert singles == ["2003-02-24", "2004-12-01", None, "2004-06-01", None]
+    assert by_value.invalid == by_column.invalid == [(4, "not a date"), (6, "")]
+    assert by_value.normalize(datetime.date(2004, 6, 1)) == "2004-06-01"
+
+def test_the_cache_is_bounded():
+    dates = DateNormalizer(max_cached=10)
+    for day in range(1, 29):
+        dates.normalize(f"2/{day}/2003 0:00")
+    assert len(dates._cache) <= 11
+
+def test_both_engines_report_the_lines_of_invalid_dates(orders_file):
+    order_dates = ["5/7/2003 0:00"] * 30
+    order_dates[4] = "someday"
+    order_dates[27] = "13/45/2003 0:00"
+    path = orders_file(30, ORDERDATE=order_dates)
+    for engine in ("row", "columnar"):
+        summary = run_batch_mode(path, engine=engine, chunk_size=10, report="off", log_level="off")
+        assert summary.invalid_dates == [(6, "someday"), (29, "13/45/2003 0:00")]
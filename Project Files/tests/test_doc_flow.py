@@ -0,0 +1,26 @@
+import os
+from capstone_utils.doc_flow import LoadDocumentFlow, OpenDocumentFlow
+from capstone_utils.runner import run_input_mode
+from capstone_utils.storage import get_order_store
+
+def test_numbers_without_leading_zeros_are_found(workdir):
+    order = run_input_mode("Land of Toys Inc.", "Classic Cars", 10, 99.5, "2004-06-01", log_level="off", report=False)
+    index = OpenDocumentFlow(get_order_store())
+    number = str(int(order["Sales Order"].split("-")[1]))
+    assert index.lookup(number)["Sales Order"] == order["Sales Order"]
+    assert index.lookup("so-" + number)["Sales Order"] == order["Sales Order"]
+    assert set(index.search(number)["Sales Order"]) == {order["Sales Order"]}
+
+def test_reads_do_not_write_to_the_index(workdir):
+    store = get_order_store()
+    index = OpenDocumentFlow(store)
+    # Nothing stored yet: reading neither creates the index nor its tables
+    assert index.lookup("SO-0000000001") is None and index.search("SO").empty and index.count() == 0
+    assert not os.path.exists(index.path)
+
+    run_input_mode("Land of Toys Inc.", "Classic Cars", 10, 99.5, "2004-06-01", log_level="off", report=False)
+    assert index.count() == 1
+    # An index that outlived its orders is stale for readers, not cleared by them
+    os.remove(store.path)
+    assert LoadDocumentFlow(store) is None
+    assert index.count() == 1
@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+from capstone_utils.columnar import read_order_columns, ProcessOrderColumns
+from capstone_utils.process import ProcessOrder
+
+def _row_engine_amounts(path):
+    orders = pd.read_csv(path, dtype=str)
+    return np.array([
+        ProcessOrder(order.CUSTOMERNAME, order.PRODUCTLINE, int(order.QUANTITYORDERED), float(order.PRICEEACH),
+                     order.ORDERDATE, order.STATUS)["Amount"]
+        for order in orders.itertuples()
+    ])
+
+def test_engines_store_the_same_amounts_for_half_cent_prices(orders_file):
+    rng = np.random.default_rng(0)
+    prices = ["82.885", "157.745", "0.125", "1.005"] + [f"{value:.3f}" for value in rng.uniform(1, 250, 2000)]
+    quantities = ["1", "13", "1", "7"] + [str(value) for value in rng.integers(1, 100, 2000)]
+    path = orders_file(len(prices), PRICEEACH=prices, QUANTITYORDERED=quantities)
+
+    columnar = ProcessOrderColumns(read_order_columns(path))["Amount"].to_numpy()
+    row = _row_engine_amounts(path)
+    assert np.array_equal(columnar, row)
+    # Half cents round up, as written
+    assert list(row[:4]) == [82.89, 2050.75, 0.13, 7.07]
@@ -0,0 +1,38 @@
+import os
+import zipfile
+import pandas as pd
+from capstone_utils.runner import run_batch_mode
+from capstone_utils.schema import ORDER_SCHEMA
+from capstone_utils.storage import get_order_store
+from utils.exports import export_data, export_bundle, EXPORTS_DIR
+
+def test_exports_are_written_once_per_data_version(orders_file):
+    run_batch_mode(orders_file(200), engine="columnar", report="off", log_level="off")
+    csv_path = export_data("csv")
+    os.utime(csv_path, ns=(0, 0))
+    assert export_data("csv") == csv_path and os.stat(csv_path).st_mtime_ns == 0
+
+    parquet = pd.read_parquet(export_data("parquet"))
+    assert {column: str(dtype) for column, dtype in parquet.dtypes.items()} == ORDER_SCHEMA
+    assert len(pd.read_csv(csv_path)) == len(parquet) == 200
+
+    run_batch_mode(orders_file(50, name="more.csv"), engine="columnar", append=True, deduplicate=False,
+                   report="off", log_level="off")
+    new_path = export_data("csv")
+    assert new_path != csv_path and len(pd.read_csv(new_path)) == 250
+    assert not os.path.exists(csv_path) # The export of the old version is removed
+    assert sorted(os.listdir(EXPORTS_DIR)) == [os.path.basename(new_path)]
+
+def test_bundle_holds_the_data_and_existing_files(orders_file, workdir):
+    run_batch_mode(orders_file(100), engine="columnar", report="summary", log_level="full")
+    files = {"report.pdf": "batch_report.pdf", "log.txt": "mto_batch_flow_log.txt", "missing.pdf": "nowhere.pdf"}
+    path = export_bundle(files, "bundles")
+    assert export_bundle(files, "bundles") == path
+    with zipfile.ZipFile(path) as bundle:
+        assert sorted(bundle.namelist()) == ["dashboard_data.csv", "dashboard_data.parquet", "log.txt", "report.pdf"]
+        assert bundle.read("dashboard_data.csv") == get_order_store().to_csv_bytes()
+
+    newer = os.stat("batch_report.pdf").st_mtime_ns + 10**9
+    os.utime("batch_report.pdf", ns=(newer, newer)) # A newer report of the same data
+    assert export_bundle(files, "bundles") != path
+    assert not os.path.exists(path)
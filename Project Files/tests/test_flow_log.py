@@ -0,0 +1,63 @@
+import json
+import os
+import pytest
+from capstone_utils.flow_log import FlowLogger, OrderLogLines, SUMMARY_FIELDS
+from capstone_utils.number_range import configure_number_ranges
+from capstone_utils.process import ProcessOrder
+from capstone_utils.runner import run_batch_mode
+
+def _flow_log(orders_file, engine, log_level):
+    configure_number_ranges(seed=0)
+    run_batch_mode(orders_file, engine=engine, log_level=log_level, report="off")
+    with open("mto_batch_flow_log.jsonl", encoding="utf-8") as f:
+        return f.read()
+
+def test_both_engines_write_the_same_flow_log(orders_file):
+    orders_file = orders_file(200)
+    for log_level in ("full", "summary"):
+        assert _flow_log(orders_file, "columnar", log_level) == _flow_log(orders_file, "row", log_level)
+
+def test_flow_log_renders_text(orders_file):
+    run_batch_mode(orders_file(20), engine="columnar", report="off")
+    with open("mto_batch_flow_log.txt", encoding="utf-8") as f:
+        text = f.read()
+    assert text.count("--- Process Summary ---") == 20
+    assert "Sales Order created for" in text
+
+def _records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def test_summary_level_keeps_only_the_summary_fields(workdir):
+    order = ProcessOrder("Land of Toys Inc.", "Classic Cars", 10, 99.5, "2004-06-01", "Shipped")
+    with FlowLogger("log.jsonl", "summary") as logger:
+        logger.log_order(dict(order, Price=99.5))
+    [record] = _records("log.jsonl")
+    assert list(record) == SUMMARY_FIELDS + ["Log Level"]
+    assert record["Rule Version"] == order["Rule Version"]
+    # Summary records render without the flow steps
+    assert "Sales Order created for" not in "\n".join(OrderLogLines(record))
+
+def test_off_level_writes_nothing(workdir):
+    with FlowLogger("log.jsonl", "off") as logger:
+        logger.log_order({"Sales Order": "SO-0000000001"})
+    assert not os.path.exists("log.jsonl")
+    with pytest.raises(ValueError):
+        FlowLogger("log.jsonl", "verbose")
+
+def test_writer_keeps_queue_order_and_copies_shard_logs(workdir):
+    with FlowLogger("shard.jsonl", "summary") as shard:
+        shard.log_order({name: 1 for name in SUMMARY_FIELDS})
+    with FlowLogger("log.jsonl", "summary", max_queue=4, batch_size=2) as logger:
+        for number in range(50):
+            logger.log_order({name: number for name in SUMMARY_FIELDS})
+        logger.log_jsonl_file("shard.jsonl")
+    records = _records("log.jsonl")
+    assert [record["Sales Order"] for record in records] == list(range(50)) + [1]
+    assert not os.path.exists("shard.jsonl")
+
+def test_writer_errors_are_raised_on_close(workdir):
+    logger = FlowLogger("log.jsonl", "full")
+    logger.log_order({"Price": object()}) # Not JSON serializable
+    with pytest.raises(TypeError):
+        logger.close()
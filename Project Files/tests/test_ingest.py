@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+from capstone_utils.ingest import LoadIngestedRows, StoredRowKeys
+from capstone_utils.runner import run_batch_mode, run_input_mode
+from capstone_utils.storage import get_order_store
+
+def test_single_orders_extend_the_row_keys(orders_file):
+    orders_file = orders_file(500)
+    run_batch_mode(orders_file, engine="columnar", append=True, report="off", log_level="off")
+    first = pd.read_csv(orders_file, nrows=1).iloc[0]
+    # The same order twice more, then a new one
+    for _ in range(2):
+        run_input_mode(first["CUSTOMERNAME"], first["PRODUCTLINE"], int(first["QUANTITYORDERED"]),
+                       float(first["PRICEEACH"]), first["ORDERDATE"], first["STATUS"], log_level="off", report=False)
+    run_input_mode("Land of Toys Inc.", "Classic Cars", 10, 99.5, "2004-06-01", log_level="off", report=False)
+
+    store = get_order_store()
+    saved = LoadIngestedRows(store)
+    assert saved is not None
+    assert len(saved.files) == 1 # The batch file's hash is kept
+    assert np.array_equal(saved.keys, np.sort(StoredRowKeys(store)))
+
+    summary = run_batch_mode(orders_file, engine="columnar", append=True, report="off", log_level="off")
+    assert summary.total_orders == 0 and summary.skipped_rows == 500
+
+def test_rows_stored_by_the_row_engine_are_recognized(orders_file):
+    prices = ["82.885", "157.745", "19.995", "1.005"] * 25
+    run_batch_mode(orders_file(100, PRICEEACH=prices), engine="row", report="off", log_level="off")
+    # The same orders and one more, in another file: only the new one is appended
+    summary = run_batch_mode(orders_file(101, name="extract.csv", PRICEEACH=prices + ["95.7"]),
+                             engine="columnar", append=True, report="off", log_level="off")
+    assert (summary.total_orders, summary.duplicate_rows) == (1, 100)
+    assert len(get_order_store().read()) == 101
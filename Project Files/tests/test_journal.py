@@ -0,0 +1,54 @@
+import json
+import threading
+import pytest
+from capstone_utils import journal
+from capstone_utils.aggregates import VerifyAggregates
+from capstone_utils.journal import OrderJournal, get_order_journal
+from capstone_utils.process import ProcessOrder
+from capstone_utils.storage import get_order_store
+
+def _order(customer="Land of Toys Inc."):
+    return ProcessOrder(customer, "Classic Cars", 10, 99.5, "2004-06-01", "Shipped")
+
+def test_concurrent_orders_are_committed_in_groups(workdir):
+    store = get_order_store()
+    order_journal = OrderJournal(store)
+    orders = [_order(f"Customer {i}") for i in range(40)]
+    threads = [threading.Thread(target=order_journal.commit, args=(order,)) for order in orders]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(store.read()["Sales Order"]) == sorted(order["Sales Order"] for order in orders)
+    assert order_journal.commits <= len(orders)
+    assert VerifyAggregates(store) == {}
+    assert not (workdir / "orders.journal.jsonl").exists()
+
+def test_orders_left_in_the_journal_are_replayed_once(workdir, monkeypatch):
+    monkeypatch.setattr(journal, "_journals", {})
+    store = get_order_store()
+    stored, lost = _order(), _order("Mini Wheels Co.")
+    OrderJournal(store).commit(stored)
+    # A process stopped after writing this group to the journal, maybe after storing part of it
+    with open(workdir / "orders.journal.jsonl", "w", encoding="utf-8") as f:
+        f.write(json.dumps(stored) + "\n" + json.dumps(lost) + "\n" + '{"Sales Order": "SO-')
+
+    get_order_journal(store)
+    assert store.read()["Sales Order"].tolist() == [stored["Sales Order"], lost["Sales Order"]]
+    assert VerifyAggregates(store) == {}
+    assert not (workdir / "orders.journal.jsonl").exists()
+    assert get_order_journal(store).replay() == 0
+
+def test_a_failed_commit_stores_nothing(workdir, monkeypatch):
+    store = get_order_store()
+    order_journal = OrderJournal(store)
+    order_journal.commit(_order())
+    before = store.read()
+
+    def fail(df):
+        raise OSError("disk full")
+    with monkeypatch.context() as patch, pytest.raises(OSError):
+        patch.setattr(store, "append", fail)
+        order_journal.commit(_order("Mini Wheels Co."))
+    assert store.read().equals(before)
+    assert order_journal.replay() == 0
@@ -0,0 +1,22 @@
+from capstone_utils.number_range import NumberRangeService, configure_number_ranges, FormatDocumentNumber
+from capstone_utils.runner import run_batch_mode
+from capstone_utils.storage import get_order_store
+
+def _stored_documents(orders_file, engine):
+    configure_number_ranges(seed=0)
+    run_batch_mode(orders_file, engine=engine, report="off", log_level="off")
+    return get_order_store().read()
+
+def test_seeded_engines_produce_the_same_documents(orders_file):
+    orders_file = orders_file(500, PRICEEACH=["82.885", "157.745", "95.7", "1.005"] * 125)
+    columnar = _stored_documents(orders_file, "columnar")
+    row = _stored_documents(orders_file, "row")
+    assert columnar.equals(row)
+    assert columnar["Sales Order"].iloc[0] == FormatDocumentNumber("SO", 1)
+
+def test_persisted_ranges_never_hand_out_a_number_twice(workdir):
+    # Two services sharing the state file, as two processes would
+    first, second = NumberRangeService(block_size=10), NumberRangeService(block_size=10)
+    numbers = [service.next_number("SO") for _ in range(25) for service in (first, second)]
+    assert len(set(numbers)) == len(numbers)
+    assert NumberRangeService().allocate_block("SO", 5).start > max(numbers)
@@ -0,0 +1,33 @@
+import pytest
+from capstone_utils.aggregates import LoadAggregates
+from capstone_utils.runner import run_batch_mode
+from capstone_utils.storage import get_order_store
+
+@pytest.mark.parametrize("backend", ["sqlite", "csv"])
+@pytest.mark.parametrize("engine", ["row", "columnar"])
+def test_failed_overwrite_leaves_the_stored_orders(orders_file, monkeypatch, backend, engine):
+    monkeypatch.setenv("MTO_ORDER_STORE", backend)
+    run_batch_mode(orders_file(1200), engine=engine, report="off", log_level="off")
+    store = get_order_store()
+    before, counter, aggregates = store.read(), store.version()[-1], LoadAggregates(store).to_dict()
+
+    quantities = ["10"] * 1200
+    quantities[900] = "ten" # Fails in the second chunk, after the first one was written
+    with pytest.raises(ValueError):
+        run_batch_mode(orders_file(1200, name="bad.csv", QUANTITYORDERED=quantities), engine=engine,
+                       chunk_size=500, report="off", log_level="off")
+    # The write counter the aggregates and other sidecars are stamped with
+    assert store.version()[-1] == counter
+    assert store.read().equals(before)
+    assert LoadAggregates(store).to_dict() == aggregates
+
+@pytest.mark.parametrize("backend", ["sqlite", "csv"])
+def test_chunked_overwrite_replaces_the_stored_orders(orders_file, monkeypatch, backend):
+    monkeypatch.setenv("MTO_ORDER_STORE", backend)
+    run_batch_mode(orders_file(1200), engine="columnar", report="off", log_level="off")
+    summary = run_batch_mode(orders_file(700, name="new.csv"), engine="columnar", chunk_size=300,
+                             report="off", log_level="off")
+    store = get_order_store()
+    assert summary.chunks == 3
+    assert len(store.read()) == 700
+    assert LoadAggregates(store).total_orders == 700
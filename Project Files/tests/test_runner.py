@@ -0,0 +1,11 @@
+import os
+from capstone_utils.runner import run_batch_mode
+
+def test_run_without_new_orders_replaces_the_report(orders_file):
+    orders_file = orders_file(300)
+    run_batch_mode(orders_file, engine="columnar", append=True, log_level="off")
+    os.utime("batch_report.pdf", ns=(0, 0))
+    summary = run_batch_mode(orders_file, engine="columnar", append=True, log_level="off")
+    assert summary.total_orders == 0 and summary.skipped_rows == 300
+    # Not the report of the first batch
+    assert os.stat("batch_report.pdf").st_mtime_ns > 0
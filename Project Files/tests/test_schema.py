@@ -0,0 +1,24 @@
+from capstone_utils.runner import run_batch_mode
+from capstone_utils.schema import ORDER_SCHEMA, enforce_schema, storage_frame, memory_report
+from capstone_utils.storage import SqliteOrderStore, get_order_store
+
+def _stored_orders(orders_file):
+    order_dates = ["5/7/2003 0:00"] * 300
+    order_dates[7] = "someday" # Stored without a date
+    run_batch_mode(orders_file(300, ORDERDATE=order_dates), engine="columnar", report="off", log_level="off")
+    return get_order_store().read()
+
+def test_enforce_schema_types_the_stored_orders(orders_file):
+    stored = _stored_orders(orders_file)
+    typed = enforce_schema(stored)
+    assert {column: str(dtype) for column, dtype in typed.dtypes.items()} == ORDER_SCHEMA
+    assert typed["Order Date"].isna().tolist() == stored["Order Date"].isna().tolist()
+    assert memory_report(stored, typed).loc["Total", "saved %"] > 0
+
+def test_typed_orders_are_stored_as_they_were_read(orders_file, tmp_path):
+    stored = _stored_orders(orders_file)
+    assert storage_frame(stored) is stored # Nothing to convert
+
+    copy = SqliteOrderStore(str(tmp_path / "copy.db"))
+    copy.append(enforce_schema(stored))
+    assert copy.read().equals(stored)
@@ -0,0 +1,18 @@
+import os
+from capstone_utils.runner import run_batch_mode
+from capstone_utils.storage import get_order_store
+
+COMPARED = ["Customer", "Product", "Qty", "Amount", "Status", "Order Date"]
+
+def _stored_orders(orders_file, **kwargs):
+    summary = run_batch_mode(orders_file, engine="columnar", report="off", log_level="off", **kwargs)
+    return summary, get_order_store().read()[COMPARED]
+
+def test_sharded_chunks_match_a_sequential_run(orders_file, workdir):
+    orders_file = orders_file(3000)
+    _, sequential = _stored_orders(orders_file)
+    summary, sharded = _stored_orders(orders_file, workers=3, chunk_size=250)
+    assert sharded.equals(sequential)
+    assert sum(timing["rows"] for timing in summary.shard_timings) == 3000
+    # The spooled chunks are removed once stored
+    assert not [name for name in os.listdir(workdir) if name.startswith("shards-")]
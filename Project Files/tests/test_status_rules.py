@@ -0,0 +1,58 @@
+import json
+import pytest
+from capstone_utils import status_rules
+from capstone_utils.aggregates import VerifyAggregates
+from capstone_utils.runner import run_batch_mode
+from capstone_utils.status_rules import StatusRules, ReevaluateOrders, StoredRuleVersions, configure_status_rules
+from capstone_utils.storage import get_order_store
+
+@pytest.fixture
+def new_rules(workdir, monkeypatch):
+    """Write version 2 of the bundled rules, under which disputed orders are billed, and return its path."""
+    monkeypatch.setattr(status_rules, "_rules", None)
+    with open(status_rules.RULES_FILE, encoding="utf-8") as f:
+        config = json.load(f)
+    config["version"] = "2"
+    config["rules"]["Disputed"]["billing"] = "Processed"
+    path = workdir / "rules_v2.json"
+    path.write_text(json.dumps(config), encoding="utf-8")
+    return str(path)
+
+def test_rules_evaluate_whole_columns_like_single_lookups():
+    rules = StatusRules.from_file()
+    statuses = ["Shipped", "on hold", "Unknown status", "Shipped", "RESOLVED"]
+    confirmed, delivery, billing = rules.apply(statuses)
+    for index, status in enumerate(statuses):
+        assert rules.lookup(status) == {"confirmed": confirmed[index], "delivery": delivery[index],
+                                        "billing": billing[index]}
+    assert rules.lookup("Unknown status") == {"confirmed": False, "delivery": "Unknown", "billing": "Not Processed"}
+
+def test_rules_must_not_define_a_status_twice():
+    outcome = {"confirmed": True, "delivery": "Delivered", "billing": "Processed"}
+    with pytest.raises(ValueError, match="twice"):
+        StatusRules({"Shipped": outcome, "SHIPPED": outcome}, outcome, version=3)
+
+@pytest.mark.parametrize("backend", ["sqlite", "csv"])
+@pytest.mark.parametrize("engine", ["row", "columnar"])
+def test_orders_are_reevaluated_chunk_by_chunk_under_new_rules(orders_file, new_rules, monkeypatch, backend, engine):
+    monkeypatch.setenv("MTO_ORDER_STORE", backend)
+    run_batch_mode(orders_file(1200), engine=engine, report="off", log_level="off")
+    store = get_order_store()
+    before = store.read()
+    assert set(before["Rule Version"].astype(str)) == {"1"}
+    assert StoredRuleVersions(store) == ["1"]
+
+    changed = ReevaluateOrders(store, configure_status_rules(new_rules), chunk_size=500)
+    after = store.read()
+    disputed = before["Status"] == "Disputed"
+    assert changed == disputed.sum() > 0
+    assert (after.loc[disputed, "Billing Status"] == "Paid").all()
+    assert after.drop(columns=["Billing Status", "Rule Version"]).equals(before.drop(columns=["Billing Status", "Rule Version"]))
+    assert set(after["Rule Version"].astype(str)) == {"2"}
+    assert StoredRuleVersions(store) == ["2"]
+    assert VerifyAggregates(store) == {}
+
+    # Orders processed afterwards carry the new version next to the re-evaluated ones
+    run_batch_mode(orders_file(10, name="more.csv"), engine=engine, append=True, deduplicate=False,
+                   report="off", log_level="off")
+    assert set(store.read()["Rule Version"].astype(str)) == {"2"}
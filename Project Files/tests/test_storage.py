@@ -0,0 +1,71 @@
+import sqlite3
+import pandas as pd
+from capstone_utils.schema import ORDER_COLUMNS
+from capstone_utils.storage import SqliteOrderStore, CsvOrderStore, ImportLegacyCsv
+
+def _orders(count):
+    return pd.DataFrame({
+        "Order Date": ["2004-06-01"] * count, "Customer": ["Land of Toys Inc."] * count,
+        "Product": ["Classic Cars"] * count, "Qty": [10] * count,
+        "Sales Order": [f"SO-{i:010d}" for i in range(count)], "Planned Order": [""] * count,
+        "Production Order": [""] * count, "Confirmed": [True] * count, "Status": ["Shipped"] * count,
+        "Delivery": [""] * count, "Invoice": [""] * count, "Billing Status": ["Billed"] * count,
+        "Amount": [995.0] * count, "Rule Version": ["1"] * count,
+    })[list(ORDER_COLUMNS)]
+
+def test_readers_do_not_wait_for_a_writer(tmp_path):
+    store = SqliteOrderStore(str(tmp_path / "orders.db"))
+    store.append(_orders(3))
+    version = store.version()
+
+    writer = sqlite3.connect(store.path, timeout=0)
+    writer.execute("BEGIN IMMEDIATE") # Hold the write lock, as a batch run does
+    try:
+        # Would raise "database is locked" if reads still wrote to the database
+        assert store.version() == version
+        assert len(store.read()) == 3
+        assert store.exists()
+    finally:
+        writer.rollback()
+        writer.close()
+
+def test_empty_database_file_holds_no_orders(tmp_path):
+    store = SqliteOrderStore(str(tmp_path / "orders.db"))
+    sqlite3.connect(store.path).close()
+    assert store.version() is None
+    assert not store.exists()
+    assert store.read().empty
+    assert list(store.iter_chunks()) == []
+    store.append(_orders(2))
+    assert store.version()[-1] == 1
+
+def test_legacy_csv_is_imported_once(tmp_path):
+    legacy = tmp_path / "dashboard_data.csv"
+    # Written before orders carried their rule version
+    _orders(4).drop(columns="Rule Version").to_csv(legacy, index=False)
+    store = SqliteOrderStore(str(tmp_path / "orders.db"))
+    assert ImportLegacyCsv(store, str(legacy)) == 4
+    assert len(store.read()) == 4
+    assert not legacy.exists() and (tmp_path / "dashboard_data.imported.csv").exists()
+
+    # After Clear All Data the orders are not imported again
+    store.clear()
+    assert ImportLegacyCsv(store, str(legacy)) == 0
+    assert store.version() is None
+
+def test_stores_written_before_rule_versions_get_the_column(tmp_path):
+    old = _orders(2).drop(columns="Rule Version")
+    columns = ", ".join(f'"{name}"' for name in old.columns)
+    con = sqlite3.connect(tmp_path / "orders.db")
+    con.execute(f"CREATE TABLE orders ({columns})")
+    con.executemany(f"INSERT INTO orders VALUES ({', '.join('?' for _ in old.columns)})", old.values.tolist())
+    con.commit()
+    con.close()
+    csv_file = tmp_path / "dashboard_data.csv"
+    old.to_csv(csv_file, index=False)
+
+    for store in (SqliteOrderStore(str(tmp_path / "orders.db")), CsvOrderStore(str(csv_file))):
+        store.append(_orders(1))
+        stored = store.read()
+        assert list(stored.columns) == list(ORDER_COLUMNS)
+        assert stored["Rule Version"].isna().tolist() == [True, True, False]
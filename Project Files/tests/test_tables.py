@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+from utils.tables import table_index
+
+def _orders():
+    return pd.DataFrame({
+        "Customer": ["Mini Wheels", "Land of Toys", None, "Toys4GrownUps", "land rover fans"] * 20,
+        "Amount": np.arange(100.0),
+        "Billing Status": ["Paid", "Unpaid"] * 50,
+    }, index=np.arange(100, 200))
+
+def test_table_indexes_are_row_positions():
+    df = _orders()
+    order = table_index(df, "order", "Customer", False)
+    assert df["Customer"].iloc[order[:20]].eq("Land of Toys").all()
+    assert df["Customer"].iloc[order[-20:]].isna().all() # Missing values sort last
+    assert table_index(df, "order", "Amount", True)[0] == 99
+    assert table_index(df, "equals", "Billing Status", "Paid").sum() == 50
+    assert table_index(df, "contains", "Customer", "LAND").sum() == 40
+    assert table_index(df, "values", "Customer") == ["Land of Toys", "Mini Wheels", "Toys4GrownUps", "land rover fans"]
+
+def _table_app(df):
+    from utils.tables import paged_table
+    paged_table(df, "billing", ["Customer", "Amount", "Billing Status"],
+                filters=["Billing Status"], search="Customer")
+
+def test_paged_table_shows_one_filtered_page():
+    app = AppTest.from_function(_table_app, args=(_orders(),)).run()
+    assert len(app.dataframe[0].value) == 25
+    assert app.caption[0].value.startswith("100 of 100 orders")
+
+    app.selectbox(key="billing_Billing Status").select("Paid").run()
+    app.text_input(key="billing_search").input("land").run()
+    app.selectbox(key="billing_sort").select("Amount").run()
+    app.toggle(key="billing_descending").set_value(True).run()
+    shown = app.dataframe[0].value
+    assert app.caption[0].value.startswith("20 of 100 orders")
+    assert shown["Billing Status"].eq("Paid").all()
+    assert shown["Amount"].is_monotonic_decreasing and len(shown) == 20
@@ -1,10 +1,16 @@
 import altair as alt
 import pandas as pd
 import numpy as np
+from capstone_utils.aggregates import OrderAggregates
+from utils.reduce import row_budget, top_n, evenly_spaced, bucket_by_time, lttb
 
-def billing_status_chart(df: pd.DataFrame):
-    data = df["Billing Status"].value_counts().reset_index()
-    data.columns = ["Billing Status", "Count"]
+# Every builder reads from the shared OrderAggregates (see utils.loader.load_aggregates)
+# instead of grouping the full order frame itself. Builders whose data grows with
+# the customers or dates reduce it to their row budget (see utils.reduce);
+# max_rows overrides the budget.
+
+def billing_status_chart(agg: OrderAggregates):
+    data = agg.counts_frame(agg.billing_counts, "Billing Status")
     return alt.Chart(data, title="Paid and Unpaid Orders").mark_arc().encode(
         theta="Count",
         color=alt.Color("Billing Status", scale=alt.Scale(
@@ -14,8 +20,8 @@ def billing_status_chart(df: pd.DataFrame):
         tooltip=["Billing Status", "Count"]
     ).properties(width=250, height=250)
 
-def revenue_by_product_chart(df: pd.DataFrame):
-    data = df.groupby("Product")["Amount"].sum().reset_index()
+def revenue_by_product_chart(agg: OrderAggregates, max_rows=None):
+    data = top_n(agg.revenue_by_product_frame(), "Product", "Amount", row_budget("revenue_by_product_chart", max_rows))
     return alt.Chart(data, title="Revenue by Product").mark_bar().encode(
         x="Product",
         y="Amount",
@@ -23,20 +29,20 @@ def revenue_by_product_chart(df: pd.DataFrame):
         tooltip=["Product", "Amount"]
     ).properties(width=400, height=400)
 
-def delivery_status_chart(df: pd.DataFrame):
-    data = df["Delivery"].value_counts().reset_index()
-    data.columns = ["Delivery Status", "Count"]
+def delivery_status_chart(agg: OrderAggregates):
+    data = agg.counts_frame(agg.delivery_counts, "Delivery Status")
     return alt.Chart(data, title = "Products In/Not In Transit").mark_arc().encode(
         theta="Count", color="Delivery Status", tooltip=["Delivery Status", "Count"]
     ).properties(width=250, height=250)
 
-def revenue_over_time_chart(df: pd.DataFrame):
-    data = df.groupby("Order Date")["Amount"].sum().reset_index()
+def revenue_over_time_chart(agg: OrderAggregates, max_rows=None):
+    # Daily points thinned to the budget, keeping the peaks and dips of the line
+    data = lttb(agg.revenue_by_date_frame(), "Order Date", "Amount", row_budget("revenue_over_time_chart", max_rows))
 
-    # Add a category column
-    data["Revenue Category"] = data["Amount"].apply(
+    # Add a category column (on a new frame: lttb may return a slice of the daily totals)
+    data = data.assign(**{"Revenue Category": data["Amount"].apply(
         lambda x: "Under 30,000 Revenue" if x < 30000 else "Over 30,000 Revenue"
-    )
+    )})
 
     # Base line (always neutral)
     line = (
@@ -68,9 +74,9 @@ def revenue_over_time_chart(df: pd.DataFrame):
 
     return (line + points).properties(title="Revenue Over Time", width=400, height=250)
 
-def orders_per_customer_chart(df: pd.DataFrame):
-    data = df["Customer"].value_counts().reset_index()
-    data.columns = ["Customer", "Orders"]
+def orders_per_customer_chart(agg: OrderAggregates, max_rows=None):
+    # Largest customers, the rest summed into one "Other" bar
+    data = top_n(agg.orders_by_customer_frame(), "Customer", "Orders", row_budget("orders_per_customer_chart", max_rows))
     return alt.Chart(data, title="Orders Per Customer").mark_bar().encode(
         x= 'Orders:Q',
         y=alt.Y('Customer:N', sort= '-x'),
@@ -78,9 +84,8 @@ def orders_per_customer_chart(df: pd.DataFrame):
         tooltip=["Customer", "Orders"]
     ).properties(width=250, height=500)
 
-def confirmed_chart(df: pd.DataFrame):
-    data = df["Confirmed"].value_counts().reset_index()
-    data.columns = ["Confirmed", "Count"]
+def confirmed_chart(agg: OrderAggregates):
+    data = agg.confirmed_frame()
     return alt.Chart(data, title="Production Orders").mark_arc().encode(
         theta="Count",
         color=alt.Color("Confirmed", scale=alt.Scale(
@@ -90,8 +95,8 @@ def confirmed_chart(df: pd.DataFrame):
         tooltip=["Confirmed", "Count"]
     ).properties(width=250, height=250)
 
-def top_customers_chart(df: pd.DataFrame):
-    data = df.groupby("Customer")["Amount"].sum().reset_index()
+def top_customers_chart(agg: OrderAggregates):
+    data = agg.revenue_by_customer_frame()
     data = data.sort_values("Amount", ascending=False).head(5)
 
     return alt.Chart(data, title="Top 5 Customers by Revenue").mark_bar().encode(
@@ -101,9 +106,8 @@ def top_customers_chart(df: pd.DataFrame):
         tooltip=["Customer", "Amount"]
     ).properties(width=400, height=250)
 
-def order_status_chart(df: pd.DataFrame):
-    data = df["Status"].value_counts().reset_index()
-    data.columns = ["Status", "Count"]
+def order_status_chart(agg: OrderAggregates):
+    data = agg.counts_frame(agg.status_counts, "Status")
 
     return alt.Chart(data, title="Order Status Breakdown").mark_arc().encode(
         theta="Count",
@@ -111,24 +115,25 @@ def order_status_chart(df: pd.DataFrame):
         tooltip=["Status", "Count"]
     ).properties(width=250, height=250)
 
-def cumulative_revenue_chart(df: pd.DataFrame):
-    data = df.groupby("Order Date")["Amount"].sum().reset_index()
-    data = data.sort_values("Order Date")
+def cumulative_revenue_chart(agg: OrderAggregates, max_rows=None):
+    # Running totals at the end of each day, week or month are exact, so bucketing loses nothing
+    data, bucket = bucket_by_time(agg.revenue_by_date_frame(), "Order Date", "Amount",
+                                  row_budget("cumulative_revenue_chart", max_rows))
     data["Cumulative Revenue"] = data["Amount"].cumsum()
 
     return alt.Chart(data, title="Cumulative Revenue Over Time").mark_line(point=True).encode(
-        x="Order Date:T",
+        x=alt.X("Order Date:T", title="Order Date" if bucket == "day" else f"Order Date (by {bucket})"),
         y="Cumulative Revenue:Q",
         tooltip=["Order Date:T", "Cumulative Revenue:Q"]
     ).properties(width=400, height=250)
 
-def order_funnel_chart(df: pd.DataFrame):
+def order_funnel_chart(agg: OrderAggregates):
     """Funnel chart: Sales → Production → Delivery → Billing"""
     stages = {
-        "Sales Orders": len(df),
-        "Production Orders": df["Production Order"].nunique() if "Production Order" in df.columns else 0,
-        "Delivered": int((df["Delivery"] == "Delivered").sum()) if "Delivery" in df.columns else 0,
-        "Billed": int((df["Billing Status"] == "Paid").sum()) if "Billing Status" in df.columns else 0
+        "Sales Orders": agg.total_orders,
+        "Production Orders": agg.production_orders,
+        "Delivered": agg.delivered_orders,
+        "Billed": agg.paid_count
     }
     data = pd.DataFrame({"Stage": list(stages.keys()), "Count": list(stages.values())})
 
@@ -139,14 +144,12 @@ def order_funnel_chart(df: pd.DataFrame):
         tooltip=["Stage", "Count"]
     ).properties(width=400, height=300)
 
-def monthly_revenue_growth_chart(df: pd.DataFrame):
+def monthly_revenue_growth_chart(agg: OrderAggregates, max_rows=None):
     """Revenue by month with line following the bar tops."""
-    data = df.copy()
-    data["Order Date"] = pd.to_datetime(data["Order Date"])
-    data["Year-Month"] = data["Order Date"].dt.to_period("M").astype(str)
-
-    grouped = data.groupby("Year-Month")["Amount"].sum().reset_index()
+    grouped = agg.revenue_by_month_frame()
     grouped["Growth (%)"] = round(grouped["Amount"].pct_change().fillna(0) * 100, 2)
+    # Most recent months only; growth is computed before trimming so the first bar keeps its value
+    grouped = grouped.tail(row_budget("monthly_revenue_growth_chart", max_rows))
 
     base = alt.Chart(grouped).encode(
         x=alt.X("Year-Month:N", title="Month"),
@@ -169,9 +172,9 @@ def monthly_revenue_growth_chart(df: pd.DataFrame):
         height=300
     )
 
-def customer_segmentation_chart(df: pd.DataFrame):
+def customer_segmentation_chart(agg: OrderAggregates, max_rows=None):
     """Group customers by revenue tiers (High/Medium/Low)."""
-    data = df.groupby("Customer")["Amount"].sum().reset_index()
+    data = agg.revenue_by_customer_frame().reset_index(drop=True)
 
     # Compute thresholds (tertiles)
     q1, q2 = np.percentile(data["Amount"], [33, 66]) if len(data) > 2 else (0, 0)
@@ -183,6 +186,9 @@ def customer_segmentation_chart(df: pd.DataFrame):
         else:
             return "Low Value"
     data["Segment"] = data["Amount"].apply(segment)
+    # Tiers come from all customers; the bars are a sample spread over the revenue range
+    data = evenly_spaced(data, "Amount", row_budget("customer_segmentation_chart", max_rows))
+    data = data.sort_values("Customer").reset_index(drop=True)
 
     return alt.Chart(data, title="Customer Segmentation by Revenue").mark_bar().encode(
         x="Customer:N",
@@ -195,9 +201,9 @@ def customer_segmentation_chart(df: pd.DataFrame):
     ).properties(width=500, height=300)
 
 
-def product_mix_share_chart(df: pd.DataFrame):
+def product_mix_share_chart(agg: OrderAggregates, max_rows=None):
     """Show % of revenue by product line."""
-    data = df.groupby("Product")["Amount"].sum().reset_index()
+    data = top_n(agg.revenue_by_product_frame(), "Product", "Amount", row_budget("product_mix_share_chart", max_rows))
 
     return alt.Chart(data, title="Product Mix Share").mark_arc(innerRadius=60).encode(
         theta="Amount:Q",
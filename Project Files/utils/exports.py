@@ -0,0 +1,102 @@
+import hashlib
+import importlib.util
+import os
+import shutil
+import zipfile
+from capstone_utils.locking import atomic_path
+from capstone_utils.schema import enforce_schema
+from capstone_utils.storage import get_order_store
+
+# Download buttons get a function instead of the file contents: Streamlit calls it
+# only when the button is clicked, so reruns no longer read or build anything.
+# Exports of the stored orders are written once per data version into EXPORTS_DIR
+# and shared by all sessions; older versions are removed when a new one is written.
+EXPORTS_DIR = "exports"
+DATA_EXPORT_NAME = "dashboard_data"
+DATA_FORMATS = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+BUNDLE_PREFIX = "mto_export"
+
+def parquet_available():
+    """Whether pandas can write Parquet (pyarrow or fastparquet is installed)."""
+    return any(importlib.util.find_spec(engine) is not None for engine in ("pyarrow", "fastparquet"))
+
+def _version_key(*parts):
+    return hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()[:16]
+
+def _remove_other_versions(directory, prefix, key):
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and not name.startswith(prefix + key):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass # Still being downloaded by another session; removed next time
+
+def export_data(file_format="csv"):
+    """
+    Return the path of the stored orders exported as `file_format` ("csv" or
+    "parquet") for the current data version, writing it on first request.
+    Parquet keeps the dashboard column types (see capstone_utils.schema).
+    """
+    if file_format not in DATA_FORMATS:
+        raise ValueError(f"Unknown export format: {file_format!r}")
+    store = get_order_store()
+    # Writers wait, so the export matches the version it is named after
+    with store.lock():
+        key = _version_key(store.version())
+        path = os.path.join(EXPORTS_DIR, f"{DATA_EXPORT_NAME}-{key}.{file_format}")
+        if os.path.exists(path):
+            return path
+        os.makedirs(EXPORTS_DIR, exist_ok=True)
+        with atomic_path(path) as tmp_path:
+            if file_format == "csv":
+                store.export_csv(tmp_path)
+            else:
+                enforce_schema(store.read()).to_parquet(tmp_path, index=False)
+    _remove_other_versions(EXPORTS_DIR, f"{DATA_EXPORT_NAME}-", key)
+    return path
+
+def export_bundle(files, directory):
+    """
+    Return the path of a zip (deflated) of the stored orders as CSV, and as
+    Parquet when available, plus `files` ({name in the archive: path}; missing
+    ones are left out). The bundle is written into `directory` and reused
+    until the data version or one of the files changes.
+    """
+    files = {name: path for name, path in files.items() if os.path.exists(path)}
+    stamps = sorted((name, os.stat(path).st_mtime_ns, os.path.getsize(path)) for name, path in files.items())
+    key = _version_key(get_order_store().version(), stamps)
+    path = os.path.join(directory, f"{BUNDLE_PREFIX}-{key}.zip")
+    if os.path.exists(path):
+        return path
+
+    formats = ["csv", "parquet"] if parquet_available() else ["csv"]
+    if get_order_store().version() is not None:
+        files.update({f"{DATA_EXPORT_NAME}.{file_format}": export_data(file_format) for file_format in formats})
+    os.makedirs(directory, exist_ok=True)
+    with atomic_path(path) as tmp_path, zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as bundle:
+        for archive_name, file_path in files.items():
+            bundle.write(file_path, archive_name)
+    _remove_other_versions(directory, f"{BUNDLE_PREFIX}-", key)
+    return path
+
+def read_later(path):
+    """download_button data that reads `path` only when the button is clicked."""
+    def read():
+        with open(path, "rb") as f:
+            return f.read()
+    return read
+
+def data_later(file_format="csv"):
+    """download_button data that exports the stored orders when the button is clicked."""
+    return lambda: read_later(export_data(file_format))()
+
+def bundle_later(files, directory):
+    """download_button data that builds the export bundle (see export_bundle) when the button is clicked."""
+    return lambda: read_later(export_bundle(files, directory))()
+
+def clear_exports():
+    """Remove the cached exports of the stored orders."""
+    shutil.rmtree(EXPORTS_DIR, ignore_errors=True)
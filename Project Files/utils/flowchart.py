@@ -1,5 +1,11 @@
+import hashlib
+import os
 import graphviz
 import streamlit as st
+from capstone_utils.locking import atomic_path
+
+# Rendered flowcharts, one file per graph source and format, reused across restarts
+FLOWCHART_CACHE_DIR = "flowchart_cache"
 
 def generate_mto_flow_graph():
     """Return a Graphviz Digraph object for the MTO process flow."""
@@ -24,10 +30,45 @@ def generate_mto_flow_graph():
 
     return dot
 
+@st.cache_resource(show_spinner=False)
+def graphviz_available():
+    """Whether the Graphviz `dot` binary can be run. Checked once per process."""
+    try:
+        graphviz.version()
+    except (graphviz.ExecutableNotFound, graphviz.CalledProcessError, OSError):
+        return False
+    return True
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def _rendered(source_hash, file_format, _source):
+    path = os.path.join(FLOWCHART_CACHE_DIR, f"{source_hash}.{file_format}")
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+    if not graphviz_available():
+        return None
+    data = graphviz.Source(_source).pipe(format=file_format)
+    os.makedirs(FLOWCHART_CACHE_DIR, exist_ok=True)
+    with atomic_path(path) as tmp_path:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+    return data
+
+def render_flowchart(flow_chart, file_format="pdf"):
+    """
+    Return a Graphviz Digraph rendered as `file_format` ("pdf", "svg", ...)
+    bytes, or None without Graphviz. Each graph source is rendered once: the
+    result is kept in memory and in FLOWCHART_CACHE_DIR, keyed by a hash of
+    the source, so reruns and sessions do not start `dot` again.
+    """
+    source = flow_chart.source
+    source_hash = hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+    return _rendered(source_hash, file_format, source)
+
 def offer_flowchart_download(flow_chart, filename="mto_process_flow.pdf"):
     """
-    Try to render a Graphviz Digraph to PDF bytes and show a download button.
-    If Graphviz system binary is missing, show a note instead of breaking.
+    Show a download button for a Graphviz Digraph as PDF, rendered once (see
+    render_flowchart). If Graphviz system binary is missing, show a note instead of breaking.
     
     Parameters
     ----------
@@ -37,15 +78,17 @@ def offer_flowchart_download(flow_chart, filename="mto_process_flow.pdf"):
         Filename to suggest when downloading the PDF (default 'mto_process_flow.pdf').
     """
     try:
-        pdf_bytes = flow_chart.pipe(format="pdf")
-        if pdf_bytes:
-            st.download_button(
-                label="⬇️ Download Process Flow (PDF)",
-                data=pdf_bytes,
-                file_name=filename,
-                mime="application/pdf"
-            )
+        pdf_bytes = render_flowchart(flow_chart, "pdf")
     except Exception:
+        pdf_bytes = None
+    if pdf_bytes:
+        st.download_button(
+            label="⬇️ Download Process Flow (PDF)",
+            data=pdf_bytes,
+            file_name=filename,
+            mime="application/pdf"
+        )
+    else:
         st.info(
             "⚠️ PDF export requires the Graphviz system binary. "
             "If the button is missing, install Graphviz locally "
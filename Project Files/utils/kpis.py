@@ -1,15 +1,17 @@
 import streamlit as st
 import pandas as pd
+from utils.loader import load_aggregates
 
 def show_kpis(df: pd.DataFrame):
-    # Computations using dataframe
+    # Computations using the shared aggregates (computed once per data version)
     """Render KPI metric tiles with context inside bordered containers."""
-    total_orders = len(df)
-    confirmed_orders = int(df["Confirmed"].sum()) if "Confirmed" in df.columns else 0
-    delivered_orders = int((df["Delivery"] == "Delivered").sum()) if "Delivery" in df.columns else 0
-    total_revenue = df["Amount"].sum() if "Amount" in df.columns else 0.0
+    agg = load_aggregates(df)
+    total_orders = agg.total_orders
+    confirmed_orders = agg.confirmed_orders
+    delivered_orders = agg.delivered_orders
+    total_revenue = agg.total_revenue
     avg_order_value = total_revenue / total_orders if total_orders > 0 else 0.0
-    paid_count = int((df["Billing Status"] == "Paid").sum()) if "Billing Status" in df.columns else 0
+    paid_count = agg.paid_count
     paid_pct = (paid_count / total_orders * 100) if total_orders > 0 else 0
     delivered_pct = (delivered_orders / total_orders * 100) if total_orders > 0 else 0
     confirmed_pct = (confirmed_orders / total_orders * 100) if total_orders > 0 else 0
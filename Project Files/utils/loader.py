@@ -1,6 +1,13 @@
-import os
 import pandas as pd
 import streamlit as st
+from capstone_utils.storage import get_order_store
+from capstone_utils.aggregates import OrderAggregates, LoadAggregates
+from capstone_utils.schema import enforce_schema
+from utils import charts
+from utils import tables
+
+# Built chart specs kept across reruns and sessions (least recently used dropped first)
+CHART_SPEC_CACHE_SIZE = 64
 
 def load_css(file_name: str):
     """Load external CSS file into Streamlit app."""
@@ -10,11 +17,65 @@ def load_css(file_name: str):
     except FileNotFoundError:
         pass
 
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _read_orders(data_version):
+    # One parsed frame per data version, shared by all reruns and sessions.
+    # Pages must treat it as read-only. The column types are set here, once.
+    df = enforce_schema(get_order_store().read())
+    df.attrs["data_version"] = data_version
+    return df
+
 def load_dashboard_df():
-    """Safely load dashboard_data.csv into a DataFrame."""
-    if os.path.exists("dashboard_data.csv"):
-        try:
-            return pd.read_csv("dashboard_data.csv")
-        except Exception:
+    """
+    Load the stored orders into a DataFrame.
+
+    The frame is parsed once per store version (file identity plus the write
+    counter kept by the store), so reruns reuse it until the data changes.
+    """
+    try:
+        version = get_order_store().version()
+        if version is None:
             return pd.DataFrame()
-    return pd.DataFrame()
+        return _read_orders(version)
+    except Exception:
+        return pd.DataFrame()
+
+def invalidate_dashboard_cache():
+    """Drop the cached frame and aggregates, e.g. after clearing or writing orders."""
+    _read_orders.clear()
+    _aggregates_for_version.clear()
+    _chart_spec_for_version.clear()
+    tables.clear_cache()
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _aggregates_for_version(data_version, _df):
+    # Use the aggregates the writers keep up to date when they match this data
+    store = get_order_store()
+    if store.version() == data_version:
+        persisted = LoadAggregates(store)
+        if persisted is not None:
+            return persisted
+    return OrderAggregates.from_frame(_df)
+
+def load_aggregates(df):
+    """Return the shared OrderAggregates of a frame from load_dashboard_df, once per data version."""
+    data_version = df.attrs.get("data_version")
+    if data_version is None:
+        return OrderAggregates.from_frame(df)
+    return _aggregates_for_version(data_version, df)
+
+@st.cache_resource(max_entries=CHART_SPEC_CACHE_SIZE, show_spinner=False)
+def _chart_spec_for_version(name, data_version, params, _df):
+    # Aggregation, chart building and Vega-Lite serialization run once per key
+    return getattr(charts, name)(load_aggregates(_df), **dict(params)).to_dict()
+
+def load_chart_spec(name, df, **params):
+    """
+    Return the Vega-Lite spec of the utils.charts builder `name` for a frame
+    from load_dashboard_df, for st.vega_lite_chart. Specs are cached on
+    (name, data version, params), so reruns that change neither skip the work.
+    """
+    data_version = df.attrs.get("data_version")
+    if data_version is None:
+        return getattr(charts, name)(load_aggregates(df), **params).to_dict()
+    return _chart_spec_for_version(name, data_version, tuple(sorted(params.items())), df)
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+# Altair embeds the chart data in the Vega-Lite spec sent to the browser, so
+# every chart is reduced to a fixed number of rows before it is built.
+
+# Rows each chart builder in utils.charts may ship at most
+CHART_ROW_BUDGETS = {
+    "orders_per_customer_chart": 100,
+    "customer_segmentation_chart": 100,
+    "revenue_by_product_chart": 20,
+    "product_mix_share_chart": 12,
+    "revenue_over_time_chart": 400,
+    "cumulative_revenue_chart": 400,
+    "monthly_revenue_growth_chart": 120,
+}
+DEFAULT_ROW_BUDGET = 500
+OTHER_LABEL = "Other"
+
+# Time buckets from finest to coarsest: (name, pandas period, approximate days)
+TIME_BUCKETS = [("day", "D", 1), ("week", "W", 7), ("month", "M", 30.4), ("quarter", "Q", 91.3), ("year", "Y", 365.25)]
+
+def row_budget(chart_name, max_rows=None):
+    """Rows a chart may ship: max_rows if given, else its entry in CHART_ROW_BUDGETS."""
+    if max_rows is not None:
+        return max_rows
+    return CHART_ROW_BUDGETS.get(chart_name, DEFAULT_ROW_BUDGET)
+
+def top_n(data: pd.DataFrame, label: str, value: str, n: int, other=OTHER_LABEL):
+    """
+    Keep the n-1 rows with the largest `value` and sum the rest into one
+    `other` row, so the result has at most n rows and the same total.
+    Frames of n rows or fewer are returned unchanged.
+    """
+    if len(data) <= n:
+        return data
+    data = data.sort_values(value, ascending=False, kind="stable")
+    kept, rest = data.iloc[:n - 1], data.iloc[n - 1:]
+    other_row = pd.DataFrame({label: [f"{other} ({len(rest)})"], value: [rest[value].sum()]})
+    return pd.concat([kept[[label, value]], other_row], ignore_index=True)
+
+def evenly_spaced(data: pd.DataFrame, by: str, n: int):
+    """
+    Keep n rows spread evenly over the rows sorted by `by` (the smallest and
+    largest included), so the distribution of `by` keeps its shape.
+    """
+    if len(data) <= n:
+        return data
+    ordered = data.sort_values(by, kind="stable")
+    positions = np.unique(np.linspace(0, len(ordered) - 1, n).round().astype(int))
+    return ordered.iloc[positions]
+
+def pick_time_bucket(dates: pd.Series, max_points: int):
+    """Return (name, pandas period) of the finest bucket that fits the date range into max_points."""
+    span_days = (dates.max() - dates.min()).days + 1 if len(dates) else 0
+    for name, period, days in TIME_BUCKETS:
+        if span_days / days <= max_points:
+            return name, period
+    return TIME_BUCKETS[-1][:2]
+
+def bucket_by_time(data: pd.DataFrame, date: str, value: str, max_points: int):
+    """
+    Sum `value` into day, week, month, quarter or year buckets, the finest that
+    keeps the date range within max_points. Returns (frame, bucket name); the
+    bucket column holds the first day of each bucket.
+    """
+    dates = pd.to_datetime(data[date])
+    name, period = pick_time_bucket(dates, max_points)
+    if period == "D":
+        return data.assign(**{date: dates}), name
+    starts = dates.dt.to_period(period).dt.start_time
+    bucketed = data.groupby(starts, sort=True)[value].sum().round(2)
+    return bucketed.rename_axis(date).reset_index(), name
+
+def lttb(data: pd.DataFrame, x: str, y: str, threshold: int):
+    """
+    Downsample a line series to `threshold` points with Largest-Triangle-
+    Three-Buckets: the first and last points are kept, and from each bucket
+    in between the point forming the largest triangle with its neighbours,
+    which keeps peaks and dips that averaging would flatten.
+    """
+    count = len(data)
+    if threshold >= count or threshold < 3:
+        return data
+    if pd.api.types.is_numeric_dtype(data[x]):
+        xs = data[x].to_numpy(dtype=float)
+    else:
+        xs = pd.to_datetime(data[x]).to_numpy().astype("datetime64[ns]").astype(np.int64).astype(float)
+    ys = data[y].to_numpy(dtype=float)
+
+    # Inner points split into threshold-2 buckets of (almost) equal size
+    edges = np.linspace(1, count - 1, threshold - 1).astype(int)
+    picked = np.empty(threshold, dtype=int)
+    picked[0], picked[-1] = 0, count - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # Third vertex: the average of the next bucket (the last point after the final bucket)
+        if bucket + 2 < len(edges):
+            next_start, next_end = edges[bucket + 1], edges[bucket + 2]
+        else:
+            next_start, next_end = count - 1, count
+        avg_x, avg_y = xs[next_start:next_end].mean(), ys[next_start:next_end].mean()
+        areas = np.abs((xs[previous] - avg_x) * (ys[start:end] - ys[previous])
+                       - (xs[previous] - xs[start:end]) * (avg_y - ys[previous]))
+        previous = start + int(areas.argmax())
+        picked[bucket + 1] = previous
+    return data.iloc[picked]
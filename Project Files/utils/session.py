@@ -0,0 +1,42 @@
+import os
+import shutil
+import time
+import uuid
+import streamlit as st
+
+# Uploads, flow logs and reports of each browser session live in their own folder,
+# so concurrent sessions never overwrite each other's files
+SESSIONS_DIR = "sessions"
+SESSION_MAX_AGE = 24 * 60 * 60 # Seconds without changes before a session folder is removed
+
+def session_dir():
+    """Return the scratch folder of the current session, creating it on first use."""
+    if "session_dir" not in st.session_state:
+        _remove_stale_sessions()
+        st.session_state["session_dir"] = os.path.join(SESSIONS_DIR, uuid.uuid4().hex)
+    path = st.session_state["session_dir"]
+    # Recreated if Clear All Data removed it from another session
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def session_path(name):
+    """Path of a file in the current session's scratch folder."""
+    return os.path.join(session_dir(), name)
+
+def clear_sessions():
+    """Remove the scratch folders of all sessions. Returns False if there were none."""
+    if not os.path.isdir(SESSIONS_DIR):
+        return False
+    shutil.rmtree(SESSIONS_DIR, ignore_errors=True)
+    return True
+
+def _remove_stale_sessions():
+    if not os.path.isdir(SESSIONS_DIR):
+        return
+    cutoff = time.time() - SESSION_MAX_AGE
+    for entry in os.scandir(SESSIONS_DIR):
+        try:
+            if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry.path, ignore_errors=True)
+        except FileNotFoundError:
+            pass # Removed by another session meanwhile
@@ -1,18 +1,103 @@
+import math
 import streamlit as st
 import pandas as pd
+import numpy as np
+
+# Tables only send the visible page to the browser. Sorting and filtering work
+# on positions: sort orders and filter masks are computed once per data
+# version and combined with numpy, so no filtered copy of the frame is made.
+PAGE_SIZES = [25, 50, 100, 250, 1000]
+ALL = "All"
+
+def _build_index(df, kind, column, value):
+    series = df[column].reset_index(drop=True)
+    if kind == "order": # Row positions sorted by the column (value = descending), missing values last
+        return series.sort_values(ascending=not value, kind="stable", na_position="last").index.to_numpy()
+    if kind == "equals":
+        return (series == value).to_numpy(dtype=bool, na_value=False)
+    if kind == "contains":
+        return series.astype("string").str.contains(value, case=False, regex=False).to_numpy(dtype=bool, na_value=False)
+    if kind == "values":
+        return sorted(series.dropna().unique().tolist(), key=str)
+    raise ValueError(f"Unknown table index: {kind!r}")
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _index_for_version(data_version, kind, column, value, _df):
+    return _build_index(_df, kind, column, value)
+
+def table_index(df, kind, column, value=None):
+    """
+    Sort order ("order"), filter mask ("equals", "contains") or distinct values
+    ("values") of a column, cached per data version for frames from load_dashboard_df.
+    """
+    data_version = df.attrs.get("data_version")
+    if data_version is None:
+        return _build_index(df, kind, column, value)
+    return _index_for_version(data_version, kind, column, value, df)
+
+def clear_cache():
+    """Drop the cached table indexes, e.g. after clearing or writing orders."""
+    _index_for_version.clear()
+
+def paged_table(df: pd.DataFrame, key: str, columns, where=None, filters=(), search=None):
+    """
+    Show `columns` of df one page at a time, sortable by any of them.
+    where=(column, value) keeps only matching rows, filters adds a select box
+    per column and search a case-insensitive text filter on one column.
+    """
+    controls = st.columns(2 + len(filters) + (search is not None))
+    sort_column = controls[0].selectbox("Sort by", columns, key=f"{key}_sort")
+    descending = controls[1].toggle("Descending", key=f"{key}_descending")
+
+    masks = []
+    if where is not None:
+        masks.append(table_index(df, "equals", *where))
+    for control, column in zip(controls[2:], filters):
+        choice = control.selectbox(column, [ALL] + table_index(df, "values", column), key=f"{key}_{column}")
+        if choice != ALL:
+            masks.append(table_index(df, "equals", column, choice))
+    if search is not None:
+        text = controls[-1].text_input(f"Search {search}", key=f"{key}_search").strip()
+        if text:
+            masks.append(table_index(df, "contains", search, text))
+
+    # Positions of the matching rows in sort order
+    positions = table_index(df, "order", sort_column, descending)
+    if masks:
+        mask = np.logical_and.reduce(masks)
+        positions = positions[mask[positions]]
+    total = len(positions)
+
+    page_size = st.session_state.get(f"{key}_page_size", PAGE_SIZES[0])
+    pages = max(1, math.ceil(total / page_size))
+    # A filter may leave fewer pages than the one shown before
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages
+    start = (st.session_state.get(f"{key}_page", 1) - 1) * page_size
+    # Typed frames hold Order Date as datetimes; show the day only, as stored
+    dates = {column: st.column_config.DateColumn(format="YYYY-MM-DD")
+             for column in columns if pd.api.types.is_datetime64_any_dtype(df[column])}
+    st.dataframe(df.iloc[positions[start:start + page_size]][columns], hide_index=True, column_config=dates)
+
+    footer = st.columns([1, 1, 2])
+    footer[0].number_input("Page", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+    footer[1].selectbox("Rows per page", PAGE_SIZES, key=f"{key}_page_size")
+    footer[2].caption(f"{total:,} of {len(df):,} orders · page {min(st.session_state.get(f'{key}_page', 1), pages)} of {pages:,}")
 
 def active_orders_table(df: pd.DataFrame):
     if {"Confirmed", "Sales Order", "Product", "Qty", "Production Order", "Delivery"} <= set(df.columns):
-        active_orders = df[df["Confirmed"] == True]
-        st.dataframe(active_orders[["Sales Order", "Product", "Qty", "Production Order", "Confirmed", "Delivery"]])
+        paged_table(df, "active_orders", ["Sales Order", "Product", "Qty", "Production Order", "Confirmed", "Delivery"],
+                    where=("Confirmed", True), filters=["Product", "Delivery"])
     else:
         st.info("Active orders table not available.")
 
 def billing_table(df: pd.DataFrame):
     if {"Invoice", "Customer", "Amount", "Billing Status"} <= set(df.columns):
-        st.dataframe(df[["Invoice", "Customer", "Amount", "Billing Status"]])
+        paged_table(df, "billing", ["Invoice", "Customer", "Amount", "Billing Status"],
+                    filters=["Billing Status"], search="Customer")
     else:
         st.info("Billing table not available.")
 
 def full_history_table(df: pd.DataFrame):
-    st.dataframe(df)
+    # The whole history is in "Download Dashboard Data"; only the visible page is sent here
+    paged_table(df, "history", list(df.columns), filters=["Status", "Product"], search="Customer")